@@ -1,9 +1,47 @@
-import os
+import argparse
 import pandas as pd
-from analyzers.SingleReportModelAnalyzers import get_post_execution_analysis
-from model.models.model_warburg import *
+from model.models.model_warburg import hif_relations_cache
+from runners.CostModel import CostModel
+from runners.ExperimentRunner import run_experiment, warm_up
+from runners.ResultCache import ResultCache
+from runners.RunLedger import RunLedger
+from runners.SweepRunner import SweepRunner
+from runners.WorkerPool import WorkerPool
 import json
 
+parser = argparse.ArgumentParser(description="Runs all experiments of the "
+                                             "experiments file in config.json")
+parser.add_argument("--workers", type=int, default=0,
+                    help="Number of experiments run at once, each in a "
+                         "process forked from a warmed up one. Defaults to "
+                         "0, running experiments one after another in this "
+                         "process.")
+parser.add_argument("--memory-limit", type=int, default=None,
+                    help="Address space limit of each worker, in MB")
+parser.add_argument("--ledger", default="ledger.sqlite",
+                    help="Database recording the state of each run, so "
+                         "restarting skips completed and running "
+                         "experiments. Defaults to ledger.sqlite.")
+parser.add_argument("--stale-after", type=float, default=None,
+                    help="Hours after which experiments recorded as running "
+                         "on another host are taken as crashed, and run "
+                         "again. By default, they are never run again.")
+parser.add_argument("--order", choices=["cost", "file"], default="cost",
+                    help="Order experiments are run in: longest predicted "
+                         "runtime first, based on the runs in the ledger, "
+                         "or as in the experiments file. Defaults to cost.")
+parser.add_argument("--max-mean-error", type=float, default=None,
+                    help="If given, runs are stopped once their absolute "
+                         "mean error against the expected growth curve is "
+                         "certain to exceed it, in mm3")
+parser.add_argument("--result-cache", default="result_cache",
+                    help="Directory mapping the parameters of completed "
+                         "seeded runs to their reports, so experiments "
+                         "repeating them refer to those reports rather than "
+                         "being run. Defaults to result_cache.")
+# Other arguments, Eg: --pysparse, are read by fipy
+args, _ = parser.parse_known_args()
+
 with open("config.json", "r") as f:
     config = json.load(f)
     f.close()
@@ -12,30 +50,48 @@ experiments_file = "{0}/{1}".format(
     config["experiments_dir"],
     config["experiment_file"])
 
-experiments = pd.read_csv(experiments_file).to_dict(orient="records")
+experiments = pd.read_csv(experiments_file)
+# Derived coefficients are fitted once for the whole file, and kept for
+# later sweeps
+hif_relations_path = config.get("hif_relations_cache")
+
+if hif_relations_path is not None:
+    hif_relations_cache.set_path(hif_relations_path)
+
+hif_relations_cache.precompile(experiments)
+experiments = experiments.to_dict(orient="records")
+
+if args.max_mean_error is not None:
+    for experiment in experiments:
+        experiment["maxMeanError"] = args.max_mean_error
+        experiment["epochDuration"] = config["epoch_duration"]
 
 num_epochs = config["num_epochs"]
-output_dir = config["output_dir"]
 
 print("There are {0} experiments".format(len(experiments)))
 
-for experiment in experiments:
+stale_after = args.stale_after * 3600 \
+    if args.stale_after is not None else None
+ledger = RunLedger(args.ledger, stale_after=stale_after)
+pool = None
+
+if args.workers > 0 and experiments:
+    print("Warming up...")
+    warm_up(experiments[0])
+
+    memory_limit = args.memory_limit * 1024 ** 2 \
+        if args.memory_limit is not None else None
+    pool = WorkerPool(args.workers, memory_limit)
 
-    experiment_dir = "{0}/{1}".format(output_dir, experiment["name"])
+cost_model = CostModel() if args.order == "cost" else None
+result_cache = ResultCache(args.result_cache, config["output_dir"],
+                           num_epochs)
 
-    if not os.path.isdir(experiment_dir):
-        os.mkdir(experiment_dir)
+SweepRunner(ledger, pool, cost_model, result_cache).run(
+    lambda e: run_experiment(e, config, num_epochs), experiments)
 
-    print("Running {0}".format(experiment["name"]))
-    print("Configuring...")
-    properties = generate_properties(experiment)
-    properties["outDir"] = experiment_dir
-    properties["config"] = config
-    print("Generating model...")
-    model = generate_model(properties, num_epochs)
-    print("Simulating...")
-    model.run()
-    print("Running analysis...")
-    get_post_execution_analysis(experiment_dir)
+if hif_relations_path is not None:
+    hif_relations_cache.save()
 
-    print("All done!")
+print("Runs by state: {0}".format(ledger.get_counts()))
+ledger.close()
@@ -8,6 +8,7 @@ from aws.Common import terminate_instance_and_spot_request, \
     get_instance_and_spot_request_id
 from aws.ExperimentReader import read_experiment_from_queue
 from aws.MessageWriter import write_message_to_queue
+from aws.S3ResultCache import S3ResultCache
 from model.models.model_warburg import *
 
 with open("config.json", "r") as f:
@@ -22,6 +23,16 @@ num_epochs = config["num_epochs"]
 run_analysis = True
 retry = 0
 
+# Results of runs completed by any worker, so repeated experiments are not
+# simulated again
+result_cache = S3ResultCache(config["aws"]["output_bucket"], num_epochs)
+
+# Derived coefficients fitted by earlier runs on this instance
+hif_relations_path = config.get("hif_relations_cache")
+
+if hif_relations_path is not None:
+    hif_relations_cache.set_path(hif_relations_path)
+
 while True:
 
     experiments_file = read_experiment_from_queue(
@@ -48,12 +59,30 @@ while True:
                 time.sleep(retry_interval)
     else:
         retry = 0
-        experiments_from_queue = pd.read_csv(experiments_file).to_dict(
+        experiments_from_queue = pd.read_csv(experiments_file)
+        # Derived coefficients are fitted once for the whole file
+        if hif_relations_cache.precompile(experiments_from_queue) > 0 and \
+                hif_relations_path is not None:
+            hif_relations_cache.save()
+        experiments_from_queue = experiments_from_queue.to_dict(
             orient="records")
 
         print("There are {0} experiments".format(len(experiments_from_queue)))
 
         for experiment in experiments_from_queue:
+            report = result_cache.get(experiment)
+
+            if report is not None:
+                print("{0} refers to the report of an identical run, "
+                      "{1}".format(experiment["name"], report))
+                result_cache.refer(experiment, report)
+                write_message_to_queue(
+                    config["aws"]["messages_queue"],
+                    experiment["name"],
+                    "CACHED"
+                )
+                continue
+
             try:
                 experiment_dir = "{0}/{1}".format(output_dir,
                                                   experiment["name"])
@@ -82,14 +111,21 @@ while True:
                     print("Running analysis...")
                     get_post_execution_analysis(experiment_dir)
                 print("Uploading to bucket")
-                upload_command = "aws s3 sync {0} " \
-                                 "s3://panaxea-warburg-results/{1}" \
-                    .format(
+                # Uploaded to the report location of the result cache, in
+                # the output bucket
+                upload_command = "aws s3 sync {0} {1}".format(
                     experiment_dir,
-                    experiment["name"]
+                    result_cache.get_report_location(experiment)
                 )
                 print(upload_command)
-                os.system(upload_command)
+
+                # A failed or partial upload is not recorded, so no later
+                # run refers to it
+                if os.system(upload_command) == 0:
+                    result_cache.add(experiment)
+                else:
+                    print("Upload of {0} failed, not caching it".format(
+                        experiment["name"]))
 
                 rm_command = "rm -r {0}".format(experiment_dir)
                 print(rm_command)
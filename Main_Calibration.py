@@ -0,0 +1,122 @@
+import argparse
+import json
+import pandas as pd
+from calibration.AdaptiveSearch import AdaptiveSearch
+from calibration.Evaluation import evaluate_experiment
+from calibration.ParameterSpace import ParameterSpace
+from calibration.SuccessiveHalving import SuccessiveHalving
+from model.models.model_warburg import hif_relations_cache
+from runners.ExperimentRunner import warm_up
+from runners.WorkerPool import WorkerPool
+
+parser = argparse.ArgumentParser(
+    description="Calibrates parameters against the expected growth curve, "
+                "either searching those declared in a bounds file "
+                "(adaptive) or running the rows of the experiments file at "
+                "increasing fidelities (halving)")
+parser.add_argument("--mode", choices=["adaptive", "halving"],
+                    default="adaptive")
+parser.add_argument("--bounds", default="experiments/calibration_bounds.json",
+                    help="Json file of the min and max (and optionally "
+                         "integer and log flags) of each parameter searched")
+parser.add_argument("--row", type=int, default=0,
+                    help="Row of the experiments file in config.json "
+                         "providing the parameters not searched")
+parser.add_argument("--fidelities",
+                    default="experiments/calibration_fidelities.json",
+                    help="Json file listing the fidelity levels of halving "
+                         "mode, from cheapest to full, each a dict of "
+                         "values overriding those of the experiments (and "
+                         "optionally numEpochs)")
+parser.add_argument("--keep-fraction", type=float, default=1 / 3.,
+                    help="Fraction of the experiments of each fidelity "
+                         "level promoted to the next one in halving mode")
+parser.add_argument("--batch-size", type=int, default=32)
+parser.add_argument("--batches", type=int, default=10)
+parser.add_argument("--elite-fraction", type=float, default=0.25)
+parser.add_argument("--seed", type=int, default=None,
+                    help="Seed of the search")
+parser.add_argument("--workers", type=int, default=0,
+                    help="Number of experiments run at once. Defaults to 0, "
+                         "running experiments one after another in this "
+                         "process.")
+parser.add_argument("--max-mean-error", type=float, default=None,
+                    help="If given, runs are stopped once their absolute "
+                         "mean error is certain to exceed it, in mm3")
+parser.add_argument("--out", default=None,
+                    help="Csv file the experiments run and their absolute "
+                         "mean error (ame) are saved to after each batch. "
+                         "Defaults to calibration.csv in the analysis "
+                         "directory.")
+# Other arguments, Eg: --pysparse, are read by fipy
+args, _ = parser.parse_known_args()
+
+with open("config.json", "r") as f:
+    config = json.load(f)
+    f.close()
+
+experiments_file = "{0}/{1}".format(
+    config["experiments_dir"],
+    config["experiment_file"])
+experiments = pd.read_csv(experiments_file)
+
+# Derived coefficients of the experiments file are fitted once, and kept
+# for later runs along with those fitted for experiments run in this process
+hif_relations_path = config.get("hif_relations_cache")
+
+if hif_relations_path is not None:
+    hif_relations_cache.set_path(hif_relations_path)
+
+hif_relations_cache.precompile(experiments)
+experiments = experiments.to_dict(orient="records")
+
+if args.max_mean_error is not None:
+    for experiment in experiments:
+        experiment["maxMeanError"] = args.max_mean_error
+        experiment["epochDuration"] = config["epoch_duration"]
+
+num_epochs = config["num_epochs"]
+epoch_duration = config["epoch_duration"]
+out_file = args.out or "{0}/calibration.csv".format(config["analysis_dir"])
+
+
+def evaluate(experiment, epochs=num_epochs):
+    return evaluate_experiment(experiment, epochs, epoch_duration)
+
+
+def save_trials(search):
+    pd.DataFrame(search.trials).to_csv(out_file, index=False)
+    best = min(search.trials, key=lambda t: t["ame"])
+    print("{0} experiments run, best absolute mean error {1}".format(
+        len(search.trials), best["ame"]))
+
+
+pool = None
+
+if args.workers > 0:
+    print("Warming up...")
+    warm_up(experiments[args.row])
+    pool = WorkerPool(args.workers)
+
+if args.mode == "adaptive":
+    with open(args.bounds, "r") as f:
+        space = ParameterSpace(json.load(f))
+
+    search = AdaptiveSearch(space, experiments[args.row],
+                            batch_size=args.batch_size,
+                            elite_fraction=args.elite_fraction,
+                            seed=args.seed)
+    search.run(evaluate, args.batches, pool, on_batch=save_trials)
+    best = search.best
+else:
+    with open(args.fidelities, "r") as f:
+        fidelities = json.load(f)
+
+    search = SuccessiveHalving(fidelities, num_epochs, args.keep_fraction)
+    best = search.run(evaluate, experiments, pool, on_level=save_trials)[0]
+
+if hif_relations_path is not None:
+    hif_relations_cache.save()
+
+print("Best experiment:")
+print(best)
@@ -0,0 +1,82 @@
+import argparse
+import json
+import os
+import pandas as pd
+from analyzers.SingleReportModelAnalyzers import get_ensemble_analysis
+from model.models.model_warburg import hif_relations_cache
+from runners.Ensemble import Ensemble
+from runners.ExperimentRunner import warm_up
+from runners.WorkerPool import WorkerPool
+
+parser = argparse.ArgumentParser(
+    description="Runs seeded replicates of a row of the experiments file in "
+                "config.json, and analyses the mean and spread of their "
+                "outputs")
+parser.add_argument("--row", type=int, default=0,
+                    help="Row of the experiments file replicated")
+parser.add_argument("--replicates", type=int, default=10)
+parser.add_argument("--seed", type=int, default=None,
+                    help="Seed of the first replicate, the others being "
+                         "seeded with the following integers. Defaults to "
+                         "the seed of the row, or one drawn at random.")
+parser.add_argument("--workers", type=int, default=0,
+                    help="Number of replicates run at once. Defaults to 0, "
+                         "running replicates one after another in this "
+                         "process.")
+parser.add_argument("--discard-reports", action="store_true",
+                    help="Discard the reports of each replicate, only "
+                         "keeping those of the ensemble")
+# Other arguments, Eg: --pysparse, are read by fipy
+args, _ = parser.parse_known_args()
+
+with open("config.json", "r") as f:
+    config = json.load(f)
+    f.close()
+
+experiments_file = "{0}/{1}".format(
+    config["experiments_dir"],
+    config["experiment_file"])
+experiment = pd.read_csv(experiments_file).to_dict(orient="records")[args.row]
+
+# Derived coefficients fitted by earlier runs
+hif_relations_path = config.get("hif_relations_cache")
+
+if hif_relations_path is not None:
+    hif_relations_cache.set_path(hif_relations_path)
+
+ensemble_dir = "{0}/{1}_ensemble".format(config["output_dir"],
+                                         experiment["name"])
+
+if not os.path.isdir(ensemble_dir):
+    os.mkdir(ensemble_dir)
+
+ensemble = Ensemble(experiment, args.replicates, config["num_epochs"],
+                    None if args.discard_reports else ensemble_dir, args.seed)
+
+
+def save_output(ensemble_output):
+    with open("{0}/ensemble.json".format(ensemble_dir), "w") as f:
+        json.dump(dict(ensemble_output.to_dict(), seeds=ensemble.seeds,
+                       failed=ensemble.failed), f)
+
+    print("{0} of {1} replicates done".format(ensemble_output.count,
+                                              args.replicates))
+
+
+pool = None
+
+if args.workers > 0:
+    print("Warming up...")
+    warm_up(experiment)
+    pool = WorkerPool(args.workers)
+
+ensemble_output = ensemble.run(pool, on_replicate=save_output)
+
+if hif_relations_path is not None:
+    hif_relations_cache.save()
+
+if ensemble_output.count > 0:
+    print("Running analysis...")
+    get_ensemble_analysis(ensemble_output, ensemble_dir)
+
+print("All done!")
@@ -0,0 +1,136 @@
+import numpy as np
+
+
+def get_series(output):
+    """
+    Returns the per-epoch series of a model output, Eg: agent numbers and
+    average cancer cell properties, as float arrays, leaving out entries
+    which are not series of numbers (Eg: distributions, causes of death).
+
+    Max distances are stored as complex numbers with no imaginary part, so
+    only their real part is kept.
+
+    Parameters
+    ----------
+    output : dict
+        The output of a model, Eg: model.output
+
+    Returns
+    -------
+    dict
+        The series, nested as in output
+    """
+    series = dict()
+
+    for key, value in output.items():
+        if isinstance(value, dict):
+            value = get_series(value)
+
+            if value:
+                series[key] = value
+        elif isinstance(value, (list, np.ndarray)):
+            array = np.asarray(value)
+
+            if array.ndim == 1 and array.dtype.kind in "biufc":
+                series[key] = np.real(array).astype(float)
+
+    return series
+
+
+class EnsembleOutput(object):
+    """
+    Aggregates the outputs of replicate runs of an experiment into the mean
+    and spread of each series, updated one run at a time (with Welford's
+    algorithm), so outputs need not be kept once added.
+
+    The mean is exposed as output, nested as in model.output, so an
+    ensemble can be passed to the get_avg_* analyzers of
+    SingleReportModelAnalyzers in place of a list of models, Eg:
+    get_avg_num_agents([ensemble]).
+
+    Runs may stop early (Eg: once no cancer cells are alive), so each epoch
+    of a series is aggregated over the runs which reached it, the number of
+    which is kept in counts. Series are as long as the longest run added.
+
+    Attributes
+    ----------
+    count : int
+        The number of runs added
+    output : dict
+        The mean of each series
+    counts : dict
+        The number of runs aggregated at each epoch of each series, nested
+        as output
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.output = dict()
+        self.m2 = dict()
+        self.counts = dict()
+
+    def add(self, output):
+        """
+        Adds the output of a run.
+
+        Parameters
+        ----------
+        output : dict
+            The output of the run, Eg: model.output, or its series as
+            returned by get_series
+        """
+        self.count += 1
+        self.__add(get_series(output), self.output, self.m2, self.counts)
+
+    def __add(self, series, mean, m2, counts):
+        for key, value in series.items():
+            if isinstance(value, dict):
+                self.__add(value, mean.setdefault(key, dict()),
+                           m2.setdefault(key, dict()),
+                           counts.setdefault(key, dict()))
+                continue
+
+            # Epochs no run reached so far start with no runs aggregated
+            previous = mean.get(key, np.empty(0))
+            extra = max(0, len(value) - len(previous))
+            mean[key] = np.concatenate([previous, np.zeros(extra)])
+            m2[key] = np.concatenate([m2.get(key, np.empty(0)),
+                                      np.zeros(extra)])
+            counts[key] = np.concatenate([counts.get(key, np.empty(0, int)),
+                                          np.zeros(extra, int)])
+
+            length = len(value)
+            counts[key][:length] += 1
+            delta = value - mean[key][:length]
+            mean[key][:length] += delta / counts[key][:length]
+            m2[key][:length] += delta * (value - mean[key][:length])
+
+    @property
+    def spread(self):
+        """
+        The sample standard deviation of each series, nested as output.
+        Zeros at epochs fewer than two runs reached.
+        """
+        return self.__get_spread(self.m2, self.counts)
+
+    def __get_spread(self, m2, counts):
+        return dict((key, self.__get_spread(value, counts[key])
+                     if isinstance(value, dict) else
+                     np.sqrt(value / np.maximum(1, counts[key] - 1)))
+                    for key, value in m2.items())
+
+    def to_dict(self):
+        """
+        Returns the number of runs, mean, spread and per-epoch counts of the
+        ensemble as a dict of plain lists, Eg: to be saved to json.
+        """
+        def to_lists(d):
+            return dict((k, to_lists(v) if isinstance(v, dict) else
+                         v.tolist()) for k, v in d.items())
+
+        return {
+            "count": self.count,
+            "mean": to_lists(self.output),
+            "spread": to_lists(self.spread),
+            "counts": to_lists(self.counts)
+        }
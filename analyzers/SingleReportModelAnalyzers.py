@@ -1,12 +1,9 @@
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-plt.switch_backend("agg")
 import numpy as np
 import os
 from panaxea.toolkit.Toolkit import depickle_from_lite
 
 from model.agents.CancerCell import CancerCell
+from model.utils.Plotting import plt
 
 
 def get_avg_num_agents(models):
@@ -268,6 +265,54 @@ def get_post_execution_analysis(target_dir, imgs_dir="imgs"):
         save_final_oxygen_hif_distributions(oxygen_dists, hif_dists, imgs_path)
 
 
+def get_ensemble_analysis(ensemble_output, target_dir, imgs_dir="imgs"):
+    """
+    Runs the post-execution analysis of the averages of each epoch over
+    the replicates of an experiment, as aggregated by an EnsembleOutput,
+    and saves the scatters to a specified directory.
+
+    Parameters
+    ----------
+    ensemble_output : EnsembleOutput
+        The aggregated outputs of the replicates
+    target_dir : string
+        The report dir of the ensemble
+    imgs_dir : string
+        The directory where the images will be saved (it is created if it
+        does not exist)
+    """
+    imgs_path = "%s/%s" % (target_dir, imgs_dir)
+    if not os.path.exists(imgs_path):
+        os.mkdir(imgs_path)
+
+    # The ensemble stands for a model holding the mean of each series
+    models = [ensemble_output]
+    post_execution_agent_num_visualizer(
+        render=False,
+        num_agents=get_avg_num_agents(models),
+        out_path=imgs_path)
+    post_execution_cancer_cell_properties_visualizer(
+        render=False,
+        avg_props=get_avg_cancer_props(models),
+        out_path=imgs_path)
+    vegf_stimulus_viewer(
+        render=False,
+        avg_vegf_stimulus=get_avg_vegf_stimulus(models),
+        out_path=imgs_path)
+    post_execution_oxygen_concentration_visualizer(
+        render=False,
+        avgProps=get_avg_oxygen_concentrations(models),
+        out_path=imgs_path)
+    tumour_volume_viewer(
+        render=False,
+        avg_tumour_volume=get_avg_tumour_volume(models),
+        out_path=imgs_path)
+    warburg_num_viewer(
+        render=False,
+        avg_warburg_cells=get_avg_num_warburg_cells(models),
+        out_path=imgs_path)
+
+
 def visualize_glucose_distributions(glucose_distributions, out_path):
     """
     Creates a scatter used to show average, maximum and minimum glucose
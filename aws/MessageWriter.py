@@ -3,7 +3,7 @@ import datetime
 import random
 import time
 
-from Common import get_instance_and_spot_request_id
+from aws.Common import get_instance_and_spot_request_id
 
 
 def write_message_to_queue(queue_url, experiment_name, message_text,
@@ -0,0 +1,69 @@
+import boto3
+import json
+from botocore.exceptions import ClientError
+
+from runners.ResultCache import ResultCache
+
+
+class S3ResultCache(ResultCache):
+    """
+    ResultCache kept in the s3 bucket reports are uploaded to, so workers on
+    different instances share it. Entries are kept as objects under a
+    prefix of the bucket, and experiments are satisfied by reference by
+    uploading a reference.json, naming the report referred to, as their
+    report.
+
+    Attributes
+    ----------
+    bucket_url : string
+        The bucket reports are uploaded to, Eg: s3://panaxea-warburg-results
+    num_epochs : int
+        The number of epochs experiments are run for
+    prefix : string, optional
+        The prefix entries are kept under. Defaults to result-cache.
+    """
+
+    def __init__(self, bucket_url, num_epochs, prefix="result-cache"):
+        super(S3ResultCache, self).__init__(prefix, bucket_url.rstrip("/"),
+                                            num_epochs)
+        self.bucket = bucket_url.replace("s3://", "").strip("/")
+        self.s3 = boto3.client("s3")
+
+    def read_entry(self, key):
+        try:
+            response = self.s3.get_object(
+                Bucket=self.bucket, Key="{0}/{1}.json".format(self.directory,
+                                                              key))
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ["NoSuchKey", "404"]:
+                return None
+            raise
+
+        return json.loads(response["Body"].read().decode("utf-8"))
+
+    def write_entry(self, key, entry):
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key="{0}/{1}.json".format(self.directory, key),
+            Body=json.dumps(entry).encode("utf-8"))
+
+    def report_exists(self, report):
+        response = self.s3.list_objects_v2(
+            Bucket=self.bucket, Prefix=self.__get_name(report) + "/",
+            MaxKeys=1)
+
+        return response.get("KeyCount", 0) > 0
+
+    def refer(self, experiment, report):
+        location = self.get_report_location(experiment)
+
+        if location != report:
+            self.s3.put_object(
+                Bucket=self.bucket,
+                Key="{0}/reference.json".format(experiment["name"]),
+                Body=json.dumps({"report": report}).encode("utf-8"))
+
+        return location
+
+    def __get_name(self, report):
+        return report.replace("s3://", "").strip("/").split("/", 1)[1]
@@ -0,0 +1,74 @@
+"""
+Benchmarks creating newborn cancer cells with the CancerCell constructor
+against copying them from the AgentFactory of the model, as done by
+dividing cells.
+
+Each way of creating cells is timed over the same number of cells, from the
+same model, and the median of a few repeats reported. Cells are created but
+not placed on the grid nor scheduled, so only creation is timed.
+
+Run from the root of the repository, Eg:
+
+    python benchmarks/agent_factory.py --num-cells 20000
+"""
+import argparse
+import numpy as np
+import pandas as pd
+import time
+
+from model.agents.CancerCell import CancerCell
+from model.core.AgentFactory import AgentFactory
+from model.models.model_warburg import generate_model, generate_properties
+
+
+def time_creation(create, model, num_cells, repeats):
+    times = []
+
+    for _ in range(repeats):
+        start = time.time()
+
+        for _ in range(num_cells):
+            create(model)
+
+        times.append(time.time() - start)
+
+    return np.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--experiments",
+                        default="experiments/experiments_warburg.csv")
+    parser.add_argument("--row", type=int, default=0,
+                        help="Experiment whose parameters are used")
+    parser.add_argument("--num-cells", type=int, default=20000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    experiment = pd.read_csv(args.experiments).to_dict(
+        orient="records")[args.row]
+    experiment["envSize"] = 20
+    experiment["seed"] = 0
+    experiment["healthyTissueField"] = True
+    experiment["numEndothelialCells"] = 0
+
+    properties = generate_properties(experiment)
+    properties["outDir"] = "."
+    model = generate_model(properties, 2)
+
+    factory = AgentFactory(CancerCell)
+    # The first cell is constructed, and kept as the template
+    factory.get(model)
+
+    print("%-12s %10s %15s" % ("creation", "time (s)", "per cell (us)"))
+
+    for name, create in [("constructor", CancerCell),
+                         ("factory", factory.get)]:
+        elapsed = time_creation(create, model, args.num_cells, args.repeats)
+
+        print("%-12s %10.3f %15.2f" % (name, elapsed,
+                                       elapsed / args.num_cells * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmarks stepping agents in the order they were created against stepping
+them in the Morton (Z-order) order of their positions (the spatialOrdering
+engine option), for a large population of cancer cells scattered over the
+grid.
+
+Two phases are timed for each ordering:
+
+* The agent phase, one epoch of agent steps on the schedule (helpers, and so
+  diffusion, are left out). A first epoch, in which agents are sorted, is
+  stepped beforehand and not timed;
+* Source/sink assembly, summing the metabolic rates of the cells per voxel
+  as done by the diffusion helpers.
+
+Run from the root of the repository, Eg:
+
+    python benchmarks/agent_ordering.py --env-size 40 --num-cells 100000
+"""
+import argparse
+import numpy as np
+import pandas as pd
+import time
+
+from model.agents.CancerCell import CancerCell
+from model.models.model_warburg import generate_model, generate_properties
+from model.utils.GridAggregation import sum_by_position
+
+
+def build_model(experiment, spatial_ordering, num_cells):
+    experiment = dict(experiment)
+    experiment["spatialOrdering"] = spatial_ordering
+
+    properties = generate_properties(experiment)
+    properties["outDir"] = "."
+    model = generate_model(properties, 2)
+
+    env_names = model.properties["envNames"]
+    size = model.properties["envSize"]
+    agent_env = model.environments[env_names["agentEnvName"]]
+
+    # Plentiful oxygen and glucose, so no cell dies during the epoch
+    for env_name in ["oxygenEnvName", "glucoseEnvName"]:
+        model.environments[env_names[env_name]].set_values(
+            np.full(agent_env.num_positions, 1000.))
+
+    # Cells are created at random positions, so creation order is
+    # unrelated to position, as in a grown tumour
+    positions = (model.random_stream.random_array((num_cells, 3)) *
+                 size).astype(int)
+
+    for position in positions:
+        c = CancerCell(model)
+        c.add_agent_to_grid(env_names["agentEnvName"], tuple(position),
+                            model)
+        model.schedule.add_agent(c)
+
+    model.schedule.helpers = []
+
+    return model
+
+
+def time_agent_phase(model):
+    start = time.time()
+    model.schedule.step_schedule(model)
+    return time.time() - start
+
+
+def time_assembly(model, repeats):
+    env_name = model.properties["envNames"]["agentEnvName"]
+    shape = (model.properties["envSize"],) * 3
+    times = []
+
+    for _ in range(repeats):
+        start = time.time()
+        sinks = list(model.schedule.active_agents)
+        sum_by_position(sinks, [a.current_metabolic_rate for a in sinks],
+                        env_name, shape)
+        times.append(time.time() - start)
+
+    return np.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--experiments",
+                        default="experiments/experiments_warburg.csv")
+    parser.add_argument("--row", type=int, default=0,
+                        help="Experiment whose parameters are used")
+    parser.add_argument("--env-size", type=int, default=40)
+    parser.add_argument("--num-cells", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    experiment = pd.read_csv(args.experiments).to_dict(
+        orient="records")[args.row]
+    experiment["envSize"] = args.env_size
+    experiment["seed"] = 0
+    # Healthy cells and tip cells are not stepped, so leaving them out
+    # keeps setup short without affecting the timings
+    experiment["healthyTissueField"] = True
+    experiment["numEndothelialCells"] = 0
+
+    print("%-10s %15s %15s" % ("ordering", "agent phase (s)",
+                               "assembly (s)"))
+
+    for spatial_ordering in [False, True]:
+        model = build_model(experiment, spatial_ordering, args.num_cells)
+        # Sorting happens when the schedule is first stepped
+        model.schedule.step_schedule(model)
+        agent_phase = time_agent_phase(model)
+        assembly = time_assembly(model, args.repeats)
+
+        print("%-10s %15.3f %15.3f" % (
+            "morton" if spatial_ordering else "creation", agent_phase,
+            assembly))
+
+
+if __name__ == "__main__":
+    main()
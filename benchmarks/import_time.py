@@ -0,0 +1,61 @@
+"""
+Benchmarks the time taken to import a module (by default
+model.models.model_warburg, which every worker process imports) in a fresh
+interpreter, as paid by each worker on start up.
+
+The median time of a few imports is reported, along with which of the heavy
+optional dependencies (plotting, fipy, aws) the import pulled in. These are
+imported lazily, by the code paths using them, so none should be listed.
+
+Run from the root of the repository, Eg:
+
+    python benchmarks/import_time.py --repeats 10
+"""
+import argparse
+import numpy as np
+import subprocess
+import sys
+
+# Heavy dependencies only some code paths need
+optional_modules = ["matplotlib", "fipy", "boto3"]
+
+script = """
+import sys
+import time
+
+start = time.time()
+import {0}
+print(time.time() - start)
+print(",".join(m for m in {1} if m in sys.modules))
+"""
+
+
+def time_import(module):
+    output = subprocess.check_output(
+        [sys.executable, "-c", script.format(module, optional_modules)],
+        universal_newlines=True).split("\n")
+
+    return float(output[0]), [m for m in output[1].split(",") if m]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", default="model.models.model_warburg")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    times = []
+
+    for _ in range(args.repeats):
+        elapsed, imported = time_import(args.module)
+        times.append(elapsed)
+
+    print("%-30s %12s %12s" % ("module", "median (s)", "min (s)"))
+    print("%-30s %12.3f %12.3f" % (args.module, np.median(times),
+                                   min(times)))
+    print("Optional dependencies imported: %s" % (
+        ", ".join(imported) if imported else "none"))
+
+
+if __name__ == "__main__":
+    main()
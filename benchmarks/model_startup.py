@@ -0,0 +1,87 @@
+"""
+Benchmarks model construction (generate_model) across environment sizes,
+where the number of healthy and tip cells, and so construction time, grows
+with the cube of the size.
+
+For each size, the median time of a few constructions is reported, along
+with the number of agents created, both with a cold layout cache (as for
+the first experiment of a layout in a sweep) and a warm one (as for the
+following ones). Properties are generated once per size and not timed.
+
+Run from the root of the repository, Eg:
+
+    python benchmarks/model_startup.py --env-sizes 20 40 60
+"""
+import argparse
+import numpy as np
+import os
+import pandas as pd
+import sys
+import time
+
+from model.core.LayoutCache import LayoutCache
+from model.models.model_warburg import generate_model, generate_properties
+
+
+def time_construction(properties, repeats, warm):
+    times = []
+    stdout = sys.stdout
+    layouts = LayoutCache()
+    model = None
+
+    if warm:
+        layouts.get(properties)
+
+    for _ in range(repeats):
+        if not warm:
+            layouts = LayoutCache()
+
+        # The previous model is freed before timing the next one
+        model = None
+        # generate_model reports on the agents it creates
+        sys.stdout = open(os.devnull, "w")
+
+        try:
+            start = time.time()
+            model = generate_model(properties, 1, layouts)
+            times.append(time.time() - start)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+
+    return np.median(times), len(model.schedule.agents)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--experiments",
+                        default="experiments/experiments_warburg.csv")
+    parser.add_argument("--row", type=int, default=0,
+                        help="Experiment whose parameters are used")
+    parser.add_argument("--env-sizes", type=int, nargs="+",
+                        default=[20, 40, 60])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    experiment = pd.read_csv(args.experiments).to_dict(
+        orient="records")[args.row]
+    experiment["seed"] = 0
+
+    print("%-10s %10s %12s %12s" % ("envSize", "agents", "cold (s)",
+                                    "warm (s)"))
+
+    for env_size in args.env_sizes:
+        experiment["envSize"] = env_size
+        properties = generate_properties(experiment)
+        properties["outDir"] = "."
+
+        cold, num_agents = time_construction(properties, args.repeats,
+                                             False)
+        warm, _ = time_construction(properties, args.repeats, True)
+
+        print("%-10d %10d %12.3f %12.3f" % (env_size, num_agents, cold,
+                                            warm))
+
+
+if __name__ == "__main__":
+    main()
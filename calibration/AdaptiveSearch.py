@@ -0,0 +1,140 @@
+import numpy as np
+
+from calibration.Evaluation import evaluate_batch
+
+
+class AdaptiveSearch(object):
+    """
+    Searches for the parameter values minimising an error (Eg: the absolute
+    mean error against the expected growth curve), proposing experiments in
+    batches so each batch can be run in parallel.
+
+    The first batch is a Latin hypercube sample of the parameter space.
+    Each following batch is drawn from a normal distribution (independent
+    per parameter, in the unit hypercube) fitted to the elite experiments so
+    far, those with the lowest errors: a cross-entropy method, which
+    concentrates simulations around the best regions found rather than
+    spreading them over the whole space as a grid or random sweep does.
+
+    Experiments can be proposed and their errors reported one batch at a
+    time (ask and tell), or all batches run at once (run).
+
+    Attributes
+    ----------
+    space : ParameterSpace
+        The parameters searched, and their bounds
+    base_experiment : dict
+        The experiment, as a row of an experiments file, providing the
+        values of the parameters not searched
+    batch_size : int, optional
+        The number of experiments per batch. Defaults to 32.
+    elite_fraction : float, optional
+        The fraction of the experiments so far the distribution of the
+        next batch is fitted to. Defaults to 0.25.
+    min_spread : float, optional
+        The minimum standard deviation of the distribution, in the unit
+        hypercube, so the search keeps exploring around the elites. Defaults
+        to 0.02.
+    seed : int, optional
+        Seed of the random state experiments are drawn from. Defaults to
+        None.
+    name_prefix : string, optional
+        Experiments are named after it and their index. Defaults to
+        calibration.
+    """
+
+    def __init__(self, space, base_experiment, batch_size=32,
+                 elite_fraction=0.25, min_spread=0.02, seed=None,
+                 name_prefix="calibration"):
+        self.space = space
+        self.base_experiment = base_experiment
+        self.batch_size = batch_size
+        self.elite_fraction = elite_fraction
+        self.min_spread = min_spread
+        self.name_prefix = name_prefix
+        self.random = np.random.RandomState(seed)
+
+        # Experiments run so far, each with its error under "ame"
+        self.trials = []
+
+    def ask(self):
+        """
+        Returns the experiments of the next batch.
+        """
+        errors = np.array([t["ame"] for t in self.trials])
+        finite = np.isfinite(errors)
+
+        if not finite.any():
+            points = self.space.sample(self.batch_size, self.random)
+        else:
+            num_elites = max(2, int(round(self.elite_fraction *
+                                          finite.sum())))
+            elites = [self.trials[i] for i in np.argsort(errors)[:num_elites]
+                      if finite[i]]
+            elite_points = self.space.to_points(elites)
+
+            mean = elite_points.mean(axis=0)
+            spread = np.maximum(elite_points.std(axis=0), self.min_spread)
+            points = np.clip(self.random.normal(
+                mean, spread, (self.batch_size, self.space.num_dimensions)),
+                0, 1)
+
+        experiments = []
+
+        for values in self.space.to_values(points):
+            experiment = dict(self.base_experiment)
+            experiment.update(values)
+            experiment["name"] = "{0}_{1}".format(
+                self.name_prefix, len(self.trials) + len(experiments))
+            experiments.append(experiment)
+
+        return experiments
+
+    def tell(self, experiments, errors):
+        """
+        Records the errors of experiments run. Experiments which failed
+        should be given an infinite (or nan) error.
+        """
+        for experiment, error in zip(experiments, errors):
+            error = float(error)
+            self.trials.append(dict(
+                experiment, ame=error if error == error else float("inf")))
+
+    @property
+    def best(self):
+        """
+        The experiment with the lowest error so far, with its error under
+        "ame".
+        """
+        return min(self.trials, key=lambda t: t["ame"])
+
+    def run(self, evaluate, num_batches, pool=None, on_batch=None):
+        """
+        Runs a number of batches.
+
+        Parameters
+        ----------
+        evaluate : callable
+            Called with each experiment, returns its error
+        num_batches : int
+            The number of batches
+        pool : WorkerPool, optional
+            The pool experiments are run in. Defaults to None, in which
+            case they are run one after another in the current process.
+        on_batch : callable, optional
+            Called with the search after each batch, Eg: to save the trials
+
+        Returns
+        -------
+        list
+            The trials, by increasing error
+        """
+        for _ in range(num_batches):
+            experiments = self.ask()
+            self.tell(experiments, evaluate_batch(evaluate, experiments,
+                                                  pool))
+
+            if on_batch is not None:
+                on_batch(self)
+
+        return sorted(self.trials, key=lambda t: t["ame"])
@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+
+from model.models.model_warburg import generate_model, generate_properties
+from model.utils.GrowthCurve import get_absolute_mean_error
+from runners.ExperimentRunner import remove_heartbeats
+from runners.WorkerPool import run_in_process
+
+
+def evaluate_experiment(experiment, num_epochs, epoch_duration,
+                        output_dir=None):
+    """
+    Runs an experiment and returns the absolute mean error between its
+    growth curve and the expected one, the objective of calibration.
+
+    Parameters
+    ----------
+    experiment : dict
+        The experiment, as a row of an experiments file
+    num_epochs : int
+        The number of epochs to run the experiment for
+    epoch_duration : int
+        Number of hours per epoch
+    output_dir : string, optional
+        If given, the report of the experiment is saved to a directory of it
+        named after the experiment. Defaults to None, in which case the
+        report is discarded.
+
+    Returns
+    -------
+    float
+        The absolute mean error, in mm3
+    """
+    if output_dir is None:
+        out_dir = tempfile.mkdtemp()
+    else:
+        out_dir = "{0}/{1}".format(output_dir, experiment["name"])
+
+        if not os.path.isdir(out_dir):
+            os.mkdir(out_dir)
+
+    try:
+        properties = generate_properties(experiment)
+        properties["outDir"] = out_dir
+        model = generate_model(properties, num_epochs)
+        remove_heartbeats(model)
+        model.run()
+    finally:
+        if output_dir is None:
+            shutil.rmtree(out_dir)
+
+    return get_absolute_mean_error(model.output["agentNums"]["cancerCells"],
+                                   num_epochs, epoch_duration)
+
+
+def evaluate_batch(evaluate, experiments, pool=None):
+    """
+    Evaluates a batch of experiments, Eg: with evaluate_experiment.
+
+    Parameters
+    ----------
+    evaluate : callable
+        Called with each experiment, returns its error
+    experiments : list
+        The experiments, as rows of an experiments file
+    pool : WorkerPool, optional
+        The pool experiments are run in. Defaults to None, in which case
+        they are run one after another in the current process.
+
+    Returns
+    -------
+    list
+        The error of each experiment, in the order of experiments.
+        Experiments which failed are given an infinite error.
+    """
+    if pool is None:
+        results = run_in_process(evaluate, experiments)
+    else:
+        results = pool.run(evaluate, experiments)
+
+    errors = dict()
+
+    for result in results:
+        if result.succeeded:
+            errors[result.task["name"]] = result.value
+        else:
+            print("{0} failed:\n{1}".format(result.task["name"],
+                                            result.error))
+            errors[result.task["name"]] = float("inf")
+
+    return [errors[e["name"]] for e in experiments]
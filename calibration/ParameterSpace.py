@@ -0,0 +1,80 @@
+import numpy as np
+
+
+class ParameterSpace(object):
+    """
+    The parameters calibrated, and the bounds of each, mapped to and from
+    the unit hypercube searches work in.
+
+    Attributes
+    ----------
+    bounds : dict
+        Keyed by parameter name (as a column of an experiments file), each
+        a dict with keys "min" and "max", and optionally "integer" (if true,
+        values are rounded to integers) and "log" (if true, the parameter is
+        searched on a log scale, so bounds must be positive)
+    """
+
+    def __init__(self, bounds):
+        self.names = sorted(bounds)
+        self.bounds = bounds
+
+        self.lows = np.array([float(bounds[n]["min"]) for n in self.names])
+        self.highs = np.array([float(bounds[n]["max"]) for n in self.names])
+        self.log = np.array([bool(bounds[n].get("log", False))
+                             for n in self.names])
+        self.integer = np.array([bool(bounds[n].get("integer", False))
+                                 for n in self.names])
+
+        self.lows[self.log] = np.log(self.lows[self.log])
+        self.highs[self.log] = np.log(self.highs[self.log])
+
+    @property
+    def num_dimensions(self):
+        return len(self.names)
+
+    def sample(self, n, random):
+        """
+        Returns n points of the unit hypercube, as a Latin hypercube sample:
+        each parameter takes values from each of n equal strata once.
+
+        Parameters
+        ----------
+        n : int
+            The number of points
+        random : RandomState
+            The random state points are drawn from
+
+        Returns
+        -------
+        ndarray
+            The points, one per row
+        """
+        strata = np.column_stack([random.permutation(n)
+                                  for _ in range(self.num_dimensions)])
+
+        return (strata + random.uniform(size=strata.shape)) / n
+
+    def to_values(self, points):
+        """
+        Returns the parameter values of points of the unit hypercube, one
+        dict per point, keyed by parameter name.
+        """
+        values = self.lows + np.clip(points, 0, 1) * (self.highs - self.lows)
+        values[:, self.log] = np.exp(values[:, self.log])
+        values[:, self.integer] = np.round(values[:, self.integer])
+
+        return [dict((n, int(v) if integer else float(v)) for n, v, integer
+                     in zip(self.names, row, self.integer))
+                for row in values]
+
+    def to_points(self, values):
+        """
+        Returns the points of the unit hypercube of a list of dicts of
+        parameter values, Eg: rows of an experiments file.
+        """
+        values = np.array([[float(v[n]) for n in self.names]
+                           for v in values])
+        values[:, self.log] = np.log(values[:, self.log])
+
+        return (values - self.lows) / (self.highs - self.lows)
@@ -0,0 +1,109 @@
+import math
+import numpy as np
+
+from calibration.Evaluation import evaluate_batch
+
+
+class SuccessiveHalving(object):
+    """
+    Calibrates a set of candidate experiments at increasing fidelities:
+    every candidate is first run cheaply (Eg: in a smaller environment,
+    with fewer diffusion solve iterations and fewer epochs), and only the
+    best fraction of each level, by absolute mean error against the
+    expected growth curve, is promoted to the next one, up to full
+    fidelity. Full runs are so only spent on the candidates which matter.
+
+    Errors of runs with fewer epochs are computed over the same number of
+    epochs of the expected growth curve, so candidates are ranked by how
+    well they follow it so far.
+
+    Attributes
+    ----------
+    fidelities : list
+        The fidelity levels, from cheapest to full. Each is a dict of the
+        values overriding those of the candidates, Eg: envSize, plus
+        optionally numEpochs, the number of epochs runs at the level are
+        run for. An empty dict is full fidelity.
+    num_epochs : int
+        The number of epochs runs at levels not setting numEpochs are run
+        for
+    keep_fraction : float, optional
+        The fraction of candidates of each level promoted to the next one.
+        At least one candidate is always promoted. Defaults to 1/3.
+    """
+
+    def __init__(self, fidelities, num_epochs, keep_fraction=1 / 3.):
+        self.fidelities = fidelities
+        self.num_epochs = num_epochs
+        self.keep_fraction = keep_fraction
+
+        # Candidates run at each level, each with its error under "ame"
+        # and level under "fidelity"
+        self.levels = []
+
+    def get_level_experiments(self, candidates, level):
+        """
+        Returns the experiments of candidates at a fidelity level, and the
+        number of epochs they are run for.
+        """
+        overrides = dict(self.fidelities[level])
+        num_epochs = int(overrides.pop("numEpochs", self.num_epochs))
+
+        return [dict(c, **overrides) for c in candidates], num_epochs
+
+    def run(self, evaluate, candidates, pool=None, on_level=None):
+        """
+        Runs the candidates through each fidelity level.
+
+        Parameters
+        ----------
+        evaluate : callable
+            Called with each experiment and the number of epochs to run it
+            for, returns its error. Eg: evaluate_experiment
+        candidates : list
+            The candidate experiments, as rows of an experiments file, with
+            unique names
+        pool : WorkerPool, optional
+            The pool experiments are run in. Defaults to None, in which case
+            they are run one after another in the current process.
+        on_level : callable, optional
+            Called with the search after each level, Eg: to save the trials
+
+        Returns
+        -------
+        list
+            The candidates run at full fidelity, by increasing error
+        """
+        candidates = list(candidates)
+
+        for level in range(len(self.fidelities)):
+            experiments, num_epochs = self.get_level_experiments(candidates,
+                                                                 level)
+
+            print("Running {0} candidates at fidelity level {1}".format(
+                len(candidates), level))
+            errors = evaluate_batch(lambda e: evaluate(e, num_epochs),
+                                    experiments, pool)
+
+            trials = [dict(e, ame=float(error), fidelity=level)
+                      for e, error in zip(experiments, errors)]
+            self.levels.append(sorted(trials, key=lambda t: t["ame"]))
+
+            if on_level is not None:
+                on_level(self)
+
+            # Candidates are promoted with their own values, not those of
+            # the level
+            num_kept = max(1, int(math.ceil(self.keep_fraction *
+                                            len(candidates))))
+            candidates = [candidates[i] for i in
+                          np.argsort(errors, kind="stable")[:num_kept]]
+
+        return self.levels[-1]
+
+    @property
+    def trials(self):
+        """
+        All the runs so far, across levels.
+        """
+        return [t for level in self.levels for t in level]
@@ -1,4 +1,3 @@
-import random
 from numpy.polynomial import Polynomial
 from panaxea.core.Steppables import Agent
 
@@ -63,18 +62,34 @@ class CancerCell(Agent, object):
 
         self.p_warburg_switch = cancer_cell_props["pWarburgSwitch"]
         self.warburg_switch = warburgSwitch
+        self.age = 0
 
         self.dead = False
         self.quiescent = False
 
+        # If set, the cell is stepped by the CancerCellCycleHelper
+        self.event_driven_cell_cycle = model.properties["engine"][
+            "eventDrivenCellCycle"]
+        # The epoch the cell is next due to leave its phase at, while it is
+        # waiting on the timing wheel of the CancerCellCycleHelper
+        self.cycle_event_epoch = None
+
         self.drug_at_pos = 0
 
         # To allow for different drug effects to be tested, this will be
         # loaded as part of the config.
         self.max_vegf = cancer_cell_props["maxVegfSecretionRate"]
-        self.age = 0
         self.min_hif = cancer_cell_props["minHIF"]
 
+        self.reset_state_(model)
+
+    def reset_state_(self, model):
+        """
+        Sets up the part of the state of a new cell which differs between
+        cells, as done at the end of the constructor. Used by AgentFactory.
+        """
+        self._sample_warburg_switch_age(model)
+
     def progress_cell_(self, model):
         # time to divide
         if self.current_state == self.cell_cycle_order[-1] and \
@@ -83,24 +98,22 @@ class CancerCell(Agent, object):
             current_pos = self.environment_positions[self.agent_env_name]
             target_pos = None
 
-            if len(model.environments[self.agent_env_name].grid[
-                       (current_pos[0], current_pos[1], current_pos[2])]) < \
-                    model.properties["maxAgentDensity"]:
+            agent_env = model.environments[self.agent_env_name]
+            max_agent_density = model.properties["maxAgentDensity"]
+
+            if agent_env.has_capacity(current_pos, max_agent_density):
                 target_pos = current_pos
             else:
-                moore_target = model.environments[
-                    self.agent_env_name].get_least_populated_moore_neigh(
+                moore_target = agent_env.get_least_populated_moore_neigh(
                     current_pos)
-                if len(model.environments[self.agent_env_name].grid[
-                           (moore_target[0], moore_target[1], moore_target[
-                               2])]) < \
-                        model.properties["maxAgentDensity"]:
+                if moore_target is not None and agent_env.has_capacity(
+                        moore_target, max_agent_density):
                     target_pos = moore_target
 
             if target_pos is not None:
                 # Creating new cancer cell and adding it at current position
                 # in the designated environment
-                c = CancerCell(model)
+                c = model.cancer_cell_factory.get(model)
                 c.add_agent_to_grid(self.agent_env_name, target_pos, model)
                 model.schedule.agents_to_schedule.add(c)
 
@@ -109,12 +122,13 @@ class CancerCell(Agent, object):
                 self.current_state = self.cell_cycle_order[0]
                 self.warburg_switch = False
                 self.age = 0
+                self._sample_warburg_switch_age(model)
 
         # progress in cell life-cyle
         elif self.progress_in_state == \
                 self.cell_cycle_length[self.current_state]:
-            if self.current_state == "G1" and random.random() > \
-                    self.current_p_synthesis:
+            if self.current_state == "G1" and \
+                    model.random_stream.random() > self.current_p_synthesis:
                 pass
             else:
                 self.progress_in_state = 0
@@ -125,6 +139,9 @@ class CancerCell(Agent, object):
             self.progress_in_state = self.progress_in_state + 1
 
     def step_main(self, model):
+        if self.event_driven_cell_cycle:
+            return
+
         current_pos = self.environment_positions[self.agent_env_name]
         self.oxygen_at_pos = model.environments[self.oxygen_env_name].grid[
             current_pos]
@@ -137,8 +154,8 @@ class CancerCell(Agent, object):
         if not self.dead and not self.quiescent:
             self.age = self.age + 1
 
-            if random.random() < self.p_warburg_switch and not \
-                    self.warburg_switch:
+            if not self.warburg_switch and \
+                    self.age >= self.warburg_switch_age:
                 self.warburg_switch = True
                 self.glucose_uptake_rate = self.max_glucose_uptake_rate
             # If the cell is not warburg, then in order for it to survive it
@@ -162,9 +179,17 @@ class CancerCell(Agent, object):
                 self.progress_cell_(model)
             else:
                 # A dead cell is not quiescent
-                self.dead = True
+                model.schedule.registry.mark_dead(self)
                 self.quiescent = False
 
+    def _sample_warburg_switch_age(self, model):
+        # Each epoch a cell lives, it switches to warburg with probability
+        # p_warburg_switch. Rather than carrying out one trial per epoch, the
+        # age at the first successful trial is sampled up front from the
+        # matching geometric distribution.
+        self.warburg_switch_age = self.age + model.random_stream.geometric(
+            self.p_warburg_switch)
+
     def decide_die_(self):
         if self.warburg_switch and self.glucose_at_pos < \
                 self.min_glucose_warburg:
@@ -1,5 +1,4 @@
 from panaxea.core.Steppables import Agent
-from random import random
 
 
 class EndothelialCell(Agent, object):
@@ -42,6 +41,7 @@ class TipCell(EndothelialCell, object):
         # Copying environment names to avoid continuosly accessing the model
         self.vegf_env = model.properties["envNames"]["vegfEnvName"]
         self.agent_env = model.properties["envNames"]["agentEnvName"]
+        self.vessel_env = model.properties["envNames"]["vesselEnvName"]
 
         endothelial_cells_properties = model.properties["agents"][
             "endothelialCells"]
@@ -49,10 +49,21 @@ class TipCell(EndothelialCell, object):
             "minimumVegfConcentration"]
         self.division_delay = endothelial_cells_properties["divisionDelay"]
 
+        # If set, sprouting is carried out by the TipCellSproutingHelper
+        self.batched_sprouting = model.properties["engine"][
+            "batchedSprouting"]
+        # If set, sprouting lays down a segment in the vessel environment
+        # rather than a TrunkCell
+        self.static_vessels = model.properties["engine"]["staticVessels"]
+
         self.cell_age = 0
 
     def step_main(self, model):
         super(TipCell, self).step_main(model)
+
+        if self.batched_sprouting:
+            return
+
         self.cell_age = min(self.division_delay, self.cell_age + 1)
 
         current_position = self.environment_positions[self.agent_env]
@@ -61,8 +72,8 @@ class TipCell(EndothelialCell, object):
             current_position]
 
         if taf_at_current_position >= self.minimum_vegf_concentration and \
-                self.cell_age == self.division_delay and 10. * random() < \
-                taf_at_current_position:
+                self.cell_age == self.division_delay and \
+                10. * model.random_stream.random() < taf_at_current_position:
             self.cell_age = 0
 
             neigh = model.environments[self.agent_env].get_moore_neighbourhood(
@@ -80,20 +91,41 @@ class TipCell(EndothelialCell, object):
 
             new_pos = sorted_neigh.pop(0)[0]
 
-            while model.environments[self.agent_env].grid[new_pos].__len__() \
-                    >= \
-                    model.properties["maxAgentDensity"]:
+            while not model.environments[self.agent_env].has_capacity(
+                    new_pos, model.properties["maxAgentDensity"]):
                 if len(sorted_neigh) == 0:
                     return
                 else:
                     new_pos = sorted_neigh.pop(0)[0]
 
-            self.move_agent(self.agent_env, new_pos, model)
+            self.sprout_(new_pos, model)
+
+    def sprout_(self, new_pos, model):
+        """
+        Moves the tip cell to a new position, leaving a trunk cell (or a
+        static vessel segment) at the position it occupied.
+
+        Parameters
+        ----------
+        new_pos : tuple
+            The position the tip cell moves to
+        model : Model
+            The model instance
+        """
+        current_position = self.environment_positions[self.agent_env]
+
+        self.move_agent(self.agent_env, new_pos, model)
+
+        if self.static_vessels:
+            model.environments[self.vessel_env].add_vessel(
+                current_position, self.radius)
+            model.environments[self.agent_env].occupy([current_position])
+            return
 
-            # Create tip cell at old position1
-            t = TrunkCell(model, radius=self.radius)
-            t.add_agent_to_grid(self.agent_env, current_position, model)
-            model.schedule.agents_to_schedule.add(t)
+        # Create trunk cell at old position
+        t = TrunkCell(model, radius=self.radius)
+        t.add_agent_to_grid(self.agent_env, current_position, model)
+        model.schedule.agents_to_schedule.add(t)
 
     # A cell automatically sprouts if its radius is > 1
     def _decide_sprout_linear(self, tafConcentration):
@@ -104,8 +136,8 @@ class TipCell(EndothelialCell, object):
     # score), returns a neighbour
     # where those with a higher score have the highest probability of being
     # picked
-    def _get_next_neigh_from_scored(self, neighs):
-        threshold = random()
+    def _get_next_neigh_from_scored(self, model, neighs):
+        threshold = model.random_stream.random()
 
         for n in neighs:
             if n[1] > threshold:
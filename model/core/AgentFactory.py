@@ -0,0 +1,87 @@
+class AgentFactory(object):
+    """
+    Creates agents of a class cheaply, by copying the state of a freshly
+    constructed agent rather than running the constructor, which for cells
+    re-reads all of the properties dictionaries.
+
+    The first agent is created with the constructor and its state kept as a
+    template. Agents created afterwards get a shallow copy of the template,
+    so share its attributes (Eg: cell cycle lengths and polynomial
+    coefficients read from the properties), with a fresh
+    environment_positions dictionary, and then have their reset_state_
+    method, if the class has one, called with the model. reset_state_
+    should redo any per-agent part of the constructor (Eg: random draws), in
+    the same order, and reassign any other attribute agents change in
+    place, so copied and constructed agents are indistinguishable.
+
+    Attributes
+    ----------
+    agent_class : class
+        The class of the agents, whose constructor takes the model
+    """
+
+    def __init__(self, agent_class):
+        self.agent_class = agent_class
+        self.template = None
+
+    def get(self, model):
+        """
+        Returns a new agent, in the state the constructor would leave it in.
+
+        Parameters
+        ----------
+        model : Model
+            The model instance
+
+        Returns
+        -------
+        Agent
+            The new agent
+        """
+        if self.template is None:
+            agent = self.agent_class(model)
+            self.template = dict(agent.__dict__)
+            # Nor is the template affected by the agent being placed
+            self.template["environment_positions"] = dict()
+
+            return agent
+
+        return self.get_many(model, 1)[0]
+
+    def get_many(self, model, count):
+        """
+        Returns count new agents, as count calls to get, copying the
+        template in a single loop.
+
+        Parameters
+        ----------
+        model : Model
+            The model instance
+        count : int
+            The number of agents
+
+        Returns
+        -------
+        list
+            The new agents
+        """
+        agents = []
+
+        # The first agent is constructed by get
+        if self.template is None and count > 0:
+            agents.append(self.get(model))
+
+        template = self.template
+        reset_state = hasattr(self.agent_class, "reset_state_")
+
+        for _ in range(count - len(agents)):
+            agent = self.agent_class.__new__(self.agent_class)
+            agent.__dict__.update(template)
+            agent.environment_positions = dict()
+
+            if reset_state:
+                agent.reset_state_(model)
+
+            agents.append(agent)
+
+        return agents
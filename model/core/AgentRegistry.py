@@ -0,0 +1,145 @@
+import itertools
+from collections import defaultdict
+
+from model.core.OrderedSet import OrderedSet
+
+
+class AgentRegistry(object):
+    """
+    Keeps per-class indexes of the agents on a schedule, so that helpers can
+    look up the agents of a given type without scanning the full schedule.
+
+    Agents are indexed by class name (matching the class name parameters
+    used throughout helpers, eg: "CancerCell"). Each class has a set of all
+    agents, plus live and dead sub-indexes. Agents without a dead attribute
+    (Eg: endothelial cells) are always considered alive.
+
+    Indexes iterate in the order agents were added, so helpers visiting
+    them do so in the same order on every run.
+
+    The returned sets are the registry's own and should not be modified
+    directly, use add, remove and mark_dead instead.
+    """
+
+    def __init__(self):
+        self.agents = defaultdict(OrderedSet)
+        self.alive_agents = defaultdict(OrderedSet)
+        self.dead_agents = defaultdict(OrderedSet)
+
+    def add(self, agent):
+        """
+        Indexes an agent. Adding an agent which is already indexed has no
+        effect.
+
+        Parameters
+        ----------
+        agent : Agent
+            The agent to index
+        """
+        class_name = agent.__class__.__name__
+
+        self.agents[class_name].add(agent)
+
+        if getattr(agent, "dead", False):
+            self.dead_agents[class_name].add(agent)
+        else:
+            self.alive_agents[class_name].add(agent)
+
+    def add_agents(self, agents):
+        """
+        Indexes agents in bulk, as add called on each of them in order.
+        Consecutive agents of the same class and state are indexed in one
+        call.
+
+        Parameters
+        ----------
+        agents : iterable
+            The agents to index
+        """
+        def key(agent):
+            return agent.__class__.__name__, getattr(agent, "dead", False)
+
+        for (class_name, dead), group in itertools.groupby(agents, key):
+            group = list(group)
+            self.agents[class_name].update(group)
+
+            if dead:
+                self.dead_agents[class_name].update(group)
+            else:
+                self.alive_agents[class_name].update(group)
+
+    def remove(self, agent):
+        """
+        Removes an agent from all indexes. Removing an agent which is not
+        indexed has no effect.
+
+        Parameters
+        ----------
+        agent : Agent
+            The agent to remove
+        """
+        class_name = agent.__class__.__name__
+
+        self.agents[class_name].discard(agent)
+        self.alive_agents[class_name].discard(agent)
+        self.dead_agents[class_name].discard(agent)
+
+    def mark_dead(self, agent):
+        """
+        Sets the dead flag of an agent and moves it from the live to the dead
+        index of its class.
+
+        Parameters
+        ----------
+        agent : Agent
+            The agent which died
+        """
+        agent.dead = True
+
+        class_name = agent.__class__.__name__
+
+        if agent in self.agents[class_name]:
+            self.alive_agents[class_name].discard(agent)
+            self.dead_agents[class_name].add(agent)
+
+    def get_agents(self, class_name):
+        """
+        Parameters
+        ----------
+        class_name : string
+            The name of the agent class
+
+        Returns
+        -------
+        OrderedSet
+            All indexed agents of the class
+        """
+        return self.agents[class_name]
+
+    def get_alive_agents(self, class_name):
+        """
+        Parameters
+        ----------
+        class_name : string
+            The name of the agent class
+
+        Returns
+        -------
+        OrderedSet
+            All indexed agents of the class which are not dead
+        """
+        return self.alive_agents[class_name]
+
+    def get_dead_agents(self, class_name):
+        """
+        Parameters
+        ----------
+        class_name : string
+            The name of the agent class
+
+        Returns
+        -------
+        OrderedSet
+            All indexed agents of the class which are dead
+        """
+        return self.dead_agents[class_name]
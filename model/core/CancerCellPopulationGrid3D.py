@@ -0,0 +1,189 @@
+import numpy as np
+from panaxea.core.Environment import Grid3D
+
+
+class CancerCellPopulationGrid3D(Grid3D, object):
+    """
+    Represents cancer cells as populations per voxel rather than as
+    CancerCell agents. Cells in a voxel only differ by their cell cycle
+    phase, their progress in it and whether they switched to warburg
+    metabolism, so each voxel holds the number of cells in each (warburg,
+    phase, progress) compartment. Cells of a voxel with the same metabolism
+    share their HIF expression rate and the rates it mediates, which hold
+    the mean over the cells.
+
+    Dead cells are kept as counts per voxel, as well as totals per cause of
+    death and metabolism. Ages are not tracked.
+
+    Positions are flattened with np.ravel_multi_index over (xsize, ysize,
+    zsize), as in the diffusion helpers. Index 0 of the metabolism axis is
+    for non warburg cells and index 1 for warburg ones.
+
+    Attributes
+    ----------
+    name : string
+        The name of the environment
+    xsize : int
+        The number of positions along the x-axis
+    ysize : int
+        The number of positions along the y-axis
+    zsize : int
+        The number of positions along the z-axis
+    model : model
+        The instance of the model class to which the environment will be
+        attached.
+    """
+
+    phases = ["G1", "S", "G2", "M"]
+    causes_of_death = ["Lack of oxygen", "Lack of glucose"]
+
+    def __init__(self, name, xsize, ysize, zsize, model):
+        super(CancerCellPopulationGrid3D, self).__init__(name, xsize, ysize,
+                                                         zsize, model)
+        self.shape = (xsize, ysize, zsize)
+        num_positions = xsize * ysize * zsize
+
+        cycle_length = model.properties["agents"]["baseCellCycleLength"]
+        self.cycle_lengths = [cycle_length[p] for p in self.phases]
+        # Compartments of each phase are for progress 0 to its length
+        self.offsets = np.cumsum([0] + [length + 1 for length in
+                                        self.cycle_lengths])
+
+        cancer_cell_props = model.properties["agents"]["cancerCells"]
+        self.min_hif = cancer_cell_props["minHIF"]
+        self.glucose_uptake_rates = np.array([
+            cancer_cell_props["minGlucoseUptakeRate"],
+            cancer_cell_props["maxGlucoseUptakeRate"]])
+
+        self.counts = np.zeros((num_positions, 2, self.offsets[-1]),
+                               dtype=np.int64)
+        self.dead = np.zeros(num_positions, dtype=np.int64)
+        self.deaths = np.zeros((2, len(self.causes_of_death)),
+                               dtype=np.int64)
+
+        # Initial values as in the CancerCell constructor
+        self.hif = np.full((num_positions, 2), float(self.min_hif))
+        self.metabolic_rate = np.ones((num_positions, 2))
+        self.p_synthesis = np.full((num_positions, 2),
+                                   float(cancer_cell_props["minPSynthesis"]))
+        self.vegf_secretion_rate = np.ones((num_positions, 2))
+
+    def get_compartment(self, phase, progress):
+        """
+        Returns the index of the compartment of a phase and progress along
+        the last axis of counts.
+        """
+        return self.offsets[self.phases.index(phase)] + progress
+
+    def add_cells(self, indices, phase, progress, counts=1):
+        """
+        Adds new non warburg cells, whose HIF expression rate is the
+        minimum, and updates the mean HIF expression rate of the voxels.
+
+        Parameters
+        ----------
+        indices : int or array-like
+            The flat indices of the voxels, which may repeat
+        phase : string
+            The cell cycle phase of the new cells
+        progress : int or array-like
+            The progress of the new cells in their phase
+        counts : int or array-like, optional
+            The number of cells added at each voxel, defaults to 1
+        """
+        indices = np.atleast_1d(indices)
+        counts = np.broadcast_to(counts, indices.shape)
+
+        voxels, inverse = np.unique(indices, return_inverse=True)
+        self.mix_hif(voxels, 0, np.bincount(inverse, weights=counts),
+                     self.min_hif)
+        np.add.at(self.counts, (indices, 0,
+                                self.get_compartment(phase, progress)),
+                  counts)
+
+    def mix_hif(self, indices, warburg, counts, hif):
+        """
+        Updates the mean HIF expression rate of the cells of a metabolism in
+        the given voxels, for counts cells with expression rate hif joining
+        them. Should be called before the cells are added to counts.
+        """
+        indices = np.atleast_1d(indices)
+        current = self.counts[indices, warburg].sum(axis=1)
+        total = current + counts
+        mixed = np.divide(self.hif[indices, warburg] * current + hif * counts,
+                          total, out=self.hif[indices, warburg].astype(float),
+                          where=total > 0)
+        self.hif[indices, warburg] = mixed
+
+    def kill_cells(self, position, cause):
+        """
+        Kills all cells at a position.
+
+        Parameters
+        ----------
+        position : tuple
+            The (x, y, z) position
+        cause : string
+            The cause of death, one of causes_of_death
+        """
+        i = np.ravel_multi_index(position, self.shape)
+        alive = self.counts[i].sum(axis=1)
+
+        self.deaths[:, self.causes_of_death.index(cause)] += alive
+        self.dead[i] += alive.sum()
+        self.counts[i] = 0
+
+    def get_alive(self, warburg=None):
+        """
+        Returns
+        -------
+        numpy.ndarray
+            A flat array with the number of live cells at each position, of
+            the given metabolism if warburg is not None
+        """
+        if warburg is None:
+            return self.counts.sum(axis=(1, 2))
+
+        return self.counts[:, int(warburg)].sum(axis=1)
+
+    def get_total(self):
+        """
+        Returns
+        -------
+        numpy.ndarray
+            A flat array with the number of live and dead cells at each
+            position
+        """
+        return self.get_alive() + self.dead
+
+    def get_oxygen_sink_rates(self):
+        """
+        Returns
+        -------
+        numpy.ndarray
+            A flat array with the summed metabolic rate of the live cells at
+            each position
+        """
+        return (self.counts.sum(axis=2) * self.metabolic_rate).sum(axis=1)
+
+    def get_glucose_sink_rates(self, warburg):
+        """
+        Returns
+        -------
+        numpy.ndarray
+            A flat array with the summed glucose uptake rate of the live
+            cells of the given metabolism at each position
+        """
+        return self.get_alive(warburg) * \
+            self.glucose_uptake_rates[int(warburg)]
+
+    def get_vegf_source_rates(self):
+        """
+        Returns
+        -------
+        numpy.ndarray
+            A flat array with the summed VEGF secretion rate of the live
+            cells at each position
+        """
+        return (self.counts.sum(axis=2) *
+                self.vegf_secretion_rate).sum(axis=1)
@@ -0,0 +1,94 @@
+import numpy as np
+from panaxea.core.Environment import Grid3D
+
+
+class HealthyTissueGrid3D(Grid3D, object):
+    """
+    Represents healthy tissue as a density field rather than as HealthyCell
+    agents. Healthy cells never move and only act as sinks of oxygen and
+    glucose, so all the model needs of them is how many there are at each
+    position, how many of those are alive and their uptake rates.
+
+    Positions are flattened with np.ravel_multi_index over (xsize, ysize,
+    zsize), as in the diffusion helpers.
+
+    Attributes
+    ----------
+    name : string
+        The name of the environment
+    xsize : int
+        The number of positions along the x-axis
+    ysize : int
+        The number of positions along the y-axis
+    zsize : int
+        The number of positions along the z-axis
+    model : model
+        The instance of the model class to which the environment will be
+        attached.
+    """
+
+    def __init__(self, name, xsize, ysize, zsize, model):
+        super(HealthyTissueGrid3D, self).__init__(name, xsize, ysize, zsize,
+                                                  model)
+        self.shape = (xsize, ysize, zsize)
+        num_positions = xsize * ysize * zsize
+
+        # Healthy cells ever placed at each position, dead ones included
+        self.cells = np.zeros(num_positions, dtype=np.int64)
+        self.alive = np.zeros(num_positions, dtype=np.int64)
+        self.oxygen_uptake_rate = np.zeros(num_positions)
+        self.glucose_uptake_rate = np.zeros(num_positions)
+
+    def add_cells(self, positions, oxygen_uptake_rate, glucose_uptake_rate):
+        """
+        Adds one live healthy cell at each of the given positions.
+
+        Parameters
+        ----------
+        positions : list
+            A list of (x, y, z) positions
+        oxygen_uptake_rate : float
+            The oxygen uptake rate of a single healthy cell
+        glucose_uptake_rate : float
+            The glucose uptake rate of a single healthy cell
+        """
+        if len(positions) == 0:
+            return
+
+        indices = np.ravel_multi_index(np.array(positions).T, self.shape)
+
+        np.add.at(self.cells, indices, 1)
+        np.add.at(self.alive, indices, 1)
+        self.oxygen_uptake_rate[indices] = oxygen_uptake_rate
+        self.glucose_uptake_rate[indices] = glucose_uptake_rate
+
+    def kill_cells(self, position):
+        """
+        Kills all healthy cells at a position.
+
+        Parameters
+        ----------
+        position : tuple
+            The (x, y, z) position
+        """
+        self.alive[np.ravel_multi_index(position, self.shape)] = 0
+
+    def get_oxygen_sink_rates(self):
+        """
+        Returns
+        -------
+        numpy.ndarray
+            A flat array with the summed oxygen uptake rate of the live
+            healthy cells at each position
+        """
+        return self.alive * self.oxygen_uptake_rate
+
+    def get_glucose_sink_rates(self):
+        """
+        Returns
+        -------
+        numpy.ndarray
+            A flat array with the summed glucose uptake rate of the live
+            healthy cells at each position
+        """
+        return self.alive * self.glucose_uptake_rate
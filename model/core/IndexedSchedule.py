@@ -0,0 +1,165 @@
+import numpy as np
+from panaxea.core.Schedule import Schedule
+
+from model.core.AgentRegistry import AgentRegistry
+from model.core.OrderedSet import OrderedSet
+from model.utils.SpaceFillingCurve import morton_keys
+
+
+class IndexedSchedule(Schedule):
+    """
+    A panaxea schedule which keeps an AgentRegistry in sync with its agents
+    and only steps active agents.
+
+    Agents added to agents_to_schedule and agents_to_remove are indexed and
+    un-indexed when they are merged into the schedule at the start of each
+    epoch, so the registry always reflects the agents set. Agents added
+    during model setup should be added through add_agent rather than
+    directly to the agents set.
+
+    Agents of an inert class, and agents which are dead, are kept in the
+    agents set and the registry, so they remain visible to helpers and are
+    pickled, but are not stepped. Agents which die during an epoch stop
+    being stepped from the following one.
+
+    The agents and pending sets are OrderedSets, so agents are stepped in
+    the order they were scheduled rather than in an order depending on
+    memory addresses, which together with the random stream of the model
+    makes runs reproducible. Optionally, active agents can instead be
+    stepped in the Morton (Z-order) order of their positions, so agents
+    stepped one after the other tend to access nearby parts of the grids.
+
+    Attributes
+    ----------
+    inert_agent_classes : iterable, optional
+        The names of the agent classes which should not be stepped
+    spatial_ordering_env : string, optional
+        If set, the name of the environment by whose positions active agents
+        are ordered. Defaults to None, in which case agents are stepped in
+        the order they were scheduled.
+    registry : AgentRegistry
+        Per-class indexes of the scheduled agents
+    active_agents : OrderedSet
+        The agents which are stepped
+    """
+
+    def __init__(self, inert_agent_classes=(), spatial_ordering_env=None):
+        super(IndexedSchedule, self).__init__()
+        self.agents = OrderedSet()
+        self.agents_to_schedule = OrderedSet()
+        self.agents_to_remove = OrderedSet()
+        self.inert_agent_classes = set(inert_agent_classes)
+        self.active_agents = OrderedSet()
+        self.registry = AgentRegistry()
+        self.spatial_ordering_env = spatial_ordering_env
+        self.spatially_ordered = False
+
+    def is_active(self, agent):
+        """
+        Returns true if the agent should be stepped.
+        """
+        return agent.__class__.__name__ not in self.inert_agent_classes \
+            and not getattr(agent, "dead", False)
+
+    def add_agent(self, agent):
+        """
+        Adds an agent to the schedule immediately, bypassing
+        agents_to_schedule. Only meant to be used while setting up a model.
+
+        Parameters
+        ----------
+        agent : Agent
+            The agent to add
+        """
+        self.agents.add(agent)
+        self.registry.add(agent)
+
+        if self.is_active(agent):
+            self.active_agents.add(agent)
+            self.spatially_ordered = False
+
+    def add_agents(self, agents):
+        """
+        Adds agents to the schedule in bulk, as add_agent called on each of
+        them in order. Only meant to be used while setting up a model.
+
+        Parameters
+        ----------
+        agents : list
+            The agents to add
+        """
+        self.agents.update(agents)
+        self.registry.add_agents(agents)
+
+        active = [a for a in agents if self.is_active(a)]
+
+        if len(active) > 0:
+            self.active_agents.update(active)
+            self.spatially_ordered = False
+
+    def step_schedule(self, model):
+        # Merges the pending sets in the same order as the parent, so an
+        # agent both removed and re-scheduled stays scheduled and indexed.
+        for a in self.agents_to_remove:
+            self.agents.discard(a)
+            self.active_agents.discard(a)
+            self.registry.remove(a)
+
+        for a in self.agents_to_schedule:
+            self.agents.add(a)
+            self.registry.add(a)
+
+            if self.is_active(a):
+                self.active_agents.add(a)
+                self.spatially_ordered = False
+
+        self.agents_to_schedule = OrderedSet()
+        self.agents_to_remove = OrderedSet()
+
+        self.active_agents = OrderedSet(
+            a for a in self.active_agents if not getattr(a, "dead", False))
+
+        if self.spatial_ordering_env is not None and \
+                not self.spatially_ordered:
+            self.__order_spatially()
+
+        print("I am stepping %s of %s agents" % (len(self.active_agents),
+                                                 len(self.agents)))
+
+        self.step_prologues(model)
+        self.step_mains(model)
+        self.step_epilogues(model)
+
+    def __order_spatially(self):
+        agents = list(self.active_agents)
+        keys = morton_keys(
+            [a.environment_positions[self.spatial_ordering_env]
+             for a in agents])
+
+        # Apart from agents added since the last sort, agents are already
+        # in order, which the stable sort (a timsort) takes advantage of
+        order = np.argsort(keys, kind="stable")
+
+        self.active_agents = OrderedSet(agents[i] for i in order)
+        self.spatially_ordered = True
+
+    def step_prologues(self, model):
+        for h in self.helpers:
+            h.step_prologue(model)
+
+        for a in self.active_agents:
+            a.step_prologue(model)
+
+    def step_mains(self, model):
+        for h in self.helpers:
+            h.step_main(model)
+
+        for a in self.active_agents:
+            a.step_main(model)
+
+    def step_epilogues(self, model):
+        for h in self.helpers:
+            h.step_epilogue(model)
+
+        for a in self.active_agents:
+            a.step_epilogue(model)
@@ -0,0 +1,52 @@
+from collections import OrderedDict
+
+from model.core.LayoutTemplate import LayoutTemplate
+
+
+class LayoutCache(object):
+    """
+    Keeps the LayoutTemplates of the most recently built layouts, so a
+    sweep over experiments sharing envSize, numCancerCells and
+    numEndothelialCells computes their initial layout once.
+
+    Attributes
+    ----------
+    max_size : int, optional
+        The number of templates kept, the least recently used being
+        evicted first. Defaults to 4.
+    """
+
+    def __init__(self, max_size=4):
+        self.max_size = max_size
+        self.templates = OrderedDict()
+
+    def get(self, properties):
+        """
+        Returns the template for the layout of a set of model properties,
+        building it if it is not cached.
+
+        Parameters
+        ----------
+        properties : dict
+            Model properties, as generated by generate_properties
+
+        Returns
+        -------
+        LayoutTemplate
+            The template
+        """
+        setup = properties["initialAgentSetup"]
+        key = (properties["envSize"], setup["numCancerCells"],
+               setup["numEndothelialCells"])
+
+        template = self.templates.pop(key, None)
+
+        if template is None:
+            template = LayoutTemplate(*key)
+
+            while self.templates and len(self.templates) >= self.max_size:
+                self.templates.popitem(last=False)
+
+        self.templates[key] = template
+
+        return template
@@ -0,0 +1,53 @@
+import numpy as np
+
+from model.core.OccupancyGrid3D import get_moore_neighbours_table
+
+
+class LayoutTemplate(object):
+    """
+    The part of the initial state of a model which only depends on its
+    layout parameters (envSize, numCancerCells and numEndothelialCells),
+    and so is the same for every experiment sharing them: where each type
+    of agent is initially placed, and the moore neighbourhood table of the
+    agent environment.
+
+    Positions are flat indices, in x, y, z order, as in OccupancyGrid3D.
+    Arrays are made read-only, as they are shared between the models built
+    from the template.
+
+    Attributes
+    ----------
+    env_size : int
+        The number of positions along each axis
+    num_cancer_cells : int
+        The number of cancer cells at each position of the initial tumour
+    num_endothelial_cells : int
+        The number of tip cells at each position holding tip cells
+    """
+
+    def __init__(self, env_size, num_cancer_cells, num_endothelial_cells):
+        self.env_size = env_size
+        self.num_cancer_cells = num_cancer_cells
+        self.num_endothelial_cells = num_endothelial_cells
+        self.shape = (env_size, env_size, env_size)
+
+        # Healthy cells fill the positions where x and z have the same
+        # parity, tip cells the others
+        x, _, z = np.indices(self.shape).reshape(3, -1)
+        healthy = x % 2 == z % 2
+        self.healthy_indices = np.flatnonzero(healthy)
+        self.tip_indices = np.repeat(np.flatnonzero(~healthy),
+                                     num_endothelial_cells)
+
+        # The initial tumour fills a cube, with num_cancer_cells cells per
+        # position
+        self.seed_indices = np.tile(
+            np.ravel_multi_index(np.indices((4, 4, 4)).reshape(3, -1) + 8,
+                                 self.shape),
+            num_cancer_cells)
+
+        self.moore_neighbours = get_moore_neighbours_table(self.shape)
+
+        for array in [self.healthy_indices, self.tip_indices,
+                      self.seed_indices, self.moore_neighbours]:
+            array.flags.writeable = False
@@ -0,0 +1,85 @@
+import numpy as np
+from panaxea.core.Environment import NumericalGrid3D
+
+
+class ArrayGridView(object):
+    """
+    A dictionary-like view over a flat array of grid values, indexed by (x,
+    y, z) positions. It stands in for the defaultdict grid of panaxea
+    numerical grids, so code reading grid[position] is unaffected.
+
+    Attributes
+    ----------
+    values : numpy.ndarray
+        The flat array of values
+    shape : tuple
+        The (xsize, ysize, zsize) shape of the grid
+    """
+
+    def __init__(self, values, shape):
+        self.values = values
+        self.shape = shape
+
+    def __index(self, position):
+        return (position[0] * self.shape[1] + position[1]) * \
+            self.shape[2] + position[2]
+
+    def __getitem__(self, position):
+        return self.values[self.__index(position)]
+
+    def __setitem__(self, position, value):
+        self.values[self.__index(position)] = value
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def keys(self):
+        return [tuple(int(c) for c in np.unravel_index(i, self.shape))
+                for i in range(len(self.values))]
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+
+class NumericalArrayGrid3D(NumericalGrid3D):
+    """
+    A 3D numerical grid whose values are held in a flat numpy array,
+    flattened with np.ravel_multi_index over (xsize, ysize, zsize) as in the
+    diffusion helpers. Values can still be read and written per position
+    through grid, while helpers can gather or replace them as arrays.
+
+    Attributes
+    ----------
+    name : string
+        The name of the environment
+    xsize : int
+        The number of positions along the x-axis
+    ysize : int
+        The number of positions along the y-axis
+    zsize : int
+        The number of positions along the z-axis
+    model : model
+        The instance of the model class to which the environment will be
+        attached.
+    """
+
+    def __init__(self, name, xsize, ysize, zsize, model):
+        super(NumericalArrayGrid3D, self).__init__(name, xsize, ysize, zsize,
+                                                   model)
+        self.values = np.zeros(xsize * ysize * zsize)
+        self.grid = ArrayGridView(self.values, (xsize, ysize, zsize))
+
+    def set_values(self, values):
+        """
+        Replaces all values in the grid.
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+            An array with one value per position, either flat or of shape
+            (xsize, ysize, zsize)
+        """
+        self.values[:] = np.ravel(values)
@@ -0,0 +1,224 @@
+import itertools
+import numpy as np
+from panaxea.core.Environment import ObjectGrid3D
+
+from model.core.RandomStream import RandomStream
+
+
+def get_moore_neighbours_table(shape):
+    """
+    Computes the flat indices of the 26 moore neighbours of every position
+    of a grid, as held by OccupancyGrid3D.
+
+    Parameters
+    ----------
+    shape : tuple
+        The (xsize, ysize, zsize) shape of the grid
+
+    Returns
+    -------
+    numpy.ndarray
+        A (positions, 26) array, where neighbours falling outside the grid
+        have the index one past the last position
+    """
+    num_positions = shape[0] * shape[1] * shape[2]
+    coordinates = np.indices(shape).reshape(3, -1)
+    offsets = [o for o in itertools.product((-1, 0, 1), repeat=3)
+               if o != (0, 0, 0)]
+
+    table = np.empty((num_positions, len(offsets)), dtype=np.int32)
+
+    for i, offset in enumerate(offsets):
+        neighbours = coordinates + np.array(offset)[:, None]
+        valid = np.all((neighbours >= 0) &
+                       (neighbours < np.array(shape)[:, None]),
+                       axis=0)
+        table[:, i] = num_positions
+        table[valid, i] = np.ravel_multi_index(neighbours[:, valid], shape)
+
+    return table
+
+
+class OccupancyGrid3D(ObjectGrid3D):
+    """
+    A 3D object grid which, on top of the per-position agent sets, keeps an
+    incrementally updated count of agents at each position and a
+    precomputed table of the flat indices of the 26 moore neighbours of
+    every position.
+
+    Positions are flattened with np.ravel_multi_index over (xsize, ysize,
+    zsize), as in the diffusion helpers. The occupancy array has one extra
+    trailing element, which neighbours falling outside the grid point to
+    and which is always full, so neighbourhood checks are plain gathers.
+
+    Attributes
+    ----------
+    name : string
+        The name of the environment
+    xsize : int
+        The number of positions along the x-axis
+    ysize : int
+        The number of positions along the y-axis
+    zsize : int
+        The number of positions along the z-axis
+    model : model
+        The instance of the model class to which the environment will be
+        attached.
+    random_stream : RandomStream, optional
+        The stream neighbourhoods are shuffled and ties broken with, normally
+        the random stream of the model. If None, a new unseeded stream is
+        used.
+    moore_neighbours : numpy.ndarray, optional
+        A precomputed table of moore neighbours for the shape of the grid,
+        as returned by get_moore_neighbours_table, which is only read and
+        so may be shared between grids. If None, it is computed.
+    """
+
+    def __init__(self, name, xsize, ysize, zsize, model, random_stream=None,
+                 moore_neighbours=None):
+        super(OccupancyGrid3D, self).__init__(name, xsize, ysize, zsize,
+                                              model)
+        if random_stream is None:
+            random_stream = RandomStream()
+
+        self.random_stream = random_stream
+        self.shape = (xsize, ysize, zsize)
+        self.num_positions = xsize * ysize * zsize
+
+        self.occupancy = np.zeros(self.num_positions + 1, dtype=np.int64)
+        self.occupancy[-1] = np.iinfo(np.int64).max
+
+        if moore_neighbours is None:
+            moore_neighbours = get_moore_neighbours_table(self.shape)
+
+        self.moore_neighbours = moore_neighbours
+
+    def get_index(self, position):
+        """
+        Parameters
+        ----------
+        position : tuple
+            A valid (x, y, z) position
+
+        Returns
+        -------
+        int
+            The flat index of the position
+        """
+        return (position[0] * self.ysize + position[1]) * self.zsize + \
+            position[2]
+
+    def get_position(self, index):
+        """
+        Parameters
+        ----------
+        index : int
+            A flat index, as returned by get_index
+
+        Returns
+        -------
+        tuple
+            The corresponding (x, y, z) position
+        """
+        xy, z = divmod(int(index), self.zsize)
+        x, y = divmod(xy, self.ysize)
+        return x, y, z
+
+    def get_occupancy(self, position):
+        """
+        Returns the number of agents at a position.
+        """
+        return self.occupancy[self.get_index(position)]
+
+    def has_capacity(self, position, max_density):
+        """
+        Returns true if the position holds fewer than max_density agents.
+        """
+        return self.occupancy[self.get_index(position)] < max_density
+
+    def get_moore_neighbourhood_indices(self, position):
+        """
+        Returns the flat indices of the moore neighbours of a position which
+        fall inside the grid.
+        """
+        neighbours = self.moore_neighbours[self.get_index(position)]
+        return neighbours[neighbours < self.num_positions]
+
+    def get_moore_neighbourhood(self, position, shuffle_neigh=True):
+        neigh = [self.get_position(i) for i in
+                 self.get_moore_neighbourhood_indices(position)]
+
+        if shuffle_neigh:
+            self.random_stream.shuffle(neigh)
+
+        return neigh
+
+    def get_least_populated_moore_neigh(self, position):
+        neighbours = self.get_moore_neighbourhood_indices(position)
+
+        if len(neighbours) == 0:
+            return None
+
+        populations = self.occupancy[neighbours]
+        least_populated = neighbours[populations == populations.min()]
+
+        # Ties are broken at random, as in the parent implementation
+        return self.get_position(
+            least_populated[self.random_stream.randrange(
+                len(least_populated))])
+
+    def occupy(self, positions):
+        """
+        Counts one entity held outside the grid (Eg: a healthy cell of the
+        healthy tissue field) at each of the given positions, so that it is
+        taken into account by density checks.
+
+        Parameters
+        ----------
+        positions : list
+            A list of (x, y, z) positions
+        """
+        if len(positions) == 0:
+            return
+
+        indices = np.ravel_multi_index(np.array(positions).T, self.shape)
+        np.add.at(self.occupancy, indices, 1)
+
+    def add_agent(self, agent, position):
+        if self.valid_position(position) and \
+                agent not in self.grid[position]:
+            self.grid[position].add(agent)
+            self.occupancy[self.get_index(position)] += 1
+
+    def add_agents(self, agents, indices):
+        """
+        Adds agents to the grid in bulk, updating both the grid and the
+        positions held by the agents, as add_agent_to_grid called on each
+        agent. Agents are assumed not to be on the grid already.
+
+        Parameters
+        ----------
+        agents : list
+            The agents to add
+        indices : numpy.ndarray
+            The flat index of the position of each agent, in the same order
+            as agents
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        positions = zip(*[axis.tolist() for axis in
+                          np.unravel_index(indices, self.shape)])
+
+        for agent, position in zip(agents, positions):
+            agent.environment_positions[self.name] = position
+            self.grid[position].add(agent)
+
+        np.add.at(self.occupancy, indices, 1)
+
+    def remove_agent(self, agent, position):
+        self.grid[position].remove(agent)
+        self.occupancy[self.get_index(position)] -= 1
+
+    def move_agent(self, agent, position_old, position_new):
+        if self.valid_position(position_new):
+            self.remove_agent(agent, position_old)
+            self.add_agent(agent, position_new)
@@ -0,0 +1,62 @@
+from collections import OrderedDict
+
+try:
+    from collections.abc import MutableSet
+except ImportError:
+    from collections import MutableSet
+
+
+class OrderedSet(MutableSet):
+    """
+    A set which iterates in insertion order. Used in place of the built-in
+    set wherever the iteration order of agents can affect the simulation,
+    since sets of agents iterate in an order which depends on memory
+    addresses and so differs between runs.
+
+    Parameters
+    ----------
+    items : iterable, optional
+        Initial items of the set
+    """
+
+    def __init__(self, items=()):
+        self.items = OrderedDict()
+
+        for item in items:
+            self.items[item] = None
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __repr__(self):
+        return "OrderedSet(%s)" % list(self.items)
+
+    def add(self, item):
+        self.items[item] = None
+
+    def update(self, items):
+        """
+        Adds all items of an iterable, in order, in one call.
+        """
+        self.items.update((item, None) for item in items)
+
+    def discard(self, item):
+        self.items.pop(item, None)
+
+    def union(self, other):
+        """
+        Returns a new OrderedSet holding the items of this set followed by
+        those of other, as set.union. (Used by panaxea helpers.)
+        """
+        result = OrderedSet(self)
+
+        for item in other:
+            result.add(item)
+
+        return result
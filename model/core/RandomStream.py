@@ -0,0 +1,166 @@
+import math
+import numpy as np
+
+
+class RandomStream(object):
+    """
+    A seedable source of random numbers for a model, backed by a numpy
+    Generator. Uniform variates are pre-drawn in blocks, normally one block
+    per epoch sized to the expected number of draws, and handed out one at a
+    time to agents or as arrays to vectorized code.
+
+    As long as variates are requested in the same order, two streams with
+    the same seed produce the same simulation.
+
+    Attributes
+    ----------
+    seed : int, optional
+        The seed of the generator. If None, a seed is drawn from system
+        entropy and stored in the seed attribute, so the run can be repeated.
+    block_size : int, optional
+        The size of the block drawn when the current one runs out before the
+        next refill. Defaults to 1024.
+    """
+
+    def __init__(self, seed=None, block_size=1024):
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % (2 ** 32))
+
+        self.seed = seed
+        self.block_size = block_size
+        self.generator = np.random.default_rng(seed)
+        self.block = np.empty(0)
+        self.position = 0
+
+    def refill(self, size):
+        """
+        Discards any variates left in the current block and draws a new
+        block of the given size in one call.
+
+        Parameters
+        ----------
+        size : int
+            The number of uniform variates to draw
+        """
+        self.block = self.generator.random(max(size, self.block_size))
+        self.position = 0
+
+    def random(self):
+        """
+        Returns
+        -------
+        float
+            A uniform variate in [0, 1)
+        """
+        if self.position >= len(self.block):
+            self.refill(self.block_size)
+
+        value = self.block.item(self.position)
+        self.position += 1
+
+        return value
+
+    def random_array(self, size):
+        """
+        Parameters
+        ----------
+        size : int or tuple
+            The shape of the array
+
+        Returns
+        -------
+        numpy.ndarray
+            An array of uniform variates in [0, 1)
+        """
+        count = int(np.prod(size))
+
+        if self.position + count > len(self.block):
+            self.refill(count)
+
+        values = self.block[self.position:self.position + count]
+        self.position += count
+
+        return values.reshape(size)
+
+    def randrange(self, n):
+        """
+        Returns
+        -------
+        int
+            A random integer in [0, n)
+        """
+        return min(int(self.random() * n), n - 1)
+
+    def geometric(self, p):
+        """
+        Samples the number of Bernoulli trials with success probability p up
+        to and including the first success, by inversion from a single
+        uniform variate.
+
+        Parameters
+        ----------
+        p : float
+            The probability of success of each trial
+
+        Returns
+        -------
+        int or float
+            The number of trials, at least 1, or infinity if p is 0
+        """
+        if p <= 0:
+            return float("inf")
+        if p >= 1:
+            return 1
+
+        return int(math.log1p(-self.random()) / math.log1p(-p)) + 1
+
+    def binomial(self, n, p):
+        """
+        Draws binomial variates straight from the generator.
+
+        Parameters
+        ----------
+        n : int or numpy.ndarray
+            The number of trials
+        p : float or numpy.ndarray
+            The probability of success of each trial
+
+        Returns
+        -------
+        int or numpy.ndarray
+            The number of successes
+        """
+        return self.generator.binomial(n, p)
+
+    def hypergeometric(self, ngood, nbad, nsample):
+        """
+        Draws hypergeometric variates straight from the generator.
+
+        Parameters
+        ----------
+        ngood : int or numpy.ndarray
+            The number of good items
+        nbad : int or numpy.ndarray
+            The number of bad items
+        nsample : int or numpy.ndarray
+            The number of items drawn without replacement
+
+        Returns
+        -------
+        int or numpy.ndarray
+            The number of good items drawn
+        """
+        return self.generator.hypergeometric(ngood, nbad, nsample)
+
+    def shuffle(self, items):
+        """
+        Shuffles a list in place.
+
+        Parameters
+        ----------
+        items : list
+            The list to shuffle
+        """
+        for i in range(len(items) - 1, 0, -1):
+            j = self.randrange(i + 1)
+            items[i], items[j] = items[j], items[i]
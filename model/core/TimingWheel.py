@@ -0,0 +1,64 @@
+class TimingWheel(object):
+    """
+    A timing wheel: a circular array of buckets, one per epoch, holding the
+    items due at each of the upcoming epochs. Scheduling an item and
+    collecting the items due at an epoch both take constant time, however
+    many items are scheduled further ahead.
+
+    Items can be scheduled from the current epoch up to horizon - 1 epochs
+    ahead of it. The current epoch is the last one passed to pop_due, so
+    pop_due should be called for every epoch in turn.
+
+    Attributes
+    ----------
+    horizon : int
+        The number of buckets of the wheel
+    """
+
+    def __init__(self, horizon):
+        self.horizon = horizon
+        self.buckets = [[] for _ in range(horizon)]
+        self.current_epoch = 0
+
+    def schedule(self, item, epoch):
+        """
+        Schedules an item to be returned by pop_due at the given epoch.
+
+        Parameters
+        ----------
+        item : object
+            The item to schedule
+        epoch : int
+            The epoch the item is due at
+        """
+        if not self.current_epoch <= epoch < \
+                self.current_epoch + self.horizon:
+            raise ValueError(
+                "Epoch %s is outside the horizon of the wheel (epochs %s to "
+                "%s)" % (epoch, self.current_epoch,
+                         self.current_epoch + self.horizon - 1))
+
+        self.buckets[epoch % self.horizon].append(item)
+
+    def pop_due(self, epoch):
+        """
+        Advances the wheel to an epoch and returns the items due at it, in
+        the order they were scheduled.
+
+        Parameters
+        ----------
+        epoch : int
+            The epoch to advance the wheel to
+
+        Returns
+        -------
+        list
+            The items due at the epoch
+        """
+        self.current_epoch = epoch
+        bucket = epoch % self.horizon
+
+        due = self.buckets[bucket]
+        self.buckets[bucket] = []
+
+        return due
@@ -0,0 +1,67 @@
+import numpy as np
+from panaxea.core.Environment import Grid3D
+
+
+class VesselGrid3D(Grid3D, object):
+    """
+    Represents the trunk part of the vasculature as a static field rather
+    than as TrunkCell agents. Trunk cells never move nor change once laid
+    down by a sprouting tip cell, so all the model needs of them is how many
+    there are at each position and their summed radius, from which oxygen
+    and glucose source rates are precomputed.
+
+    Positions are flattened with np.ravel_multi_index over (xsize, ysize,
+    zsize), as in the diffusion helpers.
+
+    Attributes
+    ----------
+    name : string
+        The name of the environment
+    xsize : int
+        The number of positions along the x-axis
+    ysize : int
+        The number of positions along the y-axis
+    zsize : int
+        The number of positions along the z-axis
+    model : model
+        The instance of the model class to which the environment will be
+        attached.
+    """
+
+    def __init__(self, name, xsize, ysize, zsize, model):
+        super(VesselGrid3D, self).__init__(name, xsize, ysize, zsize, model)
+        self.shape = (xsize, ysize, zsize)
+        num_positions = xsize * ysize * zsize
+
+        endothelial_cells_properties = model.properties["agents"][
+            "endothelialCells"]
+        self.base_oxygen_emission_rate = endothelial_cells_properties[
+            "baseOxygenEmissionRate"]
+        self.base_glucose_secretion_rate = endothelial_cells_properties[
+            "glucoseSecretionRate"]
+
+        self.vessels = np.zeros(num_positions, dtype=np.int64)
+        self.radius = np.zeros(num_positions)
+        self.oxygen_source_rates = np.zeros(num_positions)
+        self.glucose_source_rates = np.zeros(num_positions)
+
+    def add_vessel(self, position, radius):
+        """
+        Adds a trunk vessel segment at a position. As for endothelial cells,
+        its source rates are its radius times the base rates.
+
+        Parameters
+        ----------
+        position : tuple
+            The (x, y, z) position
+        radius : int
+            The radius of the vessel segment
+        """
+        i = np.ravel_multi_index(position, self.shape)
+
+        self.vessels[i] += 1
+        self.radius[i] += radius
+        self.oxygen_source_rates[i] = \
+            self.radius[i] * self.base_oxygen_emission_rate
+        self.glucose_source_rates[i] = \
+            self.radius[i] * self.base_glucose_secretion_rate
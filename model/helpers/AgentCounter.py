@@ -21,6 +21,9 @@ class AgentCounter(Helper, object):
         self.cancer_cell_class_name = cancer_cell_class_name
         self.tip_cell_class_name = "TipCell"
         self.trunk_cell_name = "TrunkCell"
+        self.vessel_env_name = model.properties["envNames"]["vesselEnvName"]
+        self.cancer_population_env_name = model.properties["envNames"][
+            "cancerPopulationEnvName"]
 
         agent_nums = {
             "cancerCells": [],
@@ -32,18 +35,28 @@ class AgentCounter(Helper, object):
         model.output["agentNums"] = agent_nums
 
     def step_epilogue(self, model):
-        cancer_cells = len([a for a in model.schedule.agents if
-                            a.__class__.__name__ ==
-                            self.cancer_cell_class_name])
-        tip_cells = len([a for a in model.schedule.agents if
-                         a.__class__.__name__ == self.tip_cell_class_name or
-                         a.__class__.__name__ == self.trunk_cell_name])
-        alive_cancer_cells = len([a for a in model.schedule.agents if
-                                  a.__class__.__name__ ==
-                                  self.cancer_cell_class_name and not a.dead])
-        dead_cancer_cells = len([a for a in model.schedule.agents if
-                                 a.__class__.__name__ ==
-                                 self.cancer_cell_class_name and a.dead])
+        registry = model.schedule.registry
+        cancer_population_env = model.environments[
+            self.cancer_population_env_name]
+
+        # Cells represented as populations are counted as the agents they
+        # stand in for
+        alive_population_cells = int(cancer_population_env.counts.sum())
+        dead_population_cells = int(cancer_population_env.dead.sum())
+
+        cancer_cells = len(registry.get_agents(self.cancer_cell_class_name)) \
+            + alive_population_cells + dead_population_cells
+        # Static vessel segments are counted as the trunk cells they stand
+        # in for
+        tip_cells = len(registry.get_agents(self.tip_cell_class_name)) + \
+            len(registry.get_agents(self.trunk_cell_name)) + \
+            int(model.environments[self.vessel_env_name].vessels.sum())
+        alive_cancer_cells = len(
+            registry.get_alive_agents(self.cancer_cell_class_name)) + \
+            alive_population_cells
+        dead_cancer_cells = len(
+            registry.get_dead_agents(self.cancer_cell_class_name)) + \
+            dead_population_cells
 
         model.output["agentNums"]["cancerCells"].append(cancer_cells)
         model.output["agentNums"]["tipCells"].append(tip_cells)
@@ -0,0 +1,140 @@
+import numpy as np
+from panaxea.core.Steppables import Helper
+
+from model.core.TimingWheel import TimingWheel
+from model.utils.HifResponse import HifResponse
+
+
+class CancerCellCycleHelper(Helper, object):
+    """
+    Steps cancer cells in an event-driven fashion, in place of
+    CancerCell.step_main. Cancer cells should be created with
+    eventDrivenCellCycle enabled in the engine properties, so they do not
+    also step on their own.
+
+    Each epoch, the survival check and the HIF-mediated updates of all live
+    cancer cells, which depend on the oxygen and glucose fields, are carried
+    out in one batched pass over arrays. The cell cycle is event-driven:
+    rather than incrementing progress_in_state every epoch, the epoch at
+    which each cell is next due to leave its phase (from baseCellCycleLength)
+    is scheduled in a timing wheel, and only cells with due events are
+    processed. A cell which fails to leave G1, or has no room to divide,
+    tries again the following epoch, as in the per-agent implementation.
+
+    While a cell is waiting on the wheel, its progress_in_state is not
+    updated. The epoch it is due at is held in cycle_event_epoch.
+
+    Attributes
+    ----------
+    model : Model
+        The model instance
+    cancer_cell_class_name : string, optional
+        The name of the cancer cell class, defaults to CancerCell
+    """
+
+    def __init__(self, model, cancer_cell_class_name="CancerCell"):
+        self.cancer_cell_class_name = cancer_cell_class_name
+        env_names = model.properties["envNames"]
+        self.agent_env_name = env_names["agentEnvName"]
+        self.oxygen_env_name = env_names["oxygenEnvName"]
+        self.glucose_env_name = env_names["glucoseEnvName"]
+        self.drug_env_name = env_names["drugEnvName"]
+
+        cancer_cell_props = model.properties["agents"]["cancerCells"]
+
+        self.hif_response = HifResponse(cancer_cell_props)
+        self.minimum_oxygen_concentration = cancer_cell_props[
+            "minimumOxygenConcentration"]
+        self.min_glucose_warburg = cancer_cell_props["minGlucoseWarburg"]
+        self.min_glucose_non_warburg = cancer_cell_props[
+            "minGlucoseNonWarburg"]
+        self.max_glucose_uptake_rate = cancer_cell_props[
+            "maxGlucoseUptakeRate"]
+
+        self.cell_cycle_length = model.properties["agents"][
+            "baseCellCycleLength"]
+
+        # Cells are scheduled at most one full phase plus one epoch ahead
+        self.wheel = TimingWheel(max(self.cell_cycle_length.values()) + 2)
+
+    def step_main(self, model):
+        epoch = model.current_epoch
+
+        cells = [c for c in model.schedule.registry.get_alive_agents(
+            self.cancer_cell_class_name) if not c.quiescent]
+
+        if len(cells) > 0:
+            self.__step_cells(model, cells)
+
+        # Cells which have not yet been scheduled, such as newborn ones,
+        # start from their current progress
+        for c in cells:
+            if not c.dead and c.cycle_event_epoch is None:
+                self.__schedule(c, epoch)
+
+        for c in self.wheel.pop_due(epoch):
+            c.cycle_event_epoch = None
+
+            if c.dead:
+                continue
+
+            if not c.quiescent:
+                c.progress_in_state = self.cell_cycle_length[c.current_state]
+                c.progress_cell_(model)
+
+            self.__schedule(c, epoch + 1)
+
+    def __schedule(self, cell, first_epoch):
+        # A cell stepping from first_epoch on leaves its phase once it has
+        # made up the progress it lacks
+        cell.cycle_event_epoch = first_epoch + \
+            self.cell_cycle_length[cell.current_state] - \
+            cell.progress_in_state
+        self.wheel.schedule(cell, cell.cycle_event_epoch)
+
+    def __step_cells(self, model, cells):
+        agent_env = model.environments[self.agent_env_name]
+        positions = np.array([agent_env.get_index(
+            c.environment_positions[self.agent_env_name]) for c in cells])
+
+        oxygen = model.environments[self.oxygen_env_name].values[positions]
+        glucose = model.environments[self.glucose_env_name].values[positions]
+        drug = model.environments[self.drug_env_name].values[positions]
+
+        ages = np.array([c.age for c in cells]) + 1
+        warburg = np.array([c.warburg_switch for c in cells])
+        switching = ~warburg & (
+            ages >= np.array([c.warburg_switch_age for c in cells]))
+        warburg |= switching
+
+        dying = np.where(
+            warburg,
+            glucose < self.min_glucose_warburg,
+            (oxygen < self.minimum_oxygen_concentration) |
+            (glucose < self.min_glucose_non_warburg))
+
+        hif = self.hif_response.get_hif_rates(
+            oxygen, warburg, np.array([c.current_hif_rate for c in cells]))
+        metabolic_rates = self.hif_response.get_metabolic_rates(hif)
+        p_synthesis = self.hif_response.get_p_synthesis(hif)
+        vegf_rates = self.hif_response.get_vegf_secretion_rates(hif)
+
+        for i, c in enumerate(cells):
+            c.oxygen_at_pos = oxygen[i]
+            c.glucose_at_pos = glucose[i]
+            c.drug_at_pos = drug[i]
+            c.age = int(ages[i])
+
+            if switching[i]:
+                c.warburg_switch = True
+                c.glucose_uptake_rate = self.max_glucose_uptake_rate
+
+            if dying[i]:
+                # Records the cause of death
+                c.decide_die_()
+                model.schedule.registry.mark_dead(c)
+            else:
+                c.current_hif_rate = hif[i]
+                c.current_metabolic_rate = metabolic_rates[i]
+                c.current_p_synthesis = p_synthesis[i]
+                c.current_vegf_secretion_rate = vegf_rates[i]
@@ -0,0 +1,183 @@
+import numpy as np
+from panaxea.core.Steppables import Helper
+
+from model.utils.HifResponse import HifResponse
+
+
+class CancerCellPopulationHelper(Helper, object):
+    """
+    Steps the cancer cell populations of a CancerCellPopulationGrid3D,
+    following the per-cell logic of CancerCell.step_main with one draw per
+    compartment rather than per cell:
+
+    * Non warburg cells switch to warburg with probability pWarburgSwitch,
+      as a binomial draw per compartment;
+    * All cells of a metabolism in a voxel where they lack oxygen or
+      glucose die;
+    * HIF expression rates, and the rates they mediate, are updated per
+      voxel and metabolism;
+    * Cells progress in their phase. Cells at the end of G1 move on to S
+      with probability pSynthesis, as a binomial draw, and cells at the end
+      of M divide into their voxel or, if full, into the least populated of
+      its moore neighbours. Cells which can not move on try again the
+      following epoch.
+
+    Divided cells restart the cycle as non warburg cells, taking up glucose
+    at the minimum rate. This differs from CancerCell, where a warburg cell
+    which divides is reset to non warburg but keeps taking up glucose at the
+    maximum rate. A population has no compartment for such cells, so
+    population runs take up less glucose after warburg divisions than
+    per-agent ones.
+
+    Attributes
+    ----------
+    model : Model
+        The model instance
+    """
+
+    def __init__(self, model):
+        env_names = model.properties["envNames"]
+        self.agent_env_name = env_names["agentEnvName"]
+        self.oxygen_env_name = env_names["oxygenEnvName"]
+        self.glucose_env_name = env_names["glucoseEnvName"]
+        self.cancer_population_env_name = env_names[
+            "cancerPopulationEnvName"]
+        self.max_agent_density = model.properties["maxAgentDensity"]
+
+        cancer_cell_props = model.properties["agents"]["cancerCells"]
+
+        self.hif_response = HifResponse(cancer_cell_props)
+        self.p_warburg_switch = cancer_cell_props["pWarburgSwitch"]
+        self.minimum_oxygen_concentration = cancer_cell_props[
+            "minimumOxygenConcentration"]
+        self.min_glucose_warburg = cancer_cell_props["minGlucoseWarburg"]
+        self.min_glucose_non_warburg = cancer_cell_props[
+            "minGlucoseNonWarburg"]
+
+    def step_main(self, model):
+        population = model.environments[self.cancer_population_env_name]
+        active = np.flatnonzero(population.counts.any(axis=(1, 2)))
+
+        if len(active) == 0:
+            return
+
+        random_stream = model.random_stream
+        counts = population.counts[active]
+        hif = population.hif[active]
+
+        # Switching to warburg
+        switching = random_stream.binomial(counts[:, 0],
+                                           self.p_warburg_switch)
+        population.mix_hif(active, 1, switching.sum(axis=1), hif[:, 0])
+        counts[:, 0] -= switching
+        counts[:, 1] += switching
+        hif = population.hif[active]
+
+        # Dying, cells of each metabolism at a voxel sharing their fate
+        oxygen = model.environments[self.oxygen_env_name].values[active]
+        glucose = model.environments[self.glucose_env_name].values[active]
+        alive = counts.sum(axis=2)
+
+        lack_of_oxygen = oxygen < self.minimum_oxygen_concentration
+        dying = np.column_stack([
+            lack_of_oxygen | (glucose < self.min_glucose_non_warburg),
+            glucose < self.min_glucose_warburg])
+        # Causes as in CancerCell.decide_die_
+        population.deaths[0, 0] += \
+            alive[dying[:, 0] & lack_of_oxygen, 0].sum()
+        population.deaths[0, 1] += \
+            alive[dying[:, 0] & ~lack_of_oxygen, 0].sum()
+        population.deaths[1, 1] += alive[dying[:, 1], 1].sum()
+        population.dead[active] += (alive * dying).sum(axis=1)
+        counts[dying] = 0
+
+        # HIF and mediated rates
+        warburg = np.broadcast_to([False, True], hif.shape)
+        hif = self.hif_response.get_hif_rates(oxygen[:, None], warburg, hif)
+        population.hif[active] = hif
+        population.metabolic_rate[active] = \
+            self.hif_response.get_metabolic_rates(hif)
+        p_synthesis = self.hif_response.get_p_synthesis(hif)
+        population.p_synthesis[active] = p_synthesis
+        population.vegf_secretion_rate[active] = \
+            self.hif_response.get_vegf_secretion_rates(hif)
+
+        # Cell cycle. Cells at the end of their phase are set aside before
+        # the others progress, so cells moving on start the next phase
+        # without progressing in it this epoch.
+        offsets = population.offsets
+        lengths = population.cycle_lengths
+        ends = [offsets[i] + lengths[i] for i in range(len(lengths))]
+        at_end = [counts[:, :, end].copy() for end in ends]
+
+        for i, end in enumerate(ends):
+            counts[:, :, end] = 0
+            counts[:, :, offsets[i] + 1:end + 1] = \
+                counts[:, :, offsets[i]:end].copy()
+            counts[:, :, offsets[i]] = 0
+
+        leaving_g1 = random_stream.binomial(
+            at_end[0], np.clip(p_synthesis, 0, 1))
+        counts[:, :, ends[0]] += at_end[0] - leaving_g1
+        counts[:, :, offsets[1]] += leaving_g1
+        counts[:, :, offsets[2]] += at_end[1]
+        counts[:, :, offsets[3]] += at_end[2]
+
+        population.counts[active] = counts
+
+        self.__divide(model, population, active, at_end[3])
+
+    def __divide(self, model, population, active, dividing):
+        agent_env = model.environments[self.agent_env_name]
+        occupancy = agent_env.occupancy
+
+        num_dividing = dividing.sum(axis=1)
+        births = np.minimum(num_dividing, np.maximum(
+            0, self.max_agent_density - occupancy[active]))
+        occupancy[active] += births
+        daughters = [(active, births.copy())]
+
+        # Cells without room in their own voxel place their daughter in the
+        # least populated neighbour, one at a time
+        for i in np.flatnonzero(births < num_dividing):
+            position = agent_env.get_position(active[i])
+            targets = []
+
+            while births[i] < num_dividing[i]:
+                target = agent_env.get_least_populated_moore_neigh(position)
+
+                if target is None or not agent_env.has_capacity(
+                        target, self.max_agent_density):
+                    break
+
+                target = agent_env.get_index(target)
+                occupancy[target] += 1
+                targets.append(target)
+                births[i] += 1
+
+            daughters.append(np.unique(np.array(targets, dtype=np.int64),
+                                       return_counts=True))
+
+        # Which of the dividing cells divided
+        has_dividing = num_dividing > 0
+        divided_warburg = np.zeros_like(births)
+        divided_warburg[has_dividing] = model.random_stream.hypergeometric(
+            dividing[has_dividing, 1], dividing[has_dividing, 0],
+            births[has_dividing])
+        divided = np.column_stack([births - divided_warburg, divided_warburg])
+
+        # Divided cells restart the cycle as non warburg cells, keeping their
+        # HIF expression rate
+        hif = population.hif[active]
+        divided_hif = np.divide((divided * hif).sum(axis=1), births,
+                                out=hif[:, 0].copy(), where=births > 0)
+        population.mix_hif(active, 0, births, divided_hif)
+
+        g1 = population.get_compartment("G1", 0)
+        m_end = population.get_compartment("M", population.cycle_lengths[3])
+        population.counts[active, :, m_end] += dividing - divided
+        population.counts[active, 0, g1] += births
+
+        for indices, counts in daughters:
+            if len(indices) > 0:
+                population.add_cells(indices, "G1", 0, counts)
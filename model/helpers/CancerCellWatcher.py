@@ -1,8 +1,3 @@
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-plt.switch_backend("agg")
-
 import numpy as np
 from panaxea.core.Steppables import Helper
 
@@ -38,46 +33,74 @@ class CancerCellWatcher(Helper, object):
         model.output["cancerCellProperties"]["numWarburgCells"] = []
 
         self.cancer_class_name = cancerCellClassName
+        self.cancer_population_env_name = model.properties["envNames"][
+            "cancerPopulationEnvName"]
         self.distribution_interval = distributionInterval
 
     def step_epilogue(self, model):
 
-        cancerCells = [a for a in model.schedule.agents if
-                       a.__class__.__name__ == self.cancer_class_name and not
-                       a.dead]
+        cancerCells = list(model.schedule.registry.get_alive_agents(
+            self.cancer_class_name))
+
+        # Cells represented as populations are included as if they were
+        # agents, each taking the mean rates of its voxel and metabolism, by
+        # weighting those rates by the number of cells
+        cancer_population_env = model.environments[
+            self.cancer_population_env_name]
+        population_cells = cancer_population_env.counts.sum(axis=2)
+        occupied = np.flatnonzero(population_cells)
+        weights = np.concatenate([np.ones(len(cancerCells)),
+                                  population_cells.ravel()[occupied]])
+
+        def get_values(agent_values, population_values):
+            return np.concatenate([np.array(agent_values, dtype=float),
+                                   population_values.ravel()[occupied]])
+
+        num_cells = len(cancerCells) + int(population_cells.sum())
 
-        if len(cancerCells) == 0:
+        if num_cells == 0:
             print("HERE")
             model.output["cancerCellProperties"]["avgHif"].append(0)
             model.output["cancerCellProperties"]["avgVegf"].append(0)
             model.output["cancerCellProperties"]["avgMetabolicRates"].append(0)
             model.output["cancerCellProperties"]["avgPSynthesis"].append(0)
         else:
-            hif_rates = [a.current_hif_rate for a in cancerCells]
+            hif_rates = get_values(
+                [a.current_hif_rate for a in cancerCells],
+                cancer_population_env.hif)
             model.output["cancerCellProperties"]["avgHif"].append(
-                np.mean(hif_rates))
+                np.average(hif_rates, weights=weights))
 
-            vegf_rates = [a.current_vegf_secretion_rate for a in cancerCells]
+            vegf_rates = get_values(
+                [a.current_vegf_secretion_rate for a in cancerCells],
+                cancer_population_env.vegf_secretion_rate)
             model.output["cancerCellProperties"]["avgVegf"].append(
-                np.mean(vegf_rates))
+                np.average(vegf_rates, weights=weights))
 
-            metabolic_rates = [a.current_metabolic_rate for a in cancerCells]
+            metabolic_rates = get_values(
+                [a.current_metabolic_rate for a in cancerCells],
+                cancer_population_env.metabolic_rate)
             model.output["cancerCellProperties"]["avgMetabolicRates"].append(
-                np.mean(metabolic_rates))
+                np.average(metabolic_rates, weights=weights))
 
-            p_synthesis = [a.current_p_synthesis for a in cancerCells]
+            p_synthesis = get_values(
+                [a.current_p_synthesis for a in cancerCells],
+                cancer_population_env.p_synthesis)
             model.output["cancerCellProperties"]["avgPSynthesis"].append(
-                np.mean(p_synthesis))
+                np.average(p_synthesis, weights=weights))
 
             # Percentage of warburg cells
             warburg_cells = [c for c in cancerCells if c.warburg_switch]
+            num_warburg_cells = len(warburg_cells) + \
+                int(population_cells[:, 1].sum())
             model.output["cancerCellProperties"]["numWarburgCells"].append(
-                float(len(warburg_cells)) / float(len(cancerCells)))
+                float(num_warburg_cells) / float(num_cells))
 
             if model.current_epoch % self.distribution_interval == 0 or \
                     model.current_epoch == model.epochs - 1:
-                n, bins, patches = plt.hist(hif_rates,
-                                            bins=list(np.arange(0, 17, 1)))
+                n, bins = np.histogram(hif_rates, bins=np.arange(0., 17.),
+                                       weights=weights)
+                n = n.astype(float)
                 model.output["cancerCellProperties"][
                     "HIFExpressionRatesDistributions"].append(
                     {"n": n, "bins": bins, "epoch": model.current_epoch})
@@ -5,7 +5,8 @@ from panaxea.core.Steppables import Helper
 class DeathCauseWatcher(Helper, object):
     """
     Used to track at each epoch what the CUMULATIVE cause of cancer cell
-    death is.
+    death is. Cells represented as populations are included in the numbers
+    of dead cells, but not in the ages, which are not tracked for them.
 
     An appropriate key "causesOfDeath" is created in the model's output as a
     list. At each epoch, a dictionary where each key is a cause of cell
@@ -22,12 +23,14 @@ class DeathCauseWatcher(Helper, object):
     def __init__(self, model, interval):
         model.output["causesOfDeath"] = []
         self.interval = interval
+        self.cancer_population_env_name = model.properties["envNames"][
+            "cancerPopulationEnvName"]
 
     def step_epilogue(self, model):
 
         if model.current_epoch % self.interval == 0:
-            cancer_cells = [a for a in model.schedule.agents if
-                            a.__class__.__name__ == "CancerCell" and a.dead]
+            cancer_cells = list(
+                model.schedule.registry.get_dead_agents("CancerCell"))
 
             warburg_death_glucose = [c for c in cancer_cells if
                                      c.warburg_switch and c.cause_of_death[
@@ -56,24 +59,37 @@ class DeathCauseWatcher(Helper, object):
                     "LENGTH OF TOTAL DEAD CELLS")
                 exit()
 
+            # Numbers of cells represented as populations, by metabolism and
+            # cause of death
+            cancer_population_env = model.environments[
+                self.cancer_population_env_name]
+            deaths = cancer_population_env.deaths
+            causes = cancer_population_env.causes_of_death
+            glucose = causes.index("Lack of glucose")
+            oxygen = causes.index("Lack of oxygen")
+
             # summarising
             summary = {
                 "warburgDeathGlucose": {
-                    "num": len(warburg_death_glucose),
+                    "num": len(warburg_death_glucose) +
+                    int(deaths[1, glucose]),
                     "avgAge": np.mean([c.age for c in warburg_death_glucose]),
                     "stDev": np.std([c.age for c in warburg_death_glucose])},
                 "warburgDeathOxygen": {
-                    "num": len(warburg_death_oxygen),
+                    "num": len(warburg_death_oxygen) +
+                    int(deaths[1, oxygen]),
                     "avgAge": np.mean([c.age for c in warburg_death_oxygen]),
                     "stDev": np.std([c.age for c in warburg_death_oxygen])},
                 "nonWarburgDeathOxygen": {
-                    "num": len(non_warburg_death_oxygen),
+                    "num": len(non_warburg_death_oxygen) +
+                    int(deaths[0, oxygen]),
                     "avgAge": np.mean(
                         [c.age for c in non_warburg_death_oxygen]),
                     "stDev": np.std(
                         [c.age for c in non_warburg_death_oxygen])},
                 "nonWarburgDeathGlucose": {
-                    "num": len(non_warburg_death_glucose),
+                    "num": len(non_warburg_death_glucose) +
+                    int(deaths[0, glucose]),
                     "avgAge": np.mean(
                         [c.age for c in non_warburg_death_glucose]),
                     "stDev": np.std([c.age for c in non_warburg_death_glucose])
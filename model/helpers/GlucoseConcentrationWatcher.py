@@ -1,12 +1,8 @@
-import matplotlib
-
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-
-plt.switch_backend("agg")
 import numpy as np
 from panaxea.core.Steppables import Helper
 
+from model.utils.GridAggregation import get_occupied_values
+
 
 class GlucoseConcentrationWatcher(Helper, object):
     """
@@ -36,30 +32,43 @@ class GlucoseConcentrationWatcher(Helper, object):
         self.cancer_cell_name = cancer_cell_name
         self.agent_env_name = model.properties["envNames"]["agentEnvName"]
         self.glucose_env_name = model.properties["envNames"]["glucoseEnvName"]
+        self.cancer_population_env_name = model.properties["envNames"][
+            "cancerPopulationEnvName"]
         self.interval = interval
 
     def step_epilogue(self, model):
 
-        cancer_cells = [a for a in model.schedule.agents if
-                        a.__class__.__name__ == self.cancer_cell_name and not
-                        a.dead]
-        if len(cancer_cells) > 0:
-            coordinates = [a.environment_positions[self.agent_env_name] for a
-                           in
-                           cancer_cells]
-            concentrations = [model.environments[self.glucose_env_name].grid[c]
-                              for c in coordinates]
+        cancer_cells = list(model.schedule.registry.get_alive_agents(
+            self.cancer_cell_name))
+        coordinates = [a.environment_positions[self.agent_env_name] for a
+                       in
+                       cancer_cells]
+        concentrations = [model.environments[self.glucose_env_name].grid[c]
+                          for c in coordinates]
+
+        # Cancer cells represented as populations are included as if they
+        # were agents, weighting the concentration of each voxel by its
+        # number of cells
+        values, counts = get_occupied_values(
+            model.environments[self.glucose_env_name].values,
+            model.environments[self.cancer_population_env_name].get_alive())
+        weights = np.concatenate([np.ones(len(concentrations)), counts])
+        concentrations = np.concatenate([
+            np.array(concentrations, dtype=float), values])
+
+        if len(concentrations) > 0:
             model.output["cancerCellProperties"]["avgGlucose"].append(
-                np.mean(concentrations))
+                np.average(concentrations, weights=weights))
             model.output["cancerCellProperties"]["minGlucose"].append(
-                min(concentrations))
+                concentrations.min())
             model.output["cancerCellProperties"]["maxGlucose"].append(
-                max(concentrations))
+                concentrations.max())
 
             if model.current_epoch % self.interval == 0 or \
                     model.current_epoch \
                     == model.epochs - 1:
-                n, bins, patches = plt.hist(concentrations)
+                n, bins = np.histogram(concentrations, weights=weights)
+                n = n.astype(float)
                 model.output["cancerCellProperties"][
                     "GlucoseDistributions"].append(
                     {"n": n, "bins": bins, "epoch": model.current_epoch})
@@ -1,14 +1,23 @@
 import numpy as np
 import time
-from fipy import Grid3D, CellVariable, TransientTerm, DiffusionTerm
 from panaxea.core.Steppables import Helper
 
+from model.utils.GridAggregation import sum_by_position
+from model.utils.LazyModule import LazyModule
+
+fipy = LazyModule("fipy")
+
 
 class GlucoseDiffusionHelper(Helper):
 
     def __init__(self, model, cancerCellName="CancerCell"):
         self.agent_env_name = model.properties["envNames"]["agentEnvName"]
         self.glucose_env_name = model.properties["envNames"]["glucoseEnvName"]
+        self.healthy_tissue_env_name = model.properties["envNames"][
+            "healthyTissueEnvName"]
+        self.cancer_population_env_name = model.properties["envNames"][
+            "cancerPopulationEnvName"]
+        self.vessel_env_name = model.properties["envNames"]["vesselEnvName"]
         self.glucose_diffusion_coeff = model.properties["diffusion"][
             "glucoseDiffusivity"]
         self.dt = model.properties["diffusion"]["dt"]
@@ -23,111 +32,122 @@ class GlucoseDiffusionHelper(Helper):
         self.max_glucose_uptake_rate = model.properties["agents"][
             "cancerCells"]["maxGlucoseUptakeRate"]
 
-    def __get_source_sink_grids(self, phi, model):
-        xsize = model.environments[self.glucose_env_name].xsize
-        ysize = model.environments[self.glucose_env_name].ysize
-        zsize = model.environments[self.glucose_env_name].zsize
-
-        agent_grid = model.environments["agentEnv"].grid
-        phi_tmp = np.reshape(phi._array, (xsize, ysize, zsize))
-
-        source_grid = CellVariable(name="source",
-                                   mesh=Grid3D(dx=1, dy=1, dz=1, nx=xsize,
-                                               ny=ysize, nz=zsize))
-        sink_grid = CellVariable(name="sink",
-                                 mesh=Grid3D(dx=1, dy=1, dz=1, nx=xsize,
-                                             ny=ysize, nz=zsize))
-
-        for coordinate, agents in agent_grid.items():
-            if len(agents) == 0:
-                continue
-
-            concentration_at_pos = phi_tmp[coordinate[0]][coordinate[1]][
-                coordinate[2]]
-
-            # Getting the current sink rate, defined as the sum of the sink
-            # rates of all non-dead and non-quiescent
-            # cancer cells and healthy cells at this position
-            sink_warburg = [a.glucose_uptake_rate for a in agents if
-                            a.__class__.__name__ == self.cancer_cell_name
-                            and not (a.dead or a.quiescent) and
-                            a.warburg_switch]
-            sink_rate_warburg = sum(sink_warburg)
-
-            sink_non_warburg = [a.glucose_uptake_rate for a in agents if
-                                (a.__class__.__name__ == self.cancer_cell_name
-                                 and not (
-                                                a.dead or a.quiescent) and not
-                                 a.warburg_switch) or (
-                                        a.__class__.__name__ ==
-                                        "HealthyCell" and not a.dead)]
-
-            sink_rate_non_warburg = sum(sink_non_warburg)
-
-            # Getting the current source rate, defined as the sum of source
-            # rates of all Tip and Trunk cells at
-            # this position
-            source_rate = sum(
-                [a.glucose_secretion_rate for a in agents if
-                 a.__class__.__name__ in ("TipCell", "TrunkCell")])
-
-            # A pre-estimate of what the concentration at this position will
-            # be. This of course neglects diffusion,
-            # but can give an estimate of how we should regulate our sources
-            # and sinks
-
-            sink_rate = sink_rate_warburg + sink_rate_non_warburg
-            estimated_source = concentration_at_pos + source_rate
-            estimated_concentration = estimated_source - sink_rate
-
-            # If our estimated concentration is greater than our source
-            # rate, this means we really are outputting
-            # too much. At most, we want to achieve equilibrium between
-            # sources and environment, so we reduce our
-            # output rate. Of course, we can't reduce our output rate by
-            # more than the output rate itself
-            if estimated_concentration >= self.base_glucose_secretion_rate:
-                source_rate -= min(source_rate,
-                                   estimated_concentration -
-                                   self.base_glucose_secretion_rate)
-
-            # If our estimate concentration is below zero, then our sinks
-            # should be reduced. We reduce them by the
-            # magnitude of the negative value, but of course we can't reduce
-            # them beyond the original value.
-
-            if estimated_concentration < 0:
-                num_warburg = len(sink_warburg) * 1.
-                num_non_warburg = len(sink_non_warburg) * 1.
-                tot_sink = num_warburg + num_non_warburg * 1.
-                ratio_warburg = num_warburg / tot_sink if tot_sink > 0 else 0.
-
-                if tot_sink > 0:
-                    ratio_non_warburg = 1. * num_non_warburg / tot_sink
-                else:
-                    ratio_non_warburg = 0
-
-                # Sink rates cannot be lower than respective minimum glucose
-                # uptake rates, otherwise this means
-                # we don't have enough glucose and the cell should die. Each
-                # sink will be decreased by the proportion
-                # of negative estimate concentration for which they are
-                # responsible
-                sink_rate_warburg -= min(
-                    sink_rate_warburg - self.max_glucose_uptake_rate *
-                    ratio_warburg,
-                    abs(estimated_concentration) * ratio_warburg)
-                sink_rate_non_warburg -= min(
-                    sink_rate_non_warburg - self.min_glucose_uptake_rate *
-                    ratio_non_warburg,
-                    abs(estimated_concentration) * ratio_non_warburg)
-
-            i = np.ravel_multi_index(
-                [coordinate[0], coordinate[1], coordinate[2]],
-                (xsize, ysize, zsize))
-
-            source_grid.value[i] = source_rate
-            sink_grid.value[i] = sink_rate_non_warburg + sink_rate_warburg
+    def __get_agent_rates(self, model):
+        # Agent rates do not change while the diffusion is being solved,
+        # so they are summed per voxel once per solve.
+        glucose_env = model.environments[self.glucose_env_name]
+        shape = (glucose_env.xsize, glucose_env.ysize, glucose_env.zsize)
+        registry = model.schedule.registry
+
+        # The sink rates are defined as the sum of the sink rates of all
+        # non-dead and non-quiescent cancer cells and healthy cells at each
+        # position
+        cancer_cells = [a for a in registry.get_alive_agents(
+            self.cancer_cell_name) if not a.quiescent]
+        sinks_warburg = [a for a in cancer_cells if a.warburg_switch]
+        sinks_non_warburg = [a for a in cancer_cells
+                             if not a.warburg_switch] + \
+            list(registry.get_alive_agents("HealthyCell"))
+
+        sink_rate_warburg = sum_by_position(
+            sinks_warburg, [a.glucose_uptake_rate for a in sinks_warburg],
+            self.agent_env_name, shape)
+        num_warburg = sum_by_position(
+            sinks_warburg, None, self.agent_env_name, shape)
+        healthy_tissue_env = model.environments[
+            self.healthy_tissue_env_name]
+        cancer_population_env = model.environments[
+            self.cancer_population_env_name]
+        sink_rate_warburg = sink_rate_warburg + \
+            cancer_population_env.get_glucose_sink_rates(True)
+        num_warburg = num_warburg + cancer_population_env.get_alive(True)
+        sink_rate_non_warburg = sum_by_position(
+            sinks_non_warburg,
+            [a.glucose_uptake_rate for a in sinks_non_warburg],
+            self.agent_env_name, shape) + \
+            healthy_tissue_env.get_glucose_sink_rates() + \
+            cancer_population_env.get_glucose_sink_rates(False)
+        num_non_warburg = sum_by_position(
+            sinks_non_warburg, None, self.agent_env_name, shape) + \
+            healthy_tissue_env.alive + cancer_population_env.get_alive(False)
+
+        # The source rate is defined as the sum of source rates of all Tip
+        # and Trunk cells, and static vessels, at each position
+        sources = list(registry.get_agents("TipCell")) + \
+            list(registry.get_agents("TrunkCell"))
+        source_rate = sum_by_position(
+            sources, [a.glucose_secretion_rate for a in sources],
+            self.agent_env_name, shape) + \
+            model.environments[self.vessel_env_name].glucose_source_rates
+
+        return sink_rate_warburg, num_warburg, sink_rate_non_warburg, \
+            num_non_warburg, source_rate
+
+    def __get_source_sink_grids(self, phi, agent_rates, mesh):
+        sink_rate_warburg, num_warburg, sink_rate_non_warburg, \
+            num_non_warburg, source_rate = agent_rates
+
+        concentration_at_pos = phi._array
+
+        # A pre-estimate of what the concentration at each position will
+        # be. This of course neglects diffusion,
+        # but can give an estimate of how we should regulate our sources
+        # and sinks
+
+        sink_rate = sink_rate_warburg + sink_rate_non_warburg
+        estimated_source = concentration_at_pos + source_rate
+        estimated_concentration = estimated_source - sink_rate
+
+        # If our estimated concentration is greater than our source
+        # rate, this means we really are outputting
+        # too much. At most, we want to achieve equilibrium between
+        # sources and environment, so we reduce our
+        # output rate. Of course, we can't reduce our output rate by
+        # more than the output rate itself
+        source = np.where(
+            estimated_concentration >= self.base_glucose_secretion_rate,
+            source_rate - np.minimum(
+                source_rate,
+                estimated_concentration - self.base_glucose_secretion_rate),
+            source_rate)
+
+        # If our estimate concentration is below zero, then our sinks
+        # should be reduced. We reduce them by the
+        # magnitude of the negative value, but of course we can't reduce
+        # them beyond the original value.
+        tot_sink = num_warburg + num_non_warburg
+        has_sink = tot_sink > 0
+        ratio_warburg = np.divide(num_warburg, tot_sink,
+                                  out=np.zeros_like(tot_sink), where=has_sink)
+        ratio_non_warburg = np.divide(num_non_warburg, tot_sink,
+                                      out=np.zeros_like(tot_sink),
+                                      where=has_sink)
+
+        # Sink rates cannot be lower than respective minimum glucose
+        # uptake rates, otherwise this means
+        # we don't have enough glucose and the cell should die. Each
+        # sink will be decreased by the proportion
+        # of negative estimate concentration for which they are
+        # responsible
+        deficit = estimated_concentration < 0
+        sink_warburg = np.where(
+            deficit,
+            sink_rate_warburg - np.minimum(
+                sink_rate_warburg - self.max_glucose_uptake_rate *
+                ratio_warburg,
+                np.abs(estimated_concentration) * ratio_warburg),
+            sink_rate_warburg)
+        sink_non_warburg = np.where(
+            deficit,
+            sink_rate_non_warburg - np.minimum(
+                sink_rate_non_warburg - self.min_glucose_uptake_rate *
+                ratio_non_warburg,
+                np.abs(estimated_concentration) * ratio_non_warburg),
+            sink_rate_non_warburg)
+
+        source_grid = fipy.CellVariable(name="source", mesh=mesh, value=source)
+        sink_grid = fipy.CellVariable(name="sink", mesh=mesh,
+                                      value=sink_non_warburg + sink_warburg)
 
         return source_grid, sink_grid
 
@@ -141,19 +161,21 @@ class GlucoseDiffusionHelper(Helper):
 
         D = self.glucose_diffusion_coeff
 
-        mesh = Grid3D(dx=dx, dy=dy, nx=nx, ny=ny, dz=dz, nz=nz)
+        mesh = fipy.Grid3D(dx=dx, dy=dy, nx=nx, ny=ny, dz=dz, nz=nz)
 
-        phi = CellVariable(name="solutionvariable", mesh=mesh)
+        phi = fipy.CellVariable(name="solutionvariable", mesh=mesh)
         phi.setValue(0.)
 
         start = time.time()
+        agent_rates = self.__get_agent_rates(model)
         for i in range(self.diffusion_solve_iterations):
-            source_grid, sink_grid = self.__get_source_sink_grids(phi, model)
-            eq = TransientTerm() == DiffusionTerm(
+            source_grid, sink_grid = self.__get_source_sink_grids(
+                phi, agent_rates, mesh)
+            eq = fipy.TransientTerm() == fipy.DiffusionTerm(
                 coeff=D) + source_grid - sink_grid
 
             eq.solve(var=phi, dt=1)
-            eq = TransientTerm() == DiffusionTerm(coeff=D)
+            eq = fipy.TransientTerm() == fipy.DiffusionTerm(coeff=D)
 
             eq.solve(var=phi, dt=self.dt)
         end = time.time()
@@ -197,13 +219,20 @@ class GlucoseDiffusionHelper(Helper):
                 # print("Negative positions (Glucose)")
                 # print(negativePositions)
 
+                healthy_tissue_env = model.environments[
+                    self.healthy_tissue_env_name]
+                cancer_population_env = model.environments[
+                    self.cancer_population_env_name]
+
                 for p in negative_positions:
                     p = p[0]
+                    healthy_tissue_env.kill_cells(p)
+                    cancer_population_env.kill_cells(p, "Lack of glucose")
                     for a in [a for a in model.environments["agentEnv"].grid[
                         (p[0], p[1], p[2])] if
                               a.__class__.__name__ in ["HealthyCell",
                                                        "CancerCell"]]:
-                        a.dead = True
+                        model.schedule.registry.mark_dead(a)
 
                         if a.__class__.__name__ == "CancerCell":
                             a.cause_of_death = {
@@ -214,9 +243,4 @@ class GlucoseDiffusionHelper(Helper):
 
                 iteration = iteration + 1
 
-        for x in range(nx):
-            for y in range(ny):
-                for z in range(nz):
-                    model.environments[self.glucose_env_name].grid[(x, y,
-                                                                    z)] = \
-                        cs[x][y][z]
+        model.environments[self.glucose_env_name].set_values(cs)
@@ -0,0 +1,73 @@
+from panaxea.core.Steppables import Helper
+
+from model.utils.GrowthCurve import convert_num_agents_to_volume, \
+    epoch_to_day, get_fitness_function_polynomial
+
+
+class GrowthTargetWatcher(Helper, object):
+    """
+    At each epoch, computes the error between the expected and actual tumour
+    volumes, as get_error_series in ModelErrorFunctions does once a run
+    has finished, and stops runs which can no longer meet the growth
+    target.
+
+    Runs are evaluated by the absolute mean error over all of their epochs,
+    so the absolute errors of the epochs run so far, divided by the number
+    of epochs, are a lower bound of it whatever happens next. Once this
+    exceeds the maximum mean error, the exit flag of the model is set and
+    the reason recorded, so the model is pickled with its partial output.
+
+    Errors and the outcome are saved to model output under the key
+    growthTarget: "errors", "aborted", "abortEpoch" and "abortReason".
+
+    Attributes
+    ----------
+    model : Model
+        The model instance
+    max_mean_error : float
+        The largest absolute mean error, in mm3, of runs meeting the target
+    epoch_duration : float
+        Number of hours per epoch
+    """
+
+    def __init__(self, model, max_mean_error, epoch_duration):
+        self.max_mean_error = max_mean_error
+
+        p = get_fitness_function_polynomial()
+        self.expected_volumes = [p(epoch_to_day(e, epoch_duration))
+                                 for e in range(model.epochs)]
+        self.absolute_error = 0.
+
+        model.output["growthTarget"] = {
+            "errors": [],
+            "aborted": False,
+            "abortEpoch": None,
+            "abortReason": None
+        }
+
+    def step_prologue(self, model):
+        # As for ExitConditionWatcher, this is in the prologue so the
+        # pickler, in the epilogue, captures the state of an aborted run.
+        # Cells are counted in the epilogue, so the counts of all previous
+        # epochs are available.
+        output = model.output["growthTarget"]
+        cancer_cell_nums = model.output["agentNums"]["cancerCells"]
+
+        for e in range(len(output["errors"]), len(cancer_cell_nums)):
+            volume = convert_num_agents_to_volume(cancer_cell_nums[e], 120,
+                                                  5000)
+            error = self.expected_volumes[e] - volume
+            output["errors"].append(error)
+            self.absolute_error += abs(error)
+
+        min_mean_error = self.absolute_error / len(self.expected_volumes)
+
+        if min_mean_error > self.max_mean_error and not output["aborted"]:
+            output["aborted"] = True
+            output["abortEpoch"] = model.current_epoch
+            output["abortReason"] = "The absolute mean error over {0} " \
+                "epochs is at least {1:.2f} mm3, above the maximum of " \
+                "{2:.2f} mm3".format(len(self.expected_volumes),
+                                     min_mean_error, self.max_mean_error)
+            print(output["abortReason"])
+            model.exit = True
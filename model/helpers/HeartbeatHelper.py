@@ -1,6 +1,9 @@
 from panaxea.core.Steppables import Helper
 
-from aws.MessageWriter import write_message_to_queue
+from model.utils.LazyModule import LazyModule
+
+# Only imported (along with boto3) by runs sending heartbeats
+message_writer = LazyModule("aws.MessageWriter")
 
 
 class HeartbeatHelper(Helper):
@@ -14,7 +17,7 @@ class HeartbeatHelper(Helper):
         heartbeat_interval = aws_config["hearbeat_interval"]
 
         if model.current_epoch % heartbeat_interval == 0:
-            write_message_to_queue(
+            message_writer.write_message_to_queue(
                 aws_config["messages_queue"],
                 model.properties["name"],
                 "Heartbeat at epoch {0}".format(str(model.current_epoch)),
@@ -1,12 +1,8 @@
-import matplotlib
-
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-
-plt.switch_backend("agg")
 import numpy as np
 from panaxea.core.Steppables import Helper
 
+from model.utils.GridAggregation import get_occupied_values
+
 
 class OxygenConcentrationWatcher(Helper, object):
     """
@@ -34,30 +30,55 @@ class OxygenConcentrationWatcher(Helper, object):
         self.cancer_cell_name = cancerCellName
         self.agent_env_name = model.properties["envNames"]["agentEnvName"]
         self.oxygen_env_name = model.properties["envNames"]["oxygenEnvName"]
+        self.healthy_tissue_env_name = model.properties["envNames"][
+            "healthyTissueEnvName"]
+        self.cancer_population_env_name = model.properties["envNames"][
+            "cancerPopulationEnvName"]
         self.interval = interval
 
     def step_epilogue(self, model):
 
-        cancerCells = [a for a in model.schedule.agents if (
-                a.__class__.__name__ == self.cancer_cell_name and not a.dead)
-                       or a.__class__.__name__ == "HealthyCell"]
-        if len(cancerCells) > 0:
-            coordinates = [a.environment_positions[self.agent_env_name] for a
-                           in
-                           cancerCells]
-            concentrations = [model.environments[self.oxygen_env_name].grid[c]
-                              for c in coordinates]
+        registry = model.schedule.registry
+        cancerCells = list(
+            registry.get_alive_agents(self.cancer_cell_name)) + list(
+            registry.get_agents("HealthyCell"))
+        coordinates = [a.environment_positions[self.agent_env_name] for a
+                       in
+                       cancerCells]
+        concentrations = [model.environments[self.oxygen_env_name].grid[c]
+                          for c in coordinates]
+        weights = [np.ones(len(concentrations))]
+        concentrations = [np.array(concentrations, dtype=float)]
+
+        # Healthy cells represented as a density field, and cancer cells
+        # represented as populations, are included as if they were agents,
+        # weighting the concentration of each voxel by its number of cells
+        oxygen = model.environments[self.oxygen_env_name].values
+
+        for counts in [
+                model.environments[self.healthy_tissue_env_name].cells,
+                model.environments[
+                    self.cancer_population_env_name].get_alive()]:
+            values, counts = get_occupied_values(oxygen, counts)
+            concentrations.append(values)
+            weights.append(counts)
+
+        concentrations = np.concatenate(concentrations)
+        weights = np.concatenate(weights)
+
+        if len(concentrations) > 0:
             model.output["cancerCellProperties"]["avgOxygen"].append(
-                np.mean(concentrations))
+                np.average(concentrations, weights=weights))
             model.output["cancerCellProperties"]["minOxygen"].append(
-                min(concentrations))
+                concentrations.min())
             model.output["cancerCellProperties"]["maxOxygen"].append(
-                max(concentrations))
+                concentrations.max())
 
             if model.current_epoch % self.interval == 0 or \
                     model.current_epoch \
                     == model.epochs - 1:
-                n, bins, patches = plt.hist(concentrations)
+                n, bins = np.histogram(concentrations, weights=weights)
+                n = n.astype(float)
                 model.output["cancerCellProperties"][
                     "OxygenDistributions"].append(
                     {"n": n, "bins": bins, "epoch": model.current_epoch})
@@ -1,13 +1,22 @@
 import numpy as np
 import time
-from fipy import Grid3D, CellVariable, TransientTerm, DiffusionTerm
 from panaxea.core.Steppables import Helper
 
+from model.utils.GridAggregation import sum_by_position
+from model.utils.LazyModule import LazyModule
+
+fipy = LazyModule("fipy")
+
 
 class OxygenDiffusionHelper(Helper):
     def __init__(self, model, cancerCellName="CancerCell"):
         self.agent_env_name = model.properties["envNames"]["agentEnvName"]
         self.oxygen_env_name = model.properties["envNames"]["oxygenEnvName"]
+        self.healthy_tissue_env_name = model.properties["envNames"][
+            "healthyTissueEnvName"]
+        self.cancer_population_env_name = model.properties["envNames"][
+            "cancerPopulationEnvName"]
+        self.vessel_env_name = model.properties["envNames"]["vesselEnvName"]
         self.oxygen_diffusion_coeff = model.properties["diffusion"][
             "oxygenDiffusivity"]
         self.dt = model.properties["diffusion"]["dt"]
@@ -21,94 +30,84 @@ class OxygenDiffusionHelper(Helper):
             model.properties["agents"]["cancerCells"][
                 "minimumOxygenConcentration"]
 
-    def __get_source_sink_grids(self, phi, model):
-        xsize = model.environments[self.oxygen_env_name].xsize
-        ysize = model.environments[self.oxygen_env_name].ysize
-        zsize = model.environments[self.oxygen_env_name].zsize
-
-        agent_grid = model.environments["agentEnv"].grid
-        phi_tmp = np.reshape(phi._array, (xsize, ysize, zsize))
-
-        source_grid = CellVariable(
-            name="source",
-            mesh=Grid3D(
-                dx=1,
-                dy=1,
-                dz=1,
-                nx=xsize,
-                ny=ysize,
-                nz=zsize)
-        )
-
-        sink_grid = CellVariable(
-            name="sink",
-            mesh=Grid3D(
-                dx=1,
-                dy=1,
-                dz=1,
-                nx=xsize,
-                ny=ysize,
-                nz=zsize)
-        )
-
-        for coordinate, agents in agent_grid.items():
-            if len(agents) == 0:
-                continue
-
-            concentration_at_pos = phi_tmp[coordinate[0]][coordinate[1]][
-                coordinate[2]]
-
-            # Getting the current sink rate, defined as the sum of the sink
-            # rates of all non-dead and non-quiescent
-            # cancer cells and healthy cells at this position
-            sink_rate = sum([a.current_metabolic_rate for a in agents if
-                             (a.__class__.__name__ == "CancerCell"
-                              and not (a.quiescent or a.dead)) or (
-                                     a.__class__.__name__ ==
-                                     "HealthyCell" and not a.dead)])
-
-            # Getting the current source rate, defined as the sum of source
-            # rates of all Tip and Trunk cells at
-            # this position
-            source_rate = sum(
-                [a.oxygen_emission_rate for a in agents if
-                 a.__class__.__name__ in ("TipCell", "TrunkCell")])
-
-            # A pre-estimate of what the concentration at this position will
-            # be. This of course neglects diffusion,
-            # but can give an estimate of how we should regulate our sources
-            # and sinks
-
-            rate_diff = source_rate - sink_rate
-
-            estimated_concentration = concentration_at_pos + rate_diff
-
-            # If our estimated concentration is greater than our source
-            # rate, this means we really are outputting
-            # too much. At most, we want to achieve equilibrium between
-            # sources and environment, so we reduce our
-            # output rate. Of course, we can't reduce our output rate by
-            # more than the output rate itself
-            if estimated_concentration >= self.base_oxygen_emission_rate:
-                source_rate -= min(source_rate,
-                                   estimated_concentration -
-                                   self.base_oxygen_emission_rate)
-
-            # If our estimate concentration is below zero, then our sinks
-            # should be reduced. We reduce them by the
-            # magnitude of the negative value, but of course we can't reduce
-            # them beyond the original value.
-
-            if estimated_concentration < 0:
-                sink_rate -= min(sink_rate - self.minimun_oxygen_cancer_cells,
-                                 abs(estimated_concentration))
-
-            i = np.ravel_multi_index(
-                [coordinate[0], coordinate[1], coordinate[2]],
-                (xsize, ysize, zsize))
-
-            source_grid.value[i] = source_rate
-            sink_grid.value[i] = sink_rate
+    def __get_agent_rates(self, model):
+        # Agent rates do not change while the diffusion is being solved,
+        # so they are summed per voxel once per solve.
+        oxygen_env = model.environments[self.oxygen_env_name]
+        shape = (oxygen_env.xsize, oxygen_env.ysize, oxygen_env.zsize)
+        registry = model.schedule.registry
+
+        # The sink rate is defined as the sum of the sink rates of all
+        # non-dead and non-quiescent cancer cells and healthy cells at each
+        # position
+        sinks = [a for a in registry.get_alive_agents(self.cancer_cell_name)
+                 if not a.quiescent] + \
+            list(registry.get_alive_agents("HealthyCell"))
+        sink_rate = sum_by_position(
+            sinks, [a.current_metabolic_rate for a in sinks],
+            self.agent_env_name, shape) + model.environments[
+            self.healthy_tissue_env_name].get_oxygen_sink_rates() + \
+            model.environments[
+                self.cancer_population_env_name].get_oxygen_sink_rates()
+
+        # The source rate is defined as the sum of source rates of all Tip
+        # and Trunk cells, and static vessels, at each position
+        sources = list(registry.get_agents("TipCell")) + \
+            list(registry.get_agents("TrunkCell"))
+        source_rate = sum_by_position(
+            sources, [a.oxygen_emission_rate for a in sources],
+            self.agent_env_name, shape) + \
+            model.environments[self.vessel_env_name].oxygen_source_rates
+
+        # Only positions holding at least one agent emit or absorb
+        occupied = model.environments[
+            self.agent_env_name].occupancy[:-1] > 0
+
+        return sink_rate, source_rate, occupied
+
+    def __get_source_sink_grids(self, phi, agent_rates, mesh):
+        sink_rate, source_rate, occupied = agent_rates
+
+        concentration_at_pos = phi._array
+
+        # A pre-estimate of what the concentration at each position will
+        # be. This of course neglects diffusion,
+        # but can give an estimate of how we should regulate our sources
+        # and sinks
+
+        rate_diff = source_rate - sink_rate
+
+        estimated_concentration = concentration_at_pos + rate_diff
+
+        # If our estimated concentration is greater than our source
+        # rate, this means we really are outputting
+        # too much. At most, we want to achieve equilibrium between
+        # sources and environment, so we reduce our
+        # output rate. Of course, we can't reduce our output rate by
+        # more than the output rate itself
+        source = np.where(
+            estimated_concentration >= self.base_oxygen_emission_rate,
+            source_rate - np.minimum(
+                source_rate,
+                estimated_concentration - self.base_oxygen_emission_rate),
+            source_rate)
+
+        # If our estimate concentration is below zero, then our sinks
+        # should be reduced. We reduce them by the
+        # magnitude of the negative value, but of course we can't reduce
+        # them beyond the original value.
+        sink = np.where(
+            estimated_concentration < 0,
+            sink_rate - np.minimum(
+                sink_rate - self.minimun_oxygen_cancer_cells,
+                np.abs(estimated_concentration)),
+            sink_rate)
+
+        source[~occupied] = 0
+        sink[~occupied] = 0
+
+        source_grid = fipy.CellVariable(name="source", mesh=mesh, value=source)
+        sink_grid = fipy.CellVariable(name="sink", mesh=mesh, value=sink)
 
         return source_grid, sink_grid
 
@@ -122,19 +121,21 @@ class OxygenDiffusionHelper(Helper):
 
         D = self.oxygen_diffusion_coeff
 
-        mesh = Grid3D(dx=dx, dy=dy, nx=nx, ny=ny, dz=dz, nz=nz)
+        mesh = fipy.Grid3D(dx=dx, dy=dy, nx=nx, ny=ny, dz=dz, nz=nz)
 
-        phi = CellVariable(name="solutionvariable", mesh=mesh)
+        phi = fipy.CellVariable(name="solutionvariable", mesh=mesh)
         phi.setValue(0.)
 
         start = time.time()
+        agent_rates = self.__get_agent_rates(model)
         for _ in range(self.diffusion_solve_iterations):
-            source_grid, sink_grid = self.__get_source_sink_grids(phi, model)
-            eq = TransientTerm() == DiffusionTerm(
+            source_grid, sink_grid = self.__get_source_sink_grids(
+                phi, agent_rates, mesh)
+            eq = fipy.TransientTerm() == fipy.DiffusionTerm(
                 coeff=D) + source_grid - sink_grid
 
             eq.solve(var=phi, dt=1)
-            eq = TransientTerm() == DiffusionTerm(coeff=D)
+            eq = fipy.TransientTerm() == fipy.DiffusionTerm(coeff=D)
 
             eq.solve(var=phi, dt=self.dt)
         end = time.time()
@@ -177,13 +178,20 @@ class OxygenDiffusionHelper(Helper):
                 # print("Negative positions (Oxygen)")
                 # print(negativePositions)
 
+                healthy_tissue_env = model.environments[
+                    self.healthy_tissue_env_name]
+                cancer_population_env = model.environments[
+                    self.cancer_population_env_name]
+
                 for p in negative_positions:
                     p = p[0]
+                    healthy_tissue_env.kill_cells(p)
+                    cancer_population_env.kill_cells(p, "Lack of oxygen")
                     for a in [a for a in model.environments["agentEnv"].grid[
                         (p[0], p[1], p[2])] if
                               a.__class__.__name__ in ["HealthyCell",
                                                        "CancerCell"]]:
-                        a.dead = True
+                        model.schedule.registry.mark_dead(a)
 
                         if a.__class__.__name__ == "CancerCell":
                             a.cause_of_death = {
@@ -194,9 +202,4 @@ class OxygenDiffusionHelper(Helper):
 
                 iteration = iteration + 1
 
-        for x in range(nx):
-            for y in range(ny):
-                for z in range(nz):
-                    model.environments[self.oxygen_env_name].grid[(x, y,
-                                                                   z)] = \
-                        cs[x][y][z]
+        model.environments[self.oxygen_env_name].set_values(cs)
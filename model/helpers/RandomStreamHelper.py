@@ -0,0 +1,26 @@
+from panaxea.core.Steppables import Helper
+
+
+class RandomStreamHelper(Helper, object):
+    """
+    At the start of each epoch, pre-draws in a single call the uniform
+    variates the agents are expected to need over the epoch from the random
+    stream of the model. Should the estimate fall short, the stream draws
+    further blocks as needed.
+
+    Attributes
+    ----------
+    draws_per_agent : int, optional
+        The expected number of variates drawn by each stepped agent over an
+        epoch. Defaults to 1, as a cancer cell draws one variate to leave G1
+        and, when dividing, one for the warburg switch age of each of the
+        two resulting cells. Inert agents (Eg: healthy cells) and dead ones
+        are not stepped, so are not counted.
+    """
+
+    def __init__(self, draws_per_agent=1):
+        self.draws_per_agent = draws_per_agent
+
+    def step_prologue(self, model):
+        model.random_stream.refill(
+            self.draws_per_agent * len(model.schedule.active_agents))
@@ -0,0 +1,157 @@
+import numpy as np
+from panaxea.core.Steppables import Helper
+
+
+class TipCellSproutingHelper(Helper, object):
+    """
+    Carries out the sprouting of all tip cells in one batched pass, in place
+    of the per-agent logic in TipCell.step_main. Tip cells should be created
+    with batchedSprouting enabled in the engine properties, so they do not
+    also sprout on their own.
+
+    Each epoch, tip cells which are old enough and stimulated by VEGF are
+    selected together. VEGF and occupancy over their moore neighbourhoods are
+    gathered as arrays and each tip cell moves to the neighbour with the
+    highest VEGF concentration which is below the maximum agent density,
+    ties being broken at random.
+
+    Attributes
+    ----------
+    model : Model
+        The model instance
+    sequential : bool, optional
+        If true, tip cells claim their targets one after the other, so a
+        voxel filled by a tip cell is no longer available to the following
+        ones, as when each tip cell sprouts in its own step. If false, tip
+        cells claim their targets simultaneously; where more tip cells want a
+        voxel than it has room for, the first ones get it and the others pick
+        again among their remaining neighbours. Defaults to true.
+    tip_cell_class_name : string, optional
+        The name of the tip cell class, defaults to TipCell
+    """
+
+    def __init__(self, model, sequential=True, tip_cell_class_name="TipCell"):
+        self.sequential = sequential
+        self.tip_cell_class_name = tip_cell_class_name
+        self.agent_env_name = model.properties["envNames"]["agentEnvName"]
+        self.vegf_env_name = model.properties["envNames"]["vegfEnvName"]
+        self.max_agent_density = model.properties["maxAgentDensity"]
+
+        endothelial_cells_properties = model.properties["agents"][
+            "endothelialCells"]
+        self.minimum_vegf_concentration = endothelial_cells_properties[
+            "minimumVegfConcentration"]
+        self.division_delay = endothelial_cells_properties["divisionDelay"]
+
+    def step_main(self, model):
+        tip_cells = list(model.schedule.registry.get_agents(
+            self.tip_cell_class_name))
+
+        if len(tip_cells) == 0:
+            return
+
+        agent_env = model.environments[self.agent_env_name]
+        vegf = model.environments[self.vegf_env_name].values
+
+        ages = np.minimum(self.division_delay,
+                          np.array([t.cell_age for t in tip_cells]) + 1)
+        positions = np.array([agent_env.get_index(
+            t.environment_positions[self.agent_env_name]) for t in tip_cells])
+
+        taf = vegf[positions]
+        sprouting = (taf >= self.minimum_vegf_concentration) & \
+            (ages == self.division_delay) & \
+            (10. * model.random_stream.random_array(len(tip_cells)) < taf)
+
+        ages[sprouting] = 0
+        for t, age in zip(tip_cells, ages):
+            t.cell_age = int(age)
+
+        sprouting = np.flatnonzero(sprouting)
+
+        if len(sprouting) == 0:
+            return
+
+        targets = self.__rank_targets(model.random_stream, agent_env, vegf,
+                                      positions[sprouting])
+
+        if self.sequential:
+            new_positions = self.__claim_sequentially(agent_env, targets)
+        else:
+            new_positions = self.__claim_simultaneously(agent_env, targets)
+
+        for i, new_pos in zip(sprouting, new_positions):
+            if new_pos is not None:
+                tip_cells[i].sprout_(agent_env.get_position(new_pos), model)
+
+    def __rank_targets(self, random_stream, agent_env, vegf, positions):
+        # Returns, for each position, its neighbours sorted by decreasing
+        # VEGF concentration. Neighbours are shuffled before the stable sort
+        # so that ties are broken at random; neighbours outside the grid
+        # point to the trailing slot of the occupancy array and sort last.
+        neighbours = agent_env.moore_neighbours[positions]
+        shuffled = np.argsort(random_stream.random_array(neighbours.shape),
+                              axis=1)
+        neighbours = np.take_along_axis(neighbours, shuffled, axis=1)
+
+        neighbour_vegf = np.append(vegf, -np.inf)[neighbours]
+        order = np.argsort(-neighbour_vegf, axis=1, kind="stable")
+
+        return np.take_along_axis(neighbours, order, axis=1)
+
+    def __claim_sequentially(self, agent_env, targets):
+        new_positions = []
+
+        for ranked in targets:
+            # Masked argmax: the first ranked neighbour with room left
+            free = agent_env.occupancy[ranked] < self.max_agent_density
+
+            if free.any():
+                new_pos = ranked[np.argmax(free)]
+                # Claiming the target, as the tip cells are only moved
+                # after all targets have been picked
+                agent_env.occupancy[new_pos] += 1
+                new_positions.append(new_pos)
+            else:
+                new_positions.append(None)
+
+        for new_pos in new_positions:
+            if new_pos is not None:
+                agent_env.occupancy[new_pos] -= 1
+
+        return new_positions
+
+    def __claim_simultaneously(self, agent_env, targets):
+        num_tips = len(targets)
+        new_positions = [None] * num_tips
+        occupancy = agent_env.occupancy.copy()
+        pending = np.arange(num_tips)
+
+        while len(pending) > 0:
+            ranked = targets[pending]
+            free = occupancy[ranked] < self.max_agent_density
+            has_target = free.any(axis=1)
+            pending = pending[has_target]
+
+            if len(pending) == 0:
+                break
+
+            wanted = ranked[has_target, np.argmax(free[has_target], axis=1)]
+
+            # Each wanted voxel is given to as many of the tip cells
+            # wanting it as it has room for, in tip cell order. The others
+            # try again with the voxel now full.
+            order = np.argsort(wanted, kind="stable")
+            wanted_sorted = wanted[order]
+            first = np.searchsorted(wanted_sorted, wanted_sorted)
+            rank_in_voxel = np.arange(len(wanted_sorted)) - first
+            room = self.max_agent_density - occupancy[wanted_sorted]
+            granted = order[rank_in_voxel < room]
+
+            for i in granted:
+                new_positions[pending[i]] = wanted[i]
+
+            np.add.at(occupancy, wanted[granted], 1)
+            pending = np.setdiff1d(pending, pending[granted])
+
+        return new_positions
@@ -1,5 +1,6 @@
 from cmath import sqrt
 
+import numpy as np
 from panaxea.core.Steppables import Helper
 
 
@@ -13,15 +14,26 @@ class TumourVolumeWatcher(Helper, object):
 
     def __init__(self, model, cancer_cell_class_name="CancerCell"):
         self.agent_env_name = model.properties["envNames"]["agentEnvName"]
+        self.cancer_population_env_name = model.properties["envNames"][
+            "cancerPopulationEnvName"]
         self.cancer_cell_class_name = cancer_cell_class_name
 
         model.output["maxDistances"] = []
 
     def step_epilogue(self, model):
         cancer_cells_coords = [a.environment_positions[self.agent_env_name]
-                               for a in model.schedule.agents
-                               if a.__class__.__name__ ==
-                               self.cancer_cell_class_name]
+                               for a in model.schedule.registry.get_agents(
+                                   self.cancer_cell_class_name)]
+
+        # Voxels holding cancer cells represented as populations, live or
+        # dead
+        cancer_population_env = model.environments[
+            self.cancer_population_env_name]
+        cancer_cells_coords.extend(
+            tuple(int(i) for i in c) for c in np.argwhere(np.reshape(
+                cancer_population_env.get_total(),
+                cancer_population_env.shape) > 0))
+
         scored_coords = [(sum(c), c) for c in cancer_cells_coords]
 
         def f(c):
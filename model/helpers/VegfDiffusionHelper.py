@@ -1,13 +1,21 @@
 import numpy as np
 import time
-from fipy import Grid3D, CellVariable, TransientTerm, DiffusionTerm
 from panaxea.core.Steppables import Helper
 
+from model.utils.GridAggregation import sum_by_position
+from model.utils.LazyModule import LazyModule
+
+fipy = LazyModule("fipy")
+
 
 class VegfDiffusionHelper(Helper):
     def __init__(self, model, cancerCellName="CancerCell"):
         self.agent_env_name = model.properties["envNames"]["agentEnvName"]
         self.vegf_env_name = model.properties["envNames"]["vegfEnvName"]
+        self.healthy_tissue_env_name = model.properties["envNames"][
+            "healthyTissueEnvName"]
+        self.cancer_population_env_name = model.properties["envNames"][
+            "cancerPopulationEnvName"]
         self.vegf_diffusion_coeff = model.properties["diffusion"][
             "vegfDiffusivity"]
         self.dt = model.properties["diffusion"]["dt"]
@@ -17,58 +25,42 @@ class VegfDiffusionHelper(Helper):
         self.max_vegf = model.properties["agents"]["cancerCells"][
             "maxVegfSecretionRate"]
 
-    def __get_source_sink_grids(self, phi, model):
-        xsize = model.environments[self.vegf_env_name].xsize
-        ysize = model.environments[self.vegf_env_name].ysize
-        zsize = model.environments[self.vegf_env_name].zsize
-
-        agent_grid = model.environments["agentEnv"].grid
-        phi_tmp = np.reshape(phi._array, (xsize, ysize, zsize))
-
-        source_grid = CellVariable(
-            name="source",
-            mesh=Grid3D(
-                dx=1,
-                dy=1,
-                dz=1,
-                nx=xsize,
-                ny=ysize,
-                nz=zsize)
-        )
-
-        for coordinate, agents in agent_grid.items():
-            if len(agents) == 0:
-                continue
-
-            concentration_at_pos = phi_tmp[coordinate[0]][coordinate[1]][
-                coordinate[2]]
-
-            source_rate = sum([a.current_vegf_secretion_rate for a in agents if
-                               (a.__class__.__name__ == "CancerCell"
-                                and not (a.quiescent or a.dead))])
-            # A pre-estimate of what the concentration at this position will
-            # be. This of course neglects diffusion,
-            # but can give an estimate of how we should regulate our sources
-            # and sinks
-            estimated_concentration = concentration_at_pos + source_rate
-
-            # If our estimated concentration is greater than our maximum
-            # source rate, this means we really are outputting
-            # too much. At most, we want to achieve equilibrium between
-            # sources and environment, so we reduce our
-            # output rate. Of course, we can't reduce our output rate by
-            # more than the output rate itself
-            if estimated_concentration >= self.max_vegf:
-                source_rate -= min(source_rate,
-                                   estimated_concentration - self.max_vegf)
-
-            i = np.ravel_multi_index(
-                [coordinate[0], coordinate[1], coordinate[2]],
-                (xsize, ysize, zsize))
-
-            source_grid.value[i] = source_rate
-
-        return source_grid
+    def __get_agent_rates(self, model):
+        # Agent rates do not change while the diffusion is being solved,
+        # so they are summed per voxel once per solve.
+        vegf_env = model.environments[self.vegf_env_name]
+        shape = (vegf_env.xsize, vegf_env.ysize, vegf_env.zsize)
+
+        sources = [a for a in model.schedule.registry.get_alive_agents(
+            self.cancer_cell_name) if not a.quiescent]
+
+        return sum_by_position(
+            sources, [a.current_vegf_secretion_rate for a in sources],
+            self.agent_env_name, shape) + model.environments[
+            self.cancer_population_env_name].get_vegf_source_rates()
+
+    def __get_source_sink_grids(self, phi, source_rate, mesh):
+        concentration_at_pos = phi._array
+
+        # A pre-estimate of what the concentration at each position will
+        # be. This of course neglects diffusion,
+        # but can give an estimate of how we should regulate our sources
+        # and sinks
+        estimated_concentration = concentration_at_pos + source_rate
+
+        # If our estimated concentration is greater than our maximum
+        # source rate, this means we really are outputting
+        # too much. At most, we want to achieve equilibrium between
+        # sources and environment, so we reduce our
+        # output rate. Of course, we can't reduce our output rate by
+        # more than the output rate itself
+        source = np.where(
+            estimated_concentration >= self.max_vegf,
+            source_rate - np.minimum(source_rate,
+                                     estimated_concentration - self.max_vegf),
+            source_rate)
+
+        return fipy.CellVariable(name="source", mesh=mesh, value=source)
 
     def __solve_diffusion(self, model):
         vegf_grid = model.environments[self.vegf_env_name]
@@ -80,18 +72,20 @@ class VegfDiffusionHelper(Helper):
 
         D = self.vegf_diffusion_coeff
 
-        mesh = Grid3D(dx=dx, dy=dy, nx=nx, ny=ny, dz=dz, nz=nz)
+        mesh = fipy.Grid3D(dx=dx, dy=dy, nx=nx, ny=ny, dz=dz, nz=nz)
 
-        phi = CellVariable(name="solutionvariable", mesh=mesh)
+        phi = fipy.CellVariable(name="solutionvariable", mesh=mesh)
         phi.setValue(0.)
 
         start = time.time()
+        source_rate = self.__get_agent_rates(model)
         for i in range(self.diffusion_solve_iterations):
-            source_grid = self.__get_source_sink_grids(phi, model)
-            eq = TransientTerm() == DiffusionTerm(coeff=D) + source_grid
+            source_grid = self.__get_source_sink_grids(phi, source_rate, mesh)
+            eq = fipy.TransientTerm() == \
+                fipy.DiffusionTerm(coeff=D) + source_grid
 
             eq.solve(var=phi, dt=1)
-            eq = TransientTerm() == DiffusionTerm(coeff=D)
+            eq = fipy.TransientTerm() == fipy.DiffusionTerm(coeff=D)
 
             eq.solve(var=phi, dt=self.dt)
         end = time.time()
@@ -134,13 +128,20 @@ class VegfDiffusionHelper(Helper):
                 # print("Negative positions (Oxygen)")
                 # print(negativePositions)
 
+                healthy_tissue_env = model.environments[
+                    self.healthy_tissue_env_name]
+                cancer_population_env = model.environments[
+                    self.cancer_population_env_name]
+
                 for p in negative_positions:
                     p = p[0]
+                    healthy_tissue_env.kill_cells(p)
+                    cancer_population_env.kill_cells(p, "Lack of oxygen")
                     for a in [a for a in model.environments["agentEnv"].grid[
                         (p[0], p[1], p[2])] if
                               a.__class__.__name__ in ["HealthyCell",
                                                        "CancerCell"]]:
-                        a.dead = True
+                        model.schedule.registry.mark_dead(a)
 
                         if a.__class__.__name__ == "CancerCell":
                             a.cause_of_death = {
@@ -151,8 +152,4 @@ class VegfDiffusionHelper(Helper):
 
                 iteration = iteration + 1
 
-        for x in range(nx):
-            for y in range(ny):
-                for z in range(nz):
-                    model.environments[self.vegf_env_name].grid[(x, y, z)] = \
-                        cs[x][y][z]
+        model.environments[self.vegf_env_name].set_values(cs)
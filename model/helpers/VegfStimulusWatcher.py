@@ -15,9 +15,9 @@ class VegfStimulusWatcher(Helper, object):
         self.vegf_env_name = model.properties["envNames"]["vegfEnvName"]
 
     def step_epilogue(self, model):
-        edothelial_cells = [a for a in model.schedule.agents
-                            if a.__class__.__name__ in
-                            self.endothelial_cell_names]
+        edothelial_cells = [a for name in self.endothelial_cell_names
+                            for a in
+                            model.schedule.registry.get_agents(name)]
         coordinates = [a.environment_positions[self.agent_env_name] for a in
                        edothelial_cells]
         concentrations = [model.environments[self.vegf_env_name].grid[c]
@@ -1,28 +1,47 @@
-from panaxea.core.Environment import ObjectGrid3D, NumericalGrid3D
+import numpy as np
 from panaxea.core.Model import Model
 from panaxea.toolkit.Toolkit import ModelPicklerLite
-from random import randint
 
 from model.agents.CancerCell import CancerCell
 from model.agents.EndothelialCell import TipCell
 from model.agents.HealthyCell import HealthyCell
+from model.core.AgentFactory import AgentFactory
+from model.core.CancerCellPopulationGrid3D import CancerCellPopulationGrid3D
+from model.core.HealthyTissueGrid3D import HealthyTissueGrid3D
+from model.core.IndexedSchedule import IndexedSchedule
+from model.core.LayoutCache import LayoutCache
+from model.core.NumericalArrayGrid3D import NumericalArrayGrid3D
+from model.core.OccupancyGrid3D import OccupancyGrid3D
+from model.core.RandomStream import RandomStream
+from model.core.VesselGrid3D import VesselGrid3D
 from model.helpers.AgentCounter import AgentCounter
 from model.helpers.HeartbeatHelper import HeartbeatHelper
+from model.helpers.CancerCellCycleHelper import CancerCellCycleHelper
+from model.helpers.CancerCellPopulationHelper import \
+    CancerCellPopulationHelper
 from model.helpers.CancerCellWatcher import CancerCellWatcher
 from model.helpers.DeathCauseWatcher import DeathCauseWatcher
 from model.helpers.ExitConditionWatcher import ExitConditionWatcher
 from model.helpers.GlucoseConcentrationWatcher import \
     GlucoseConcentrationWatcher
 from model.helpers.GlucoseDiffusionHelper import GlucoseDiffusionHelper
+from model.helpers.GrowthTargetWatcher import GrowthTargetWatcher
 from model.helpers.OxygenConcentrationWatcher import OxygenConcentrationWatcher
 from model.helpers.OxygenDiffusionHelper import OxygenDiffusionHelper
+from model.helpers.RandomStreamHelper import RandomStreamHelper
+from model.helpers.TipCellSproutingHelper import TipCellSproutingHelper
 from model.helpers.TumourVolumeWatcher import TumourVolumeWatcher
 from model.helpers.VegfDiffusionHelper import VegfDiffusionHelper
 from model.helpers.VegfStimulusWatcher import VegfStimulusWatcher
-from model.utils.OxygenHIFRelationsGenerator import OxygenHIFRelationsGenerator
+from model.utils.GarbageCollection import paused_collection
+from model.utils.HifRelationsCache import HifRelationsCache
 
+# Coefficients of HIF relations are shared by all properties generated in
+# this process
+hif_relations_cache = HifRelationsCache()
 
-def generate_properties(p):
+
+def generate_properties(p, hif_relations=hif_relations_cache):
     """
     Given a dictionary of parameter values, converts these to a dictionary
     object with with the structure expected by our model implementation,
@@ -34,6 +53,9 @@ def generate_properties(p):
     p : dict
         The properties dictionary where key/value paris should be as obtained
         from the csv file
+    hif_relations : HifRelationsCache, optional
+        The cache coefficients of HIF relations are taken from. Defaults to
+        a cache shared by all properties generated in this process.
 
     Returns
     -------
@@ -59,6 +81,9 @@ def generate_properties(p):
     env_names["vegfEnvName"] = "vegfEnv"
     env_names["glucoseEnvName"] = "glucoseEnv"
     env_names["drugEnvName"] = "drugEnv"
+    env_names["healthyTissueEnvName"] = "healthyTissueEnv"
+    env_names["vesselEnvName"] = "vesselEnv"
+    env_names["cancerPopulationEnvName"] = "cancerPopulationEnv"
 
     properties["envNames"] = env_names
 
@@ -85,17 +110,8 @@ def generate_properties(p):
         "hypoxic": p["hypoxicThreshold"]
     }
 
-    ohrg = OxygenHIFRelationsGenerator(
-        min_hif=p["minHIF"],
-        max_hif=p["maxHIF"],
-        ultra_hypoxia_threshold=p["ultraHypoxicThreshold"],
-        hypoxia_threshold=p["hypoxicThreshold"],
-        enhanced_hypoxic_threshold=p["enhancedHypoxicThreshold"],
-        base_oxygen_metabolic_rate=p["baseOxygenMetabolicRate"],
-        min_p_synthesis=p["minPSynthesis"])
-
-    ultra_hypoxia_coeffs, hypoxia_coeffs = ohrg.get_oxygen_to_hif()
-    warburg_hypoxic_coeffs = ohrg.get_oxygen_to_hif_warburg()
+    relations = hif_relations.get(p)
+
     cancer_cells["pWarburgSwitch"] = p["pWarburgSwitch"]
     cancer_cells["baseHifRate"] = p["baseHifRate"]
     cancer_cells["minGlucoseUptakeRate"] = p["minGlucoseUptakeRate"]
@@ -105,19 +121,20 @@ def generate_properties(p):
     cancer_cells["minHIF"] = p["minHIF"]
 
     cancer_cells["oxygenToHifCoeffs"] = {
-        "hypoxic": hypoxia_coeffs,
-        "warburg": warburg_hypoxic_coeffs,
-        "ultraHypoxic": ultra_hypoxia_coeffs
+        "hypoxic": relations["hypoxic"],
+        "warburg": relations["warburg"],
+        "ultraHypoxic": relations["ultraHypoxic"]
     }
 
-    cancer_cells["hifToMetabolicRateCoeffs"] = ohrg.get_hif_to_metabolic_rate()
+    cancer_cells["hifToMetabolicRateCoeffs"] = relations["hifToMetabolicRate"]
 
     # Minimum probability of progressing into synthesis
     cancer_cells["minPSynthesis"] = p["minPSynthesis"]
-    cancer_cells[
-        "hifToProliferationRateCoeffs"] = ohrg.get_hif_to_p_synthesis()
+    cancer_cells["hifToProliferationRateCoeffs"] = relations[
+        "hifToProliferationRate"]
 
-    cancer_cells["hifToVegfSecretionRateCoeffs"] = ohrg.get_hif_to_vegf()
+    cancer_cells["hifToVegfSecretionRateCoeffs"] = relations[
+        "hifToVegfSecretionRate"]
 
     # Minimum oxygen concentration for survival
     cancer_cells["minimumOxygenConcentration"] = p[
@@ -156,10 +173,59 @@ def generate_properties(p):
 
     properties["diffusion"] = diffusion
 
+    # Seed of the random stream of the model. If missing (or empty in the
+    # csv file), a seed is drawn when the model is generated and recorded
+    # here.
+    seed = p.get("seed")
+    properties["seed"] = None if seed is None or seed != seed else int(seed)
+
+    # Optionally, runs are stopped early once their absolute mean error
+    # against the expected growth curve is certain to exceed maxMeanError
+    # (in mm3). Disabled if missing.
+    max_mean_error = p.get("maxMeanError")
+    properties["growthTarget"] = {
+        "maxMeanError": None if max_mean_error is None or
+        max_mean_error != max_mean_error else float(max_mean_error),
+        "epochDuration": p.get("epochDuration", 2)
+    }
+
+    # Optional settings selecting alternative implementations of parts of
+    # the model. Defaults reproduce the original per-agent behaviour.
+    engine = dict()
+
+    # If true, tip cells sprout in a single batched pass rather than each
+    # in its own step
+    engine["batchedSprouting"] = p.get("batchedSprouting", False)
+    # If true, conflicts in the batched pass are resolved as if tip cells
+    # sprouted one after the other, otherwise tip cells claim their targets
+    # simultaneously
+    engine["sequentialSprouting"] = p.get("sequentialSprouting", True)
+    # If true, healthy tissue is represented as a density field rather than
+    # as HealthyCell agents
+    engine["healthyTissueField"] = p.get("healthyTissueField", False)
+    # If true, sprouting tip cells lay down static vessel segments rather
+    # than TrunkCell agents
+    engine["staticVessels"] = p.get("staticVessels", False)
+    # If true, cancer cells are stepped by a batched helper, their cell
+    # cycle being driven by events on a timing wheel
+    engine["eventDrivenCellCycle"] = p.get("eventDrivenCellCycle", False)
+    # If true, agents are stepped in the Morton order of their positions
+    # rather than in the order they were created
+    engine["spatialOrdering"] = p.get("spatialOrdering", False)
+    # If true, cancer cells are represented as populations per voxel and
+    # stepped by compartment, rather than as CancerCell agents
+    engine["cancerCellPopulation"] = p.get("cancerCellPopulation", False)
+
+    properties["engine"] = engine
+
     return properties
 
 
-def generate_model(properties, numEpochs):
+# Initial layouts are shared by all models generated in this process
+layout_cache = LayoutCache()
+
+
+def generate_model(properties, numEpochs, layouts=layout_cache):
     """
     Generates and sets up a model object for warburg investigation. Includes
     assigning properties, instantiating agents and environments, etc.
@@ -171,6 +237,9 @@ def generate_model(properties, numEpochs):
         generate_properties function
     numEpochs : number
         Number of epochs the model should run for
+    layouts : LayoutCache, optional
+        The cache the initial layout of the model is taken from. Defaults to
+        a cache shared by all models generated in this process.
 
     Returns
     -------
@@ -179,88 +248,166 @@ def generate_model(properties, numEpochs):
     """
 
     model = Model(numEpochs)
-
     model.properties = properties
 
+    # Agents of these classes have no behaviour of their own, so are not
+    # stepped. Tip cells and cancer cells are inert when stepped by batched
+    # helpers.
+    inert_agent_classes = ["HealthyCell", "TrunkCell"]
+
+    if model.properties["engine"]["batchedSprouting"]:
+        inert_agent_classes.append("TipCell")
+
+    if model.properties["engine"]["eventDrivenCellCycle"]:
+        inert_agent_classes.append("CancerCell")
+
+    spatial_ordering_env = None
+
+    if model.properties["engine"]["spatialOrdering"]:
+        spatial_ordering_env = model.properties["envNames"]["agentEnvName"]
+
+    model.schedule = IndexedSchedule(inert_agent_classes,
+                                     spatial_ordering_env)
+
+    # All random decisions of the model are drawn from this stream, so runs
+    # with the same seed are identical
+    model.random_stream = RandomStream(model.properties["seed"])
+    model.properties["seed"] = model.random_stream.seed
+
+    # Newborn cancer cells are copied from a template rather than constructed
+    model.cancer_cell_factory = AgentFactory(CancerCell)
+
     xsize = ysize = zsize = model.properties["envSize"]
+    layout = layouts.get(model.properties)
 
     # Adding environments
-    ObjectGrid3D(
+    OccupancyGrid3D(
         model.properties["envNames"]["agentEnvName"],
-        xsize, ysize, zsize, model)
-    NumericalGrid3D(
+        xsize, ysize, zsize, model, model.random_stream,
+        layout.moore_neighbours)
+    NumericalArrayGrid3D(
         model.properties["envNames"]["oxygenEnvName"],
         xsize,
         ysize,
         zsize,
         model)
-    NumericalGrid3D(
+    NumericalArrayGrid3D(
         model.properties["envNames"]["vegfEnvName"],
         xsize,
         ysize,
         zsize,
         model)
-    NumericalGrid3D(
+    NumericalArrayGrid3D(
         model.properties["envNames"]["glucoseEnvName"],
         xsize,
         ysize,
         zsize,
         model)
-    NumericalGrid3D(
+    NumericalArrayGrid3D(
         model.properties["envNames"]["drugEnvName"],
         xsize,
         ysize,
         zsize,
         model)
+    # Left empty unless healthy tissue is represented as a density field
+    healthy_tissue_env = HealthyTissueGrid3D(
+        model.properties["envNames"]["healthyTissueEnvName"],
+        xsize,
+        ysize,
+        zsize,
+        model)
+    # Left empty unless trunk vessels are represented as a static field
+    VesselGrid3D(
+        model.properties["envNames"]["vesselEnvName"],
+        xsize,
+        ysize,
+        zsize,
+        model)
+    # Left empty unless cancer cells are represented as populations
+    cancer_population_env = CancerCellPopulationGrid3D(
+        model.properties["envNames"]["cancerPopulationEnvName"],
+        xsize,
+        ysize,
+        zsize,
+        model)
 
-    hc = 0
-    tc = 0
-    tic = 0
-    # Adding agents
-
-    for x in range(xsize):
-        for y in range(ysize):
-            for z in range(zsize):
-                if x % 2 == z % 2:
-                    agent = HealthyCell(model)
-                    hc += 1
-                    agent.add_agent_to_grid(model.properties["envNames"][
-                                                "agentEnvName"], (x, y, z),
-                                            model)
-                    model.schedule.agents.add(agent)
-                else:
-                    for _ in range(model.properties["initialAgentSetup"][
-                                       "numEndothelialCells"]):
-                        agent = TipCell(model)
-                        tic += 1
-                        agent.add_agent_to_grid(model.properties["envNames"][
-                                                    "agentEnvName"], (x, y, z),
-                                                model)
-                        model.schedule.agents.add(agent)
-
-    print("hc %s tc %s tic %s" % (hc, tc, tic))
+    agent_env = model.environments[
+        model.properties["envNames"]["agentEnvName"]]
+    shape = agent_env.shape
 
-    for _ in range(model.properties["initialAgentSetup"]["numCancerCells"]):
-        for x in range(8, 12):
-            for y in range(8, 12):
-                for z in range(8, 12):
-                    c = CancerCell(model)
+    # Adding agents. Their positions are taken from the layout template,
+    # and agents are inserted into the grid and schedule in bulk.
+    healthy_indices = layout.healthy_indices
+    tip_indices = layout.tip_indices
+    seed_indices = layout.seed_indices
 
-                    state = ["G1", "S", "G2", "M"][randint(0, 3)]
-                    state_length = \
-                        model.properties["agents"]["baseCellCycleLength"][
-                            state]
-                    progress_in_state = randint(0, state_length - 1)
+    hc = len(healthy_indices)
+    tc = 0
+    tic = len(tip_indices)
+
+    # Agents are created with the garbage collector paused, as none of them
+    # is garbage
+    with paused_collection():
+        if model.properties["engine"]["healthyTissueField"]:
+            healthy_positions = np.column_stack(
+                np.unravel_index(healthy_indices, shape))
+            healthy_tissue_env.add_cells(
+                healthy_positions,
+                model.properties["agents"]["healthyTissues"][
+                    "oxygenUptakeRate"],
+                model.properties["agents"]["cancerCells"][
+                    "minGlucoseUptakeRate"])
+            agent_env.occupy(healthy_positions)
+        else:
+            healthy_cells = AgentFactory(HealthyCell).get_many(model, hc)
+            agent_env.add_agents(healthy_cells, healthy_indices)
+            model.schedule.add_agents(healthy_cells)
+
+        tip_cells = AgentFactory(TipCell).get_many(model, tic)
+        agent_env.add_agents(tip_cells, tip_indices)
+        model.schedule.add_agents(tip_cells)
 
-                    c.current_state = state
-                    c.progress_in_state = progress_in_state
+    print("hc %s tc %s tic %s" % (hc, tc, tic))
 
-                    c.add_agent_to_grid(model.properties["envNames"][
-                                            "agentEnvName"], (x, y, z), model)
-                    model.schedule.agents.add(c)
+    cancer_cell_population = \
+        model.properties["engine"]["cancerCellPopulation"]
+    cycle_length = model.properties["agents"]["baseCellCycleLength"]
+    cancer_cells = []
+    states = []
+    progresses = []
+
+    for _ in range(len(seed_indices)):
+        # Cells are created before their state is drawn, as they draw their
+        # warburg switch age on creation
+        if not cancer_cell_population:
+            cancer_cells.append(model.cancer_cell_factory.get(model))
+
+        state = ["G1", "S", "G2", "M"][model.random_stream.randrange(4)]
+        states.append(state)
+        progresses.append(model.random_stream.randrange(cycle_length[state]))
+
+    if cancer_cell_population:
+        states = np.array(states)
+        progresses = np.array(progresses, dtype=np.int64)
+
+        for phase in cancer_population_env.phases:
+            in_phase = states == phase
+            cancer_population_env.add_cells(
+                seed_indices[in_phase], phase, progresses[in_phase])
+
+        agent_env.occupy(np.column_stack(
+            np.unravel_index(seed_indices, shape)))
+    else:
+        for c, state, progress in zip(cancer_cells, states, progresses):
+            c.current_state = state
+            c.progress_in_state = progress
+
+        agent_env.add_agents(cancer_cells, seed_indices)
+        model.schedule.add_agents(cancer_cells)
 
     # Adding helpers
     model.schedule.helpers.append(HeartbeatHelper())
+    model.schedule.helpers.append(RandomStreamHelper())
 
     model.schedule.helpers.append(GlucoseDiffusionHelper(model))
 
@@ -268,6 +415,17 @@ def generate_model(properties, numEpochs):
     model.schedule.helpers.append(odh)
     model.schedule.helpers.append(VegfDiffusionHelper(model))
 
+    if model.properties["engine"]["batchedSprouting"]:
+        model.schedule.helpers.append(TipCellSproutingHelper(
+            model,
+            sequential=model.properties["engine"]["sequentialSprouting"]))
+
+    if model.properties["engine"]["eventDrivenCellCycle"]:
+        model.schedule.helpers.append(CancerCellCycleHelper(model))
+
+    if cancer_cell_population:
+        model.schedule.helpers.append(CancerCellPopulationHelper(model))
+
     snapshot_interval = 10
 
     model.schedule.helpers.append(AgentCounter(model))
@@ -281,16 +439,23 @@ def generate_model(properties, numEpochs):
         GlucoseConcentrationWatcher(model, interval=snapshot_interval))
     model.schedule.helpers.append(
         DeathCauseWatcher(model, interval=snapshot_interval))
+    growth_target = model.properties["growthTarget"]
+
+    if growth_target["maxMeanError"] is not None:
+        model.schedule.helpers.append(GrowthTargetWatcher(
+            model, growth_target["maxMeanError"],
+            growth_target["epochDuration"]))
+
     model.schedule.helpers.append(ModelPicklerLite(model.properties["outDir"],
                                                    pickle_every=400))
 
     def num_agents_exit_condition(model):
-        return len([a for a in model.schedule.agents if
-                    a.__class__.__name__ == "CancerCell"]) > 400000
+        return len(model.schedule.registry.get_agents("CancerCell")) > 400000
 
     def no_cancer_cells(model):
-        return len([c for c in model.schedule.agents if
-                    c.__class__.__name__ == "CancerCell" and not c.dead]) == 0
+        return len(
+            model.schedule.registry.get_alive_agents("CancerCell")) == 0 \
+            and not cancer_population_env.counts.any()
 
     model.schedule.helpers.append(
         ExitConditionWatcher([num_agents_exit_condition, no_cancer_cells]))
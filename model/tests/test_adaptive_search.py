@@ -0,0 +1,70 @@
+import numpy as np
+import unittest
+
+from calibration.AdaptiveSearch import AdaptiveSearch
+from calibration.ParameterSpace import ParameterSpace
+
+bounds = {
+    "pWarburgSwitch": {"min": 0.05, "max": 0.8},
+    "numCancerCells": {"min": 8, "max": 19, "integer": True},
+    "oxygenDiffusivity": {"min": 0.01, "max": 1, "log": True},
+    "minPSynthesis": {"min": 0.06, "max": 1.0},
+    "minGlucoseWarburg": {"min": 10.0, "max": 22.4}
+}
+
+
+class TestAdaptiveSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.space = ParameterSpace(bounds)
+        self.target = np.array([0.3, 0.7, 0.2, 0.5, 0.6])
+
+    def get_error(self, experiment):
+        point = self.space.to_points([experiment])[0]
+
+        return float(np.sum((point - self.target) ** 2))
+
+    def test_parameter_space(self):
+        points = self.space.sample(8, np.random.RandomState(0))
+
+        # Each parameter takes a value from each stratum once
+        for column in points.T:
+            self.assertEqual(list(range(8)), sorted((column * 8).astype(int)))
+
+        values = self.space.to_values(points)
+
+        for v in values:
+            self.assertIsInstance(v["numCancerCells"], int)
+            self.assertTrue(0.01 <= v["oxygenDiffusivity"] <= 1)
+
+        for v, round_trip in zip(values, self.space.to_values(
+                self.space.to_points(values))):
+            self.assertEqual(sorted(v), sorted(round_trip))
+            np.testing.assert_allclose([v[n] for n in sorted(v)],
+                                       [round_trip[n] for n in sorted(v)])
+
+    def test_search(self):
+        search = AdaptiveSearch(self.space, {"name": "base", "envSize": 20},
+                                batch_size=16, seed=0)
+
+        trials = search.run(self.get_error, 6)
+
+        self.assertEqual(96, len(trials))
+        self.assertEqual(search.best, trials[0])
+        self.assertEqual(20, trials[0]["envSize"])
+        self.assertEqual(96, len(set(t["name"] for t in trials)))
+
+        # The search does better than ten times as many random experiments
+        random_points = np.random.RandomState(0).uniform(size=(960, 5))
+        random_error = min(self.get_error(e) for e in
+                           self.space.to_values(random_points))
+
+        self.assertLess(search.best["ame"], random_error)
+
+        # Failed experiments are never elites
+        search.tell(search.ask(), [float("nan")] * 16)
+        self.assertEqual(trials[0], search.best)
+
+
+if __name__ == '__main__':
+    unittest.main()
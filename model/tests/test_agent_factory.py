@@ -0,0 +1,56 @@
+import unittest
+from panaxea.core.Steppables import Agent
+
+from model.core.AgentFactory import AgentFactory
+
+
+class NumberedAgent(Agent, object):
+
+    def __init__(self, model):
+        super(NumberedAgent, self).__init__()
+        self.constant = model["constant"]
+        self.reset_state_(model)
+
+    def reset_state_(self, model):
+        model["counter"] += 1
+        self.number = model["counter"]
+        self.history = []
+
+
+class TestAgentFactory(unittest.TestCase):
+
+    def test_copied_agents_match_constructed_ones(self):
+        model = {"constant": [5], "counter": 0}
+        factory = AgentFactory(NumberedAgent)
+
+        agents = [factory.get(model) for _ in range(3)]
+        agents[0].environment_positions["env"] = (0, 0, 0)
+        agents[1].history.append(1)
+
+        self.assertEqual([1, 2, 3], [a.number for a in agents])
+        # Attributes read from the model are shared, as by the constructor
+        self.assertTrue(all(a.constant is model["constant"] for a in agents))
+        self.assertTrue(all(isinstance(a, NumberedAgent) for a in agents))
+
+        # Per-agent state is not shared, with the template nor between
+        # agents
+        self.assertEqual({}, agents[1].environment_positions)
+        self.assertEqual({}, factory.get(model).environment_positions)
+        self.assertEqual([], agents[2].history)
+        self.assertEqual([], factory.get(model).history)
+
+    def test_agents_in_bulk(self):
+        model = {"constant": 5, "counter": 0}
+        factory = AgentFactory(NumberedAgent)
+
+        agents = factory.get_many(model, 4)
+        agents.extend(factory.get_many(model, 2))
+
+        self.assertEqual([1, 2, 3, 4, 5, 6], [a.number for a in agents])
+        self.assertEqual(6, len(set(id(a.environment_positions)
+                                    for a in agents)))
+        self.assertEqual(6, len(set(id(a.history) for a in agents)))
+
+
+if __name__ == '__main__':
+    unittest.main()
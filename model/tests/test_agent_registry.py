@@ -0,0 +1,84 @@
+import unittest
+from panaxea.core.Model import Model
+from panaxea.core.Steppables import Agent
+
+from model.core.IndexedSchedule import IndexedSchedule
+
+
+class TestAgentRegistry(unittest.TestCase):
+
+    def test_registry_follows_schedule(self):
+        class MortalAgent(Agent, object):
+
+            def __init__(self):
+                super(MortalAgent, self).__init__()
+                self.dead = False
+
+        class ImmortalAgent(Agent, object):
+            pass
+
+        model = Model(3, verbose=False)
+        model.schedule = IndexedSchedule()
+        registry = model.schedule.registry
+
+        a = MortalAgent()
+        b = ImmortalAgent()
+        model.schedule.add_agent(a)
+        model.schedule.add_agent(b)
+
+        self.assertEqual({a}, registry.get_alive_agents("MortalAgent"))
+        self.assertEqual({b}, registry.get_alive_agents("ImmortalAgent"))
+
+        registry.mark_dead(a)
+        self.assertTrue(a.dead)
+        self.assertEqual(set(), registry.get_alive_agents("MortalAgent"))
+        self.assertEqual({a}, registry.get_dead_agents("MortalAgent"))
+        self.assertEqual({a}, registry.get_agents("MortalAgent"))
+
+        # Pending agents are only indexed once merged into the schedule
+        c = MortalAgent()
+        model.schedule.agents_to_schedule.add(c)
+        model.schedule.agents_to_remove.add(b)
+        self.assertEqual({a}, registry.get_agents("MortalAgent"))
+
+        model.run()
+
+        self.assertEqual({a, c}, registry.get_agents("MortalAgent"))
+        self.assertEqual({c}, registry.get_alive_agents("MortalAgent"))
+        self.assertEqual(set(), registry.get_agents("ImmortalAgent"))
+
+    def test_inert_agents_are_not_stepped(self):
+        class CountingAgent(Agent, object):
+
+            def __init__(self):
+                super(CountingAgent, self).__init__()
+                self.dead = False
+                self.steps = 0
+
+            def step_main(self, model):
+                self.steps += 1
+
+        class InertAgent(CountingAgent, object):
+            pass
+
+        model = Model(2, verbose=False)
+        model.schedule = IndexedSchedule(["InertAgent"])
+
+        a = CountingAgent()
+        b = CountingAgent()
+        c = InertAgent()
+        for agent in [a, b, c]:
+            model.schedule.add_agent(agent)
+
+        model.schedule.registry.mark_dead(b)
+        model.run()
+
+        self.assertEqual([2, 0, 0], [a.steps, b.steps, c.steps])
+        # Inert agents are still scheduled and indexed
+        self.assertEqual({a, b, c}, set(model.schedule.agents))
+        self.assertEqual({c}, model.schedule.registry.get_agents(
+            "InertAgent"))
+
+
+if __name__ == '__main__':
+    unittest.main()
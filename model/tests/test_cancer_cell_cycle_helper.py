@@ -0,0 +1,114 @@
+import numpy as np
+import unittest
+from panaxea.core.Model import Model
+from panaxea.core.Steppables import Helper
+
+from model.agents.CancerCell import CancerCell
+from model.core.AgentFactory import AgentFactory
+from model.core.IndexedSchedule import IndexedSchedule
+from model.core.NumericalArrayGrid3D import NumericalArrayGrid3D
+from model.core.OccupancyGrid3D import OccupancyGrid3D
+from model.core.RandomStream import RandomStream
+from model.helpers.CancerCellCycleHelper import CancerCellCycleHelper
+
+
+class CycleRecorder(Helper, object):
+    # Records the positions and phases of live cancer cells at each epoch
+
+    def __init__(self):
+        self.epochs = []
+
+    def step_epilogue(self, model):
+        self.epochs.append(sorted(
+            (c.environment_positions["agentEnv"], c.current_state)
+            for c in model.schedule.registry.get_alive_agents("CancerCell")))
+
+
+class TestCancerCellCycleHelper(unittest.TestCase):
+
+    def run_model(self, event_driven, p_synthesis, num_epochs):
+        model = Model(num_epochs, verbose=False)
+        model.properties = {
+            "envNames": {
+                "agentEnvName": "agentEnv",
+                "oxygenEnvName": "oxygenEnv",
+                "glucoseEnvName": "glucoseEnv",
+                "drugEnvName": "drugEnv"
+            },
+            "engine": {"eventDrivenCellCycle": event_driven},
+            "maxAgentDensity": 1,
+            "agents": {
+                "baseCellCycleLength": {"G1": 2, "S": 3, "G2": 1, "M": 1},
+                "cancerCells": {
+                    "domains": {"hypoxic": 5, "ultraHypoxic": 1,
+                                "warburgHypoxic": 3},
+                    "oxygenToHifCoeffs": {"hypoxic": [1],
+                                          "ultraHypoxic": [1],
+                                          "warburg": [1]},
+                    "HIFRange": [0, 16],
+                    "hifToMetabolicRateCoeffs": [1],
+                    # The probability of leaving G1
+                    "hifToProliferationRateCoeffs": [p_synthesis],
+                    "hifToVegfSecretionRateCoeffs": [1],
+                    "baseHifRate": 1,
+                    "minHIF": 1,
+                    "maxVegfSecretionRate": 1,
+                    "pWarburgSwitch": 0,
+                    "minimumOxygenConcentration": 1,
+                    "minGlucoseWarburg": 1,
+                    "minGlucoseNonWarburg": 2,
+                    "minGlucoseUptakeRate": 1,
+                    "maxGlucoseUptakeRate": 3,
+                    "minPSynthesis": 0
+                }
+            }
+        }
+
+        model.random_stream = RandomStream(0)
+        model.cancer_cell_factory = AgentFactory(CancerCell)
+        model.schedule = IndexedSchedule(
+            ["CancerCell"] if event_driven else [])
+
+        OccupancyGrid3D("agentEnv", 3, 3, 3, model, model.random_stream)
+
+        for name in ["oxygenEnv", "glucoseEnv", "drugEnv"]:
+            NumericalArrayGrid3D(name, 3, 3, 3, model).set_values(
+                np.full(27, 10.))
+
+        if event_driven:
+            model.schedule.helpers.append(CancerCellCycleHelper(model))
+
+        recorder = CycleRecorder()
+        model.schedule.helpers.append(recorder)
+
+        cell = model.cancer_cell_factory.get(model)
+        cell.add_agent_to_grid("agentEnv", (1, 1, 1), model)
+        model.schedule.add_agent(cell)
+
+        model.run()
+
+        return recorder.epochs
+
+    def test_cells_divide_on_the_same_epochs(self):
+        # Cells fill the grid, after which they fail to divide and retry
+        # every epoch
+        per_agent = self.run_model(False, 1, 100)
+
+        self.assertEqual(27, len(per_agent[-1]))
+        self.assertEqual(per_agent, self.run_model(True, 1, 100))
+
+    def test_cells_leave_g1_on_the_same_epochs(self):
+        # A single cell, up to its first division, draws one variate each
+        # epoch it tries to leave G1. Once several cells try on the same
+        # epoch, the two modes draw for them in different orders.
+        per_agent = self.run_model(False, 0.5, 13)
+
+        self.assertEqual([1] * 12 + [2], [len(e) for e in per_agent])
+        # G1 lasts 2 epochs, plus one failed attempt to leave it
+        self.assertEqual(["G1"] * 3 + ["S"],
+                         [e[0][1] for e in per_agent[:4]])
+        self.assertEqual(per_agent, self.run_model(True, 0.5, 13))
+
+
+if __name__ == '__main__':
+    unittest.main()
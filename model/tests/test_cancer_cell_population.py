@@ -0,0 +1,124 @@
+import numpy as np
+import unittest
+from panaxea.core.Model import Model
+
+from model.core.CancerCellPopulationGrid3D import CancerCellPopulationGrid3D
+from model.core.IndexedSchedule import IndexedSchedule
+from model.core.NumericalArrayGrid3D import NumericalArrayGrid3D
+from model.core.OccupancyGrid3D import OccupancyGrid3D
+from model.core.RandomStream import RandomStream
+from model.helpers.CancerCellPopulationHelper import \
+    CancerCellPopulationHelper
+
+
+class TestCancerCellPopulation(unittest.TestCase):
+
+    def get_model(self):
+        model = Model(1, verbose=False)
+        model.schedule = IndexedSchedule()
+        model.properties = {
+            "envNames": {
+                "agentEnvName": "agentEnv",
+                "oxygenEnvName": "oxygenEnv",
+                "glucoseEnvName": "glucoseEnv",
+                "cancerPopulationEnvName": "cancerPopulationEnv"
+            },
+            "maxAgentDensity": 1,
+            "agents": {
+                "baseCellCycleLength": {"G1": 1, "S": 1, "G2": 1, "M": 1},
+                "cancerCells": {
+                    "domains": {"hypoxic": 5, "ultraHypoxic": 1,
+                                "warburgHypoxic": 3},
+                    "oxygenToHifCoeffs": {"hypoxic": [1],
+                                          "ultraHypoxic": [1],
+                                          "warburg": [1]},
+                    "HIFRange": [0, 16],
+                    "hifToMetabolicRateCoeffs": [1],
+                    # Cells always move on from G1
+                    "hifToProliferationRateCoeffs": [1],
+                    "hifToVegfSecretionRateCoeffs": [1],
+                    "baseHifRate": 1,
+                    "minHIF": 1,
+                    "maxVegfSecretionRate": 1,
+                    "pWarburgSwitch": 0,
+                    "minimumOxygenConcentration": 1,
+                    "minGlucoseWarburg": 1,
+                    "minGlucoseNonWarburg": 2,
+                    "minGlucoseUptakeRate": 1,
+                    "maxGlucoseUptakeRate": 3,
+                    "minPSynthesis": 0
+                }
+            }
+        }
+
+        model.random_stream = RandomStream(0)
+
+        OccupancyGrid3D("agentEnv", 3, 3, 3, model, model.random_stream)
+        NumericalArrayGrid3D("oxygenEnv", 3, 3, 3, model).set_values(
+            np.full(27, 10.))
+        NumericalArrayGrid3D("glucoseEnv", 3, 3, 3, model).set_values(
+            np.full(27, 10.))
+        CancerCellPopulationGrid3D("cancerPopulationEnv", 3, 3, 3, model)
+
+        return model
+
+    def test_cells_divide_into_neighbours(self):
+        model = self.get_model()
+        population = model.environments["cancerPopulationEnv"]
+        agent_env = model.environments["agentEnv"]
+        centre = np.ravel_multi_index((1, 1, 1), population.shape)
+
+        # A cell at the end of M, in a full voxel
+        population.add_cells(centre, "M", 1)
+        agent_env.occupy([(1, 1, 1)])
+
+        CancerCellPopulationHelper(model).step_main(model)
+
+        alive = population.get_alive()
+        self.assertEqual(2, alive.sum())
+        self.assertEqual(1, population.counts[
+            centre, 0, population.get_compartment("G1", 0)])
+        self.assertEqual(1, alive[centre])
+        self.assertEqual(2, agent_env.occupancy[:-1].sum())
+        np.testing.assert_array_equal(alive > 0, agent_env.occupancy[:-1] > 0)
+
+    def test_cells_progress_through_the_cycle(self):
+        model = self.get_model()
+        population = model.environments["cancerPopulationEnv"]
+        helper = CancerCellPopulationHelper(model)
+
+        population.add_cells(0, "G1", 0, 3)
+
+        # Each phase takes one epoch to complete and one to move on from
+        for phase in ["G1", "S", "G2", "M"]:
+            self.assertEqual(3, population.counts[
+                0, 0, population.get_compartment(phase, 0)])
+            helper.step_main(model)
+            self.assertEqual(3, population.counts[
+                0, 0, population.get_compartment(phase, 1)])
+            helper.step_main(model)
+
+    def test_cells_lacking_glucose_die(self):
+        model = self.get_model()
+        population = model.environments["cancerPopulationEnv"]
+        population.add_cells([0, 1], "S", 0, [2, 3])
+
+        model.environments["glucoseEnv"].values[0] = 1.5
+
+        CancerCellPopulationHelper(model).step_main(model)
+
+        self.assertEqual(0, population.get_alive()[0])
+        self.assertEqual(3, population.get_alive()[1])
+        self.assertEqual(2, population.dead[0])
+        self.assertEqual(2, population.deaths[0, 1])
+        self.assertEqual(0, population.deaths[1].sum())
+
+        population.kill_cells((0, 0, 1), "Lack of oxygen")
+
+        self.assertEqual(0, population.get_alive().sum())
+        self.assertEqual(3, population.deaths[0, 0])
+        self.assertEqual(5, population.get_total().sum())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import numpy as np
+import unittest
+
+from runners.CostModel import CostModel
+
+
+def get_experiment(env_size, num_cancer_cells, p_warburg_switch=0.1,
+                   minimum_oxygen_concentration=0.1):
+    return {
+        "envSize": env_size,
+        "numCancerCells": num_cancer_cells,
+        "pWarburgSwitch": p_warburg_switch,
+        "minimumOxygenConcentration": minimum_oxygen_concentration
+    }
+
+
+def get_runtime(e):
+    return 1e-3 * e["envSize"] ** 3 * e["numCancerCells"] ** 0.5 * \
+        np.exp(2 * e["pWarburgSwitch"] - e["minimumOxygenConcentration"])
+
+
+class TestCostModel(unittest.TestCase):
+
+    def test_fit(self):
+        random = np.random.RandomState(0)
+        experiments = [get_experiment(random.randint(20, 100),
+                                      random.randint(1, 12),
+                                      random.rand(), random.rand())
+                       for _ in range(20)]
+        runs = [{"runtime": get_runtime(e), "parameters": e}
+                for e in experiments]
+        # Runs which did not complete, or do not record parameters
+        runs += [{"runtime": None, "parameters": experiments[0]},
+                 {"runtime": 10, "parameters": None}]
+
+        cost_model = CostModel()
+
+        self.assertEqual(4, cost_model.fit(runs[:4]))
+        self.assertIsNone(cost_model.coeffs)
+        self.assertEqual(20, cost_model.fit(runs))
+
+        new = [get_experiment(50, 4, 0.5, 0.2), get_experiment(80, 1)]
+        np.testing.assert_allclose([get_runtime(e) for e in new],
+                                   cost_model.predict(new))
+
+    def test_order(self):
+        experiments = [get_experiment(20, 1), get_experiment(40, 1),
+                       get_experiment(20, 2), get_experiment(20, 1)]
+        experiments[3]["name"] = "last"
+
+        # Unfitted, costs scale with the number of positions and cells
+        ordered = CostModel().order(experiments)
+
+        self.assertEqual([experiments[i] for i in [1, 2, 0, 3]], ordered)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import numpy as np
+import unittest
+
+from analyzers.EnsembleOutput import EnsembleOutput, get_series
+from analyzers.SingleReportModelAnalyzers import get_avg_num_agents, \
+    get_avg_tumour_volume
+
+
+def get_output(random, num_epochs):
+    return {
+        "agentNums": {
+            "cancerCells": list(random.randint(0, 1000, num_epochs)),
+            "tipCells": list(random.randint(0, 1000, num_epochs)),
+            "aliveCancerCells": list(random.randint(0, 1000, num_epochs)),
+            "deadCancerCells": list(random.randint(0, 1000, num_epochs))
+        },
+        "cancerCellProperties": {
+            "avgHif": list(random.rand(num_epochs)),
+            "OxygenDistributions": [{"n": random.rand(10),
+                                     "bins": random.rand(11)}]
+        },
+        "maxDistances": list(random.rand(num_epochs) + 0j),
+        "causesOfDeath": [{"warburgDeathGlucose": {"num": 0}}]
+    }
+
+
+class Model(object):
+
+    def __init__(self, output):
+        self.output = output
+
+
+class TestEnsembleOutput(unittest.TestCase):
+
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self.outputs = [get_output(random, 6) for _ in range(5)]
+
+    def test_series(self):
+        series = get_series(self.outputs[0])
+
+        self.assertEqual(["agentNums", "cancerCellProperties",
+                          "maxDistances"], sorted(series))
+        self.assertEqual(["avgHif"], list(series["cancerCellProperties"]))
+        self.assertEqual(float, series["maxDistances"].dtype)
+
+    def test_mean_and_spread(self):
+        ensemble_output = EnsembleOutput()
+
+        for output in self.outputs:
+            ensemble_output.add(output)
+
+        hifs = [o["cancerCellProperties"]["avgHif"] for o in self.outputs]
+        np.testing.assert_allclose(
+            np.mean(hifs, axis=0),
+            ensemble_output.output["cancerCellProperties"]["avgHif"])
+        np.testing.assert_allclose(
+            np.std(hifs, axis=0, ddof=1),
+            ensemble_output.spread["cancerCellProperties"]["avgHif"])
+
+        # The ensemble stands for a model in the analyzers
+        models = [Model(o) for o in self.outputs]
+        expected = get_avg_num_agents(models)
+
+        for key, value in get_avg_num_agents([ensemble_output]).items():
+            np.testing.assert_allclose(expected[key], value)
+
+        np.testing.assert_allclose(
+            np.real(get_avg_tumour_volume(models)),
+            get_avg_tumour_volume([ensemble_output]))
+
+        self.assertEqual(5, ensemble_output.to_dict()["count"])
+
+    def test_runs_stopped_early(self):
+        ensemble_output = EnsembleOutput()
+        ensemble_output.add(self.outputs[0])
+
+        np.testing.assert_array_equal(
+            np.zeros(6), ensemble_output.spread["maxDistances"])
+
+        short = get_output(np.random.RandomState(1), 4)
+        ensemble_output.add(short)
+
+        ensemble_output.add(self.outputs[1])
+
+        # Epochs the short run did not reach are aggregated over the others
+        cancer_cells = [o["agentNums"]["cancerCells"]
+                        for o in self.outputs[:2]]
+        mean = ensemble_output.output["agentNums"]["cancerCells"]
+        spread = ensemble_output.spread["agentNums"]["cancerCells"]
+
+        self.assertEqual(6, len(mean))
+        np.testing.assert_allclose(
+            np.mean([c[:4] for c in cancer_cells] +
+                    [short["agentNums"]["cancerCells"]], axis=0), mean[:4])
+        np.testing.assert_allclose(np.mean(cancer_cells, axis=0)[4:],
+                                   mean[4:])
+        np.testing.assert_allclose(np.std(cancer_cells, axis=0, ddof=1)[4:],
+                                   spread[4:])
+        np.testing.assert_array_equal(
+            [3, 3, 3, 3, 2, 2],
+            ensemble_output.counts["agentNums"]["cancerCells"])
+
+
+if __name__ == '__main__':
+    unittest.main()
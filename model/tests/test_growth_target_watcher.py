@@ -0,0 +1,60 @@
+import numpy as np
+import unittest
+from panaxea.core.Model import Model
+
+from model.helpers.GrowthTargetWatcher import GrowthTargetWatcher
+from model.utils.GrowthCurve import convert_num_agents_to_volume, \
+    epoch_to_day, get_fitness_function_polynomial
+
+
+class TestGrowthTargetWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.model = Model(300, verbose=False)
+        self.model.output["agentNums"] = {"cancerCells": []}
+
+        p = get_fitness_function_polynomial()
+        self.expected = np.array([p(epoch_to_day(e, 2)) for e in range(300)])
+
+    def step(self, watcher, cancer_cells):
+        watcher.step_prologue(self.model)
+        self.model.output["agentNums"]["cancerCells"].append(cancer_cells)
+        self.model.current_epoch += 1
+
+    def test_errors(self):
+        watcher = GrowthTargetWatcher(self.model, 1e9, 2)
+
+        for n in [64, 100, 1000, 5000]:
+            self.step(watcher, n)
+
+        watcher.step_prologue(self.model)
+        output = self.model.output["growthTarget"]
+
+        np.testing.assert_allclose(
+            self.expected[:4] - [convert_num_agents_to_volume(n, 120, 5000)
+                                 for n in [64, 100, 1000, 5000]],
+            output["errors"])
+        self.assertFalse(output["aborted"])
+        self.assertFalse(self.model.exit)
+
+    def test_abort(self):
+        watcher = GrowthTargetWatcher(self.model, 10, 2)
+
+        # Without cancer cells, errors are the expected volumes. The run is
+        # stopped at the first epoch whose previous errors alone exceed the
+        # maximum mean error.
+        abort_epoch = np.argmax(np.cumsum(self.expected) / 300 > 10) + 1
+
+        while not self.model.exit:
+            self.step(watcher, 0)
+
+        output = self.model.output["growthTarget"]
+
+        self.assertEqual(abort_epoch, output["abortEpoch"])
+        self.assertTrue(output["aborted"])
+        self.assertIn("above the maximum of 10.00 mm3",
+                      output["abortReason"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import pandas as pd
+import shutil
+import tempfile
+import unittest
+
+from model.utils.HifRelationsCache import HifRelationsCache
+from model.utils.OxygenHIFRelationsGenerator import OxygenHIFRelationsGenerator
+
+
+def get_experiment(min_hif=0.1):
+    return {
+        "minHIF": min_hif,
+        "maxHIF": 1.0,
+        "ultraHypoxicThreshold": 0.1,
+        "hypoxicThreshold": 0.3,
+        "enhancedHypoxicThreshold": 0.6,
+        "baseOxygenMetabolicRate": 0.02,
+        "minPSynthesis": 0.1
+    }
+
+
+class TestHifRelationsCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_get(self):
+        cache = HifRelationsCache()
+        p = get_experiment()
+
+        ohrg = OxygenHIFRelationsGenerator(
+            min_hif=p["minHIF"],
+            max_hif=p["maxHIF"],
+            ultra_hypoxia_threshold=p["ultraHypoxicThreshold"],
+            hypoxia_threshold=p["hypoxicThreshold"],
+            enhanced_hypoxic_threshold=p["enhancedHypoxicThreshold"],
+            base_oxygen_metabolic_rate=p["baseOxygenMetabolicRate"],
+            min_p_synthesis=p["minPSynthesis"])
+
+        relations = cache.get(p)
+
+        self.assertEqual(list(ohrg.get_oxygen_to_hif()[1]),
+                         relations["hypoxic"])
+        self.assertEqual(list(ohrg.get_hif_to_vegf()),
+                         relations["hifToVegfSecretionRate"])
+
+        # Callers get copies of the cached coefficients
+        relations["hypoxic"][0] = None
+        self.assertEqual(list(ohrg.get_oxygen_to_hif()[1]),
+                         cache.get(p)["hypoxic"])
+
+    def test_precompile_and_persistence(self):
+        path = os.path.join(self.dir, "relations.json")
+        cache = HifRelationsCache(path)
+        experiments = pd.DataFrame([get_experiment(0.1), get_experiment(0.2),
+                                    get_experiment(0.1)])
+
+        self.assertEqual(2, cache.precompile(experiments))
+        self.assertEqual(0, cache.precompile(experiments))
+
+        cache.save()
+        loaded = HifRelationsCache(path)
+
+        self.assertEqual(cache.relations, loaded.relations)
+        self.assertEqual(cache.get(get_experiment(0.2)),
+                         loaded.get(get_experiment(0.2)))
+
+        # As does a cache created without a path, once given one
+        shared = HifRelationsCache()
+        shared.set_path(path)
+
+        self.assertEqual(cache.relations, shared.relations)
+        self.assertEqual(0, shared.precompile(experiments))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import numpy as np
+import unittest
+from panaxea.core.Model import Model
+
+from model.core.LayoutCache import LayoutCache
+from model.core.OccupancyGrid3D import OccupancyGrid3D
+
+
+def get_properties(env_size, num_cancer_cells=1, num_endothelial_cells=1):
+    return {
+        "envSize": env_size,
+        "initialAgentSetup": {
+            "numCancerCells": num_cancer_cells,
+            "numEndothelialCells": num_endothelial_cells
+        }
+    }
+
+
+class TestLayoutCache(unittest.TestCase):
+
+    def test_templates_are_reused(self):
+        cache = LayoutCache(max_size=2)
+
+        template = cache.get(get_properties(12))
+
+        self.assertIs(template, cache.get(get_properties(12)))
+        self.assertIsNot(template, cache.get(get_properties(12, 2)))
+        self.assertEqual(2 * 64, len(cache.get(
+            get_properties(12, 2)).seed_indices))
+
+        # The least recently used template is evicted first
+        cache.get(get_properties(12))
+        cache.get(get_properties(14))
+        self.assertIs(template, cache.get(get_properties(12)))
+        self.assertEqual([(14, 1, 1), (12, 1, 1)], list(cache.templates))
+
+    def test_layout(self):
+        template = LayoutCache().get(get_properties(12, 1, 2))
+        x, y, z = np.unravel_index(template.healthy_indices, template.shape)
+
+        self.assertTrue(np.all(x % 2 == z % 2))
+        self.assertEqual(12 ** 3, len(template.healthy_indices) +
+                         len(template.tip_indices) // 2)
+        self.assertRaises(ValueError, template.tip_indices.fill, 0)
+
+        # Grids sharing the moore neighbourhood table of the template
+        # behave as those computing their own
+        model = Model(1, verbose=False)
+        shared = OccupancyGrid3D("shared", 12, 12, 12, model,
+                                 moore_neighbours=template.moore_neighbours)
+        own = OccupancyGrid3D("own", 12, 12, 12, model)
+
+        np.testing.assert_array_equal(own.moore_neighbours,
+                                      shared.moore_neighbours)
+
+
+if __name__ == '__main__':
+    unittest.main()
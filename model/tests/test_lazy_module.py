@@ -0,0 +1,34 @@
+import subprocess
+import sys
+import unittest
+
+from model.utils.LazyModule import LazyModule
+
+
+class TestLazyModule(unittest.TestCase):
+
+    def test_imported_on_first_use(self):
+        calls = []
+        json = LazyModule("json", before_import=lambda: calls.append(1))
+
+        self.assertFalse(json.is_imported())
+        self.assertEqual([], calls)
+
+        self.assertEqual("[1]", json.dumps([1]))
+        self.assertEqual("{}", json.dumps({}))
+        self.assertTrue(json.is_imported())
+        self.assertEqual([1], calls)
+
+    def test_model_imports_no_optional_dependencies(self):
+        script = "import sys; import model.models.model_warburg; " \
+                 "print([m for m in ['matplotlib', 'fipy', 'boto3'] " \
+                 "if m in sys.modules])"
+
+        output = subprocess.check_output([sys.executable, "-c", script],
+                                         universal_newlines=True)
+
+        self.assertEqual("[]", output.strip())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from panaxea.core.Environment import ObjectGrid3D
+from panaxea.core.Model import Model
+from panaxea.core.Steppables import Agent
+
+from model.core.OccupancyGrid3D import OccupancyGrid3D
+
+
+class TestOccupancyGrid(unittest.TestCase):
+
+    def test_moore_neighbourhoods(self):
+        model = Model(1, verbose=False)
+        reference = ObjectGrid3D("reference", 4, 5, 3, model)
+        env = OccupancyGrid3D("agentEnv", 4, 5, 3, model)
+
+        for x in range(4):
+            for y in range(5):
+                for z in range(3):
+                    self.assertEqual(
+                        sorted(reference.get_moore_neighbourhood((x, y, z))),
+                        sorted(env.get_moore_neighbourhood((x, y, z))))
+                    self.assertEqual((x, y, z),
+                                     env.get_position(env.get_index(
+                                         (x, y, z))))
+
+    def test_occupancy(self):
+        model = Model(1, verbose=False)
+        env = OccupancyGrid3D("agentEnv", 3, 3, 3, model)
+
+        agents = [Agent() for _ in range(3)]
+        for a in agents:
+            a.add_agent_to_grid("agentEnv", (1, 1, 1), model)
+        # Adding an agent twice does not change the occupancy
+        env.add_agent(agents[0], (1, 1, 1))
+
+        self.assertEqual(3, env.get_occupancy((1, 1, 1)))
+        self.assertTrue(env.has_capacity((1, 1, 1), 4))
+        self.assertFalse(env.has_capacity((1, 1, 1), 3))
+
+        agents[0].move_agent("agentEnv", (0, 0, 0), model)
+        agents[1].remove_agent_from_grid("agentEnv", model)
+
+        self.assertEqual(1, env.get_occupancy((1, 1, 1)))
+        self.assertEqual(1, env.get_occupancy((0, 0, 0)))
+        self.assertEqual(2, env.occupancy[:-1].sum())
+
+        # The least populated neighbour of the corner is never the occupied
+        # centre
+        for _ in range(20):
+            self.assertNotEqual((1, 1, 1),
+                                env.get_least_populated_moore_neigh(
+                                    (0, 0, 0)))
+
+    def test_bulk_insertion(self):
+        model = Model(1, verbose=False)
+        env = OccupancyGrid3D("agentEnv", 3, 3, 3, model)
+        reference = OccupancyGrid3D("reference", 3, 3, 3, model)
+
+        agents = [Agent() for _ in range(4)]
+        indices = [0, 13, 13, 26]
+        env.add_agents(agents, indices)
+
+        for a, i in zip(agents, indices):
+            reference.add_agent(Agent(), reference.get_position(i))
+            self.assertEqual(env.get_position(i),
+                             a.environment_positions["agentEnv"])
+            self.assertIn(a, env.grid[env.get_position(i)])
+
+        self.assertEqual(list(reference.occupancy), list(env.occupancy))
+
+
+if __name__ == '__main__':
+    unittest.main()
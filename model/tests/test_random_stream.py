@@ -0,0 +1,60 @@
+import numpy as np
+import unittest
+
+from model.core.RandomStream import RandomStream
+
+
+class TestRandomStream(unittest.TestCase):
+
+    def test_same_seed_same_variates(self):
+        a = RandomStream(42)
+        b = RandomStream(42)
+
+        a.refill(10)
+        b.refill(10)
+
+        values_a = [a.random() for _ in range(5)] + list(a.random_array(20))
+        values_b = [b.random() for _ in range(5)] + list(b.random_array(20))
+
+        self.assertEqual(values_a, values_b)
+        self.assertTrue(all(0 <= v < 1 for v in values_a))
+
+    def test_variates_come_from_the_generator(self):
+        stream = RandomStream(3)
+        stream.refill(4)
+
+        expected = np.random.default_rng(3).random(stream.block_size)[:4]
+
+        self.assertEqual(list(expected), list(stream.random_array(4)))
+
+    def test_unseeded_stream_records_seed(self):
+        stream = RandomStream()
+
+        self.assertEqual(stream.random(), RandomStream(stream.seed).random())
+
+    def test_geometric_matches_bernoulli_trials(self):
+        stream = RandomStream(5)
+        p = 0.05
+
+        samples = np.array([stream.geometric(p) for _ in range(20000)])
+
+        self.assertTrue(np.all(samples >= 1))
+        # Mean 1 / p and P(K = 1) = p, within a few standard errors
+        self.assertAlmostEqual(1 / p, samples.mean(), delta=0.6)
+        self.assertAlmostEqual(p, np.mean(samples == 1), delta=0.005)
+        self.assertEqual(float("inf"), stream.geometric(0))
+        self.assertEqual(1, stream.geometric(1))
+
+    def test_shuffle_is_a_permutation(self):
+        stream = RandomStream(1)
+        items = list(range(26))
+
+        stream.shuffle(items)
+
+        self.assertEqual(list(range(26)), sorted(items))
+        self.assertTrue(all(0 <= stream.randrange(3) < 3
+                            for _ in range(100)))
+
+
+if __name__ == '__main__':
+    unittest.main()
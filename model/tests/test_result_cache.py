@@ -0,0 +1,89 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from runners.ResultCache import ResultCache, get_run_key
+from runners.RunLedger import RunLedger
+from runners.SweepRunner import SweepRunner
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.dir, "reports")
+        os.mkdir(self.output_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def run_experiment(self, experiment):
+        report = os.path.join(self.output_dir, experiment["name"])
+        os.mkdir(report)
+
+        with open(os.path.join(report, "result"), "w") as f:
+            f.write(str(experiment["envSize"]))
+
+        return report
+
+    def test_keys(self):
+        key = get_run_key({"name": "a", "envSize": 20, "seed": 1}, 10, "v")
+
+        self.assertEqual(key, get_run_key(
+            {"name": "b", "envSize": 20.0, "seed": 1.0}, 10, "v"))
+
+        # Unseeded experiments are not cached
+        self.assertIsNone(get_run_key({"envSize": 20}, 10, "v"))
+
+        for experiment, num_epochs, version in [
+                ({"envSize": 20, "seed": 2}, 10, "v"),
+                ({"envSize": 20, "seed": float("nan")}, 10, "v"),
+                ({"envSize": 20, "seed": 1}, 20, "v"),
+                ({"envSize": 20, "seed": 1}, 10, "w")]:
+            self.assertNotEqual(key, get_run_key(experiment, num_epochs,
+                                                 version))
+
+    def test_repeated_experiments_refer_to_reports(self):
+        experiments = [{"name": "a", "envSize": 20, "seed": 1},
+                       {"name": "b", "envSize": 30, "seed": 1},
+                       {"name": "c", "envSize": 20.0, "seed": 1}]
+        cache = ResultCache(os.path.join(self.dir, "cache"),
+                            self.output_dir, 10)
+        ledger = RunLedger(os.path.join(self.dir, "ledger.sqlite"))
+
+        results = SweepRunner(ledger, result_cache=cache).run(
+            self.run_experiment, experiments)
+
+        self.assertEqual(["a", "b"], [r.task["name"] for r in results])
+        self.assertEqual({RunLedger.COMPLETED: 2, RunLedger.CACHED: 1},
+                         ledger.get_counts())
+
+        with open(os.path.join(self.output_dir, "c", "result"), "r") as f:
+            self.assertEqual("20", f.read())
+
+        # Reports which no longer exist are not referred to
+        shutil.rmtree(os.path.join(self.output_dir, "b"))
+        self.assertIsNone(cache.get({"name": "d", "envSize": 30, "seed": 1}))
+        self.assertEqual(os.path.join(self.output_dir, "a"),
+                         cache.get({"name": "d", "envSize": 20, "seed": 1}))
+
+    def test_unseeded_experiments_are_run(self):
+        # Replicates, made by copying a row under new names
+        experiments = [{"name": "a", "envSize": 20},
+                       {"name": "b", "envSize": 20}]
+        cache_dir = os.path.join(self.dir, "cache")
+        cache = ResultCache(cache_dir, self.output_dir, 10)
+        ledger = RunLedger(os.path.join(self.dir, "ledger.sqlite"))
+
+        results = SweepRunner(ledger, result_cache=cache).run(
+            self.run_experiment, experiments)
+
+        self.assertEqual(["a", "b"], [r.task["name"] for r in results])
+        self.assertEqual({RunLedger.COMPLETED: 2}, ledger.get_counts())
+        self.assertFalse(os.path.islink(os.path.join(self.output_dir, "b")))
+        self.assertFalse(os.path.isdir(cache_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
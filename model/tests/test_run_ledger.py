@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from runners.RunLedger import RunLedger
+from runners.SweepRunner import SweepRunner
+from runners.WorkerPool import WorkerPool
+
+
+def run_experiment(experiment):
+    if experiment["name"] == "bad":
+        raise ValueError("Bad experiment")
+
+    return experiment["name"]
+
+
+def get_dead_pid():
+    pid = os.fork()
+
+    if pid == 0:
+        os._exit(0)
+
+    os.waitpid(pid, 0)
+
+    return pid
+
+
+class TestRunLedger(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "ledger.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_claims(self):
+        ledger = RunLedger(self.path)
+
+        self.assertTrue(ledger.claim("a", {"envSize": 20}))
+        self.assertFalse(ledger.claim("a"))
+        self.assertTrue(ledger.claim("b"))
+        self.assertTrue(ledger.claim("c"))
+
+        ledger.complete("a")
+        ledger.fail("b", "Error")
+
+        # Runs of processes which died are claimed again, as are failures
+        ledger.connection.execute("UPDATE runs SET pid = ? WHERE name = ?",
+                                  (get_dead_pid(), "c"))
+        other = RunLedger(self.path)
+
+        self.assertFalse(other.claim("a"))
+        self.assertTrue(other.claim("b"))
+        self.assertTrue(other.claim("c"))
+
+        run, = ledger.get_runs(RunLedger.COMPLETED)
+        self.assertEqual("a", run["name"])
+        self.assertEqual({"envSize": 20}, run["parameters"])
+        self.assertGreaterEqual(run["runtime"], 0)
+        self.assertEqual({RunLedger.COMPLETED: 1, RunLedger.RUNNING: 2},
+                         ledger.get_counts())
+
+    def test_stale_runs_of_other_hosts(self):
+        ledger = RunLedger(self.path)
+
+        for name in ["a", "b"]:
+            ledger.claim(name)
+
+        # Both were started on another host, a long ago
+        ledger.connection.execute(
+            "UPDATE runs SET host = ?, start_time = start_time - ? "
+            "WHERE name = ?", ("other-host", 7200, "a"))
+        ledger.connection.execute("UPDATE runs SET host = ? WHERE name = ?",
+                                  ("other-host", "b"))
+
+        self.assertFalse(RunLedger(self.path).claim("a"))
+
+        other = RunLedger(self.path, stale_after=3600)
+        self.assertTrue(other.claim("a"))
+        self.assertFalse(other.claim("b"))
+
+    def test_sweep_resumes(self):
+        experiments = [{"name": n} for n in ["a", "bad", "b"]]
+
+        for pool in [None, WorkerPool(2)]:
+            path = os.path.join(self.dir, "%s.sqlite" % (pool is None))
+            runner = SweepRunner(RunLedger(path), pool)
+
+            results = runner.run(run_experiment, experiments)
+
+            self.assertEqual(["a", "b"], sorted(r.value for r in results
+                                                if r.succeeded))
+            self.assertEqual({"completed": 2, "failed": 1},
+                             runner.ledger.get_counts())
+            self.assertIn("Bad experiment", runner.ledger.get_runs(
+                RunLedger.FAILED)[0]["error"])
+
+            # Only the failed experiment is run again
+            results = SweepRunner(RunLedger(path), pool).run(
+                run_experiment, experiments)
+            self.assertEqual(["bad"], [r.task["name"] for r in results])
+
+
+if __name__ == '__main__':
+    unittest.main()
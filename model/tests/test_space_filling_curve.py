@@ -0,0 +1,18 @@
+import unittest
+
+from model.utils.SpaceFillingCurve import morton_keys
+
+
+class TestSpaceFillingCurve(unittest.TestCase):
+
+    def test_morton_keys_interleave_coordinates(self):
+        keys = morton_keys([(0, 0, 0), (0, 0, 1), (0, 1, 0), (1, 0, 0),
+                            (1, 1, 1), (2, 0, 0), (3, 5, 6)])
+
+        # x bits are the most significant of each group of three bits
+        self.assertEqual([0, 1, 2, 4, 7, 32, 0b011101110],
+                         [int(k) for k in keys])
+
+
+if __name__ == '__main__':
+    unittest.main()
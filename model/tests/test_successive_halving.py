@@ -0,0 +1,66 @@
+import unittest
+
+from calibration.SuccessiveHalving import SuccessiveHalving
+
+fidelities = [
+    {"envSize": 14, "diffusionSolveIterations": 2, "numEpochs": 60},
+    {"envSize": 16, "diffusionSolveIterations": 5, "numEpochs": 150},
+    {}
+]
+
+
+class TestSuccessiveHalving(unittest.TestCase):
+
+    def setUp(self):
+        self.candidates = [{"name": "c{0}".format(i), "envSize": 20,
+                            "diffusionSolveIterations": 10,
+                            "pWarburgSwitch": i / 10.} for i in range(9)]
+        self.runs = []
+
+    def evaluate(self, experiment, num_epochs):
+        self.runs.append((experiment, num_epochs))
+
+        # Candidate 4 fails, and is the best otherwise
+        if experiment["name"] == "c4":
+            raise ValueError("Run failed")
+
+        return abs(experiment["pWarburgSwitch"] - 0.42)
+
+    def test_run(self):
+        search = SuccessiveHalving(fidelities, 300)
+        best = search.run(self.evaluate, self.candidates)
+
+        self.assertEqual([9, 3, 1], [len(level) for level in search.levels])
+        self.assertEqual(13, len(search.trials))
+
+        # Each level runs with its overrides and number of epochs
+        for experiment, num_epochs in self.runs[:9]:
+            self.assertEqual(14, experiment["envSize"])
+            self.assertEqual(60, num_epochs)
+
+        for experiment, num_epochs in self.runs[9:12]:
+            self.assertEqual(16, experiment["envSize"])
+            self.assertEqual(5, experiment["diffusionSolveIterations"])
+            self.assertEqual(150, num_epochs)
+
+        experiment, num_epochs = self.runs[12]
+        self.assertEqual(20, experiment["envSize"])
+        self.assertEqual(10, experiment["diffusionSolveIterations"])
+        self.assertEqual(300, num_epochs)
+
+        # The failed candidate is never promoted
+        self.assertEqual(float("inf"), search.levels[0][-1]["ame"])
+        self.assertEqual(["c5", "c3", "c6"],
+                         [t["name"] for t in search.levels[1]])
+        self.assertEqual("c5", best[0]["name"])
+        self.assertEqual(2, best[0]["fidelity"])
+
+    def test_keep_fraction(self):
+        search = SuccessiveHalving(fidelities, 300, keep_fraction=0.5)
+        search.run(self.evaluate, self.candidates)
+
+        self.assertEqual([9, 5, 3], [len(level) for level in search.levels])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+from model.core.TimingWheel import TimingWheel
+
+
+class TestTimingWheel(unittest.TestCase):
+
+    def test_items_are_returned_when_due(self):
+        wheel = TimingWheel(4)
+
+        wheel.schedule("a", 2)
+        wheel.schedule("b", 0)
+        wheel.schedule("c", 2)
+
+        self.assertEqual(["b"], wheel.pop_due(0))
+        self.assertEqual([], wheel.pop_due(1))
+
+        # Wrapping around the wheel
+        wheel.schedule("d", 4)
+
+        self.assertEqual(["a", "c"], wheel.pop_due(2))
+        self.assertEqual([], wheel.pop_due(3))
+        self.assertEqual(["d"], wheel.pop_due(4))
+
+    def test_schedule_outside_horizon(self):
+        wheel = TimingWheel(4)
+        wheel.pop_due(5)
+
+        self.assertRaises(ValueError, wheel.schedule, "a", 4)
+        self.assertRaises(ValueError, wheel.schedule, "a", 9)
+
+
+if __name__ == '__main__':
+    unittest.main()
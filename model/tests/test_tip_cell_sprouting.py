@@ -0,0 +1,99 @@
+import numpy as np
+import unittest
+from panaxea.core.Model import Model
+
+from model.agents.EndothelialCell import TipCell
+from model.core.IndexedSchedule import IndexedSchedule
+from model.core.NumericalArrayGrid3D import NumericalArrayGrid3D
+from model.core.OccupancyGrid3D import OccupancyGrid3D
+from model.core.RandomStream import RandomStream
+from model.core.VesselGrid3D import VesselGrid3D
+from model.helpers.TipCellSproutingHelper import TipCellSproutingHelper
+
+
+class TestTipCellSprouting(unittest.TestCase):
+
+    def get_model(self, static_vessels=False):
+        model = Model(1, verbose=False)
+        model.schedule = IndexedSchedule()
+        model.properties = {
+            "envNames": {
+                "agentEnvName": "agentEnv",
+                "vegfEnvName": "vegfEnv",
+                "vesselEnvName": "vesselEnv"
+            },
+            "maxAgentDensity": 1,
+            "agents": {
+                "endothelialCells": {
+                    "baseOxygenEmissionRate": 1,
+                    "glucoseSecretionRate": 1,
+                    "minimumVegfConcentration": 1,
+                    "divisionDelay": 1
+                }
+            },
+            "engine": {
+                "batchedSprouting": True,
+                "staticVessels": static_vessels
+            }
+        }
+
+        model.random_stream = RandomStream(0)
+
+        OccupancyGrid3D("agentEnv", 5, 5, 5, model, model.random_stream)
+        vegf_env = NumericalArrayGrid3D("vegfEnv", 5, 5, 5, model)
+        VesselGrid3D("vesselEnv", 5, 5, 5, model)
+
+        # Two tip cells share the voxel with the highest VEGF concentration
+        # as their best neighbour. VEGF is always high enough to sprout.
+        vegf_env.set_values(10 + np.arange(125) / 125.)
+        vegf_env.grid[(2, 2, 2)] = 20
+        vegf_env.grid[(2, 3, 2)] = 19
+
+        for position in [(1, 2, 2), (3, 2, 2)]:
+            t = TipCell(model)
+            t.add_agent_to_grid("agentEnv", position, model)
+            model.schedule.add_agent(t)
+
+        return model
+
+    def check_sprouting(self, sequential):
+        model = self.get_model()
+        env = model.environments["agentEnv"]
+
+        TipCellSproutingHelper(model, sequential=sequential).step_main(model)
+
+        tip_positions = sorted(
+            t.environment_positions["agentEnv"]
+            for t in model.schedule.registry.get_agents("TipCell"))
+        trunk_positions = sorted(
+            t.environment_positions["agentEnv"]
+            for t in model.schedule.agents_to_schedule)
+
+        self.assertEqual([(2, 2, 2), (2, 3, 2)], tip_positions)
+        self.assertEqual([(1, 2, 2), (3, 2, 2)], trunk_positions)
+        self.assertEqual(4, env.occupancy[:-1].sum())
+        self.assertTrue(np.all(env.occupancy[:-1] <= 1))
+
+    def test_sequential_sprouting(self):
+        self.check_sprouting(True)
+
+    def test_simultaneous_sprouting(self):
+        self.check_sprouting(False)
+
+    def test_static_vessels(self):
+        model = self.get_model(static_vessels=True)
+        vessel_env = model.environments["vesselEnv"]
+
+        TipCellSproutingHelper(model).step_main(model)
+
+        self.assertEqual(0, len(model.schedule.agents_to_schedule))
+        self.assertEqual(2, vessel_env.vessels.sum())
+        self.assertEqual(1, vessel_env.vessels[
+            vessel_env.radius > 0].min())
+        self.assertEqual(2 * 1, vessel_env.oxygen_source_rates.sum())
+        self.assertEqual(
+            4, model.environments["agentEnv"].occupancy[:-1].sum())
+
+
+if __name__ == '__main__':
+    unittest.main()
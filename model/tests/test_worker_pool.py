@@ -0,0 +1,55 @@
+import os
+import signal
+import unittest
+
+from runners.WorkerPool import WorkerPool
+
+
+def run_task(task):
+    if task == "raise":
+        raise ValueError("Bad experiment")
+    elif task == "crash":
+        os.kill(os.getpid(), signal.SIGKILL)
+    elif task == "allocate":
+        return len(bytearray(512 * 1024 ** 2))
+
+    return task * 2, os.getpid()
+
+
+def get_address_space_size():
+    with open("/proc/self/statm", "r") as f:
+        return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+
+
+class TestWorkerPool(unittest.TestCase):
+
+    def test_crash_isolation(self):
+        pool = WorkerPool(max_workers=2)
+        results = dict((r.task, r) for r in
+                       pool.run(run_task, [1, "raise", 2, "crash", 3]))
+
+        self.assertEqual(5, len(results))
+
+        for task in [1, 2, 3]:
+            self.assertTrue(results[task].succeeded)
+            self.assertEqual(task * 2, results[task].value[0])
+            self.assertNotEqual(os.getpid(), results[task].value[1])
+
+        self.assertFalse(results["raise"].succeeded)
+        self.assertIn("Bad experiment", results["raise"].error)
+        self.assertIn("signal %d" % signal.SIGKILL, results["crash"].error)
+
+    @unittest.skipUnless(os.path.isfile("/proc/self/statm"),
+                         "Requires /proc")
+    def test_memory_limit(self):
+        pool = WorkerPool(memory_limit=get_address_space_size() + 128 *
+                          1024 ** 2)
+        result, = list(pool.run(run_task, ["allocate"]))
+
+        self.assertIn("MemoryError", result.error)
+        self.assertEqual(512 * 1024 ** 2, list(WorkerPool().run(
+            run_task, ["allocate"]))[0].value)
+
+
+if __name__ == '__main__':
+    unittest.main()
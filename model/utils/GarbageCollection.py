@@ -0,0 +1,23 @@
+import gc
+from contextlib import contextmanager
+
+
+@contextmanager
+def paused_collection():
+    """
+    Pauses the cyclic garbage collector for the duration of the block, Eg:
+    while creating agents in bulk. Collections are triggered by the number
+    of allocations, so creating tens of thousands of agents otherwise runs
+    many collections, each scanning all of the agents created so far, while
+    none of them is garbage.
+
+    The collector is resumed afterwards, if it was enabled on entry.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
@@ -0,0 +1,62 @@
+import numpy as np
+
+
+def sum_by_position(agents, values, agent_env_name, shape):
+    """
+    Sums a per-agent value over the voxels the agents occupy.
+
+    Voxels are indexed as in the diffusion helpers, by applying
+    np.ravel_multi_index to the agent coordinates over the grid shape.
+
+    Parameters
+    ----------
+    agents : list
+        The agents whose values should be summed
+    values : list
+        One value per agent, in the same order as agents. If None, agents
+        are counted instead.
+    agent_env_name : string
+        The name of the environment holding the agent positions
+    shape : tuple
+        The (xsize, ysize, zsize) shape of the grid
+
+    Returns
+    -------
+    numpy.ndarray
+        A flat array with one sum per voxel
+    """
+    num_voxels = shape[0] * shape[1] * shape[2]
+
+    if len(agents) == 0:
+        return np.zeros(num_voxels)
+
+    coordinates = np.array(
+        [a.environment_positions[agent_env_name] for a in agents]).T
+    indices = np.ravel_multi_index(coordinates, shape)
+
+    return np.bincount(indices, weights=values,
+                       minlength=num_voxels).astype(float)
+
+
+def get_occupied_values(values, counts):
+    """
+    Returns the values at the voxels holding cells represented as counts
+    per voxel, along with the number of cells at each, so statistics over
+    the cells can be weighted by the counts rather than computed over one
+    value per cell.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        A flat array with one value per voxel
+    counts : numpy.ndarray
+        A flat array with the number of cells at each voxel
+
+    Returns
+    -------
+    tuple
+        The values and counts of the voxels holding cells
+    """
+    occupied = np.flatnonzero(counts)
+
+    return values[occupied], counts[occupied]
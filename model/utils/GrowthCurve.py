@@ -0,0 +1,157 @@
+"""
+Functions relating the number of cancer cell agents of a model to tumour
+volumes, and the expected growth curve of the tumour.
+"""
+import numpy as np
+from numpy.polynomial import Polynomial
+
+
+def convert_num_agents_to_volume(num_cancer_cell_agents,
+                                 cancer_cells_per_agent,
+                                 cancer_cell_volume):
+    """
+    Given an amount of cancer cell agents, converts this to the
+    corresponding volume.
+
+    Parameters
+    ----------
+    num_cancer_cell_agents : int
+        The number of cancer cell agents present at a given time
+    cancer_cells_per_agent : int
+        Number of cancer cells we assume each agent represents
+    cancer_cell_volume : int
+        Volume of a cancer cell - This should be provided in um3
+
+    Returns
+    -------
+    float
+        The calculated volume - in mm3
+    """
+
+    num_cancer_cells = num_cancer_cell_agents * cancer_cells_per_agent
+    volume_mm_3 = num_cancer_cells * cancer_cell_volume
+    volume_um_3 = (1. * volume_mm_3) / 10 ** 9
+    return volume_um_3
+
+
+def get_fitness_function_polynomial():
+    """
+    Returns a polynomial function p that can be used to calculate the expected
+    tumour volume at a time t, 0 <= t <= 300. The time is expressed in DAYS.
+
+    Eg: p(2) returns the expected volume at day 2.
+
+    Returns
+    -------
+    Polynomial
+        The polynomial function.
+    """
+    xs = [0, 13, 24]
+    ys = [0, 50, 150]
+    p = Polynomial.fit(xs, ys, 2)
+
+    return p
+
+
+def epoch_to_day(epoch, epoch_duration):
+    """
+    Given an epoch, calculates the real-time duration in days. (This may
+    return a floating point value, such as day 14.73)
+    Parameters
+    ----------
+    epoch : int
+        The epoch we wish to convert
+    epoch_duration : int
+        The duration of a single epoch, in hours
+
+    Returns
+    -------
+    float
+        The corresponding day value
+    """
+
+    return round(epoch * epoch_duration / 24., 2)
+
+
+def get_cancer_volume_series_from_agent_nums(cancer_cell_num, max_epochs):
+    """
+    From a series of cancer cell numbers returns a series of calculated
+    tumour volumes in time
+    Parameters
+    ----------
+    cancer_cell_num : list
+        List of integers reporting the number of cancer cell agents in time
+    max_epochs : int
+        Maximum number of epochs the simulation is expected to run for
+    Returns
+    -------
+    list
+        List where each element reports the calculated volume at such an epoch
+    """
+    num_epochs = len(cancer_cell_num)
+
+    if num_epochs < max_epochs:
+        missing_epochs = max_epochs - num_epochs
+        padding = [cancer_cell_num[-1]] * missing_epochs
+        cancer_cell_num = cancer_cell_num + padding
+
+    cancer_volumes = [convert_num_agents_to_volume(n, 120, 5000)
+                      for n in cancer_cell_num]
+
+    return cancer_volumes
+
+
+def get_expected_volume_series(max_epochs, epoch_duration):
+    """
+    Returns a list where each element corresponds to the expected volume.
+
+    Values are returned in m33
+
+    Parameters
+    ----------
+    max_epochs : int
+        Maximum number of epochs the simulation is expected to run for
+    epoch_duration : int
+        Number of hours per epoch
+
+    Returns
+    -------
+    list
+        List where each element reports the expected volume at such an
+        epoch, in mm3
+    """
+
+    p = get_fitness_function_polynomial()
+    day_values = [epoch_to_day(e, epoch_duration) for e in range(max_epochs)]
+    expected_volumes = [p(d) for d in day_values]
+
+    return expected_volumes
+
+
+def get_absolute_mean_error(cancer_cell_num, max_epochs, epoch_duration):
+    """
+    Returns the absolute mean error between the expected and actual growth
+    curves of a run, the objective runs are calibrated against (see
+    add_ame_to_experiments in ModelErrorFunctions).
+
+    Parameters
+    ----------
+    cancer_cell_num : list
+        List of integers reporting the number of cancer cell agents in time,
+        as saved by AgentCounter under agentNums
+    max_epochs : int
+        Maximum number of epochs the simulation is expected to run for
+    epoch_duration : int
+        Number of hours per epoch
+
+    Returns
+    -------
+    float
+        The absolute mean error, in mm3
+    """
+    cancer_volumes = get_cancer_volume_series_from_agent_nums(
+        list(cancer_cell_num), max_epochs)
+    expected_volumes = get_expected_volume_series(max_epochs, epoch_duration)
+
+    return float(np.mean(np.abs(np.array(expected_volumes[:max_epochs]) -
+                                cancer_volumes[:max_epochs])))
@@ -0,0 +1,158 @@
+import json
+import numpy as np
+import os
+
+from model.utils.OxygenHIFRelationsGenerator import OxygenHIFRelationsGenerator
+
+
+class HifRelationsCache(object):
+    """
+    Memoizes the coefficients of the HIF relations generated by
+    OxygenHIFRelationsGenerator, which only depend on a few experiment
+    parameters (listed in inputs) that most experiments of a sweep share.
+
+    Coefficients can be computed for a whole experiments file up front with
+    precompile, which fits each distinct combination of inputs once, and
+    saved to and loaded from a json file, so they are not fitted again by
+    later sweeps.
+
+    Attributes
+    ----------
+    path : string, optional
+        A json file coefficients are loaded from, if it exists, and saved to
+        by default. Defaults to None, in which case coefficients are only
+        kept in memory.
+    """
+
+    # Experiment parameters the relations depend on
+    inputs = ["minHIF", "maxHIF", "ultraHypoxicThreshold", "hypoxicThreshold",
+              "enhancedHypoxicThreshold", "baseOxygenMetabolicRate",
+              "minPSynthesis"]
+
+    def __init__(self, path=None):
+        self.path = None
+        self.relations = dict()
+
+        if path is not None:
+            self.set_path(path)
+
+    def set_path(self, path):
+        """
+        Sets the json file coefficients are saved to by default, adding
+        the coefficients saved to it, if it exists, to the cache. Used to
+        persist the cache shared by all models of a process (see
+        model_warburg) across runs.
+        """
+        self.path = path
+
+        if os.path.isfile(path):
+            self.load(path)
+
+    def get_key(self, p):
+        """
+        Returns the tuple of inputs of an experiment, which coefficients are
+        cached under.
+        """
+        return tuple(float(p[i]) for i in self.inputs)
+
+    def get(self, p):
+        """
+        Returns the coefficients of the HIF relations of an experiment,
+        fitting them if they are not cached.
+
+        Parameters
+        ----------
+        p : dict
+            The experiment, as a row of an experiments file
+
+        Returns
+        -------
+        dict
+            The coefficients of each relation, as lists. These are copies,
+            so may be modified by the caller.
+        """
+        key = self.get_key(p)
+        relations = self.relations.get(key)
+
+        if relations is None:
+            relations = self.relations[key] = self.__fit(key)
+
+        return dict((name, list(coeffs)) for name, coeffs in
+                    relations.items())
+
+    def precompile(self, experiments):
+        """
+        Fits the coefficients of all the distinct combinations of inputs in
+        a set of experiments which are not yet cached.
+
+        Parameters
+        ----------
+        experiments : DataFrame
+            The experiments, as read from an experiments file
+
+        Returns
+        -------
+        int
+            The number of combinations fitted
+        """
+        keys = np.unique(
+            experiments[self.inputs].to_numpy(dtype=float), axis=0)
+        missing = [k for k in map(tuple, keys.tolist())
+                   if k not in self.relations]
+
+        for key in missing:
+            self.relations[key] = self.__fit(key)
+
+        return len(missing)
+
+    def save(self, path=None):
+        """
+        Saves the cached coefficients to a json file, by default the path of
+        the cache. The file is replaced in one step, so readers never see a
+        partially written file.
+        """
+        path = self.path if path is None else path
+        entries = [{"inputs": list(key), "relations": relations}
+                   for key, relations in self.relations.items()]
+
+        with open(path + ".tmp", "w") as f:
+            json.dump(entries, f)
+
+        os.replace(path + ".tmp", path)
+
+    def load(self, path):
+        """
+        Adds the coefficients saved to a json file to the cache.
+        """
+        with open(path, "r") as f:
+            entries = json.load(f)
+
+        for entry in entries:
+            self.relations[tuple(entry["inputs"])] = entry["relations"]
+
+    def __fit(self, key):
+        p = dict(zip(self.inputs, key))
+
+        ohrg = OxygenHIFRelationsGenerator(
+            min_hif=p["minHIF"],
+            max_hif=p["maxHIF"],
+            ultra_hypoxia_threshold=p["ultraHypoxicThreshold"],
+            hypoxia_threshold=p["hypoxicThreshold"],
+            enhanced_hypoxic_threshold=p["enhancedHypoxicThreshold"],
+            base_oxygen_metabolic_rate=p["baseOxygenMetabolicRate"],
+            min_p_synthesis=p["minPSynthesis"])
+
+        ultra_hypoxia_coeffs, hypoxia_coeffs = ohrg.get_oxygen_to_hif()
+
+        relations = {
+            "ultraHypoxic": ultra_hypoxia_coeffs,
+            "hypoxic": hypoxia_coeffs,
+            "warburg": ohrg.get_oxygen_to_hif_warburg(),
+            "hifToMetabolicRate": ohrg.get_hif_to_metabolic_rate(),
+            "hifToProliferationRate": ohrg.get_hif_to_p_synthesis(),
+            "hifToVegfSecretionRate": ohrg.get_hif_to_vegf()
+        }
+
+        # Plain floats, so cached and saved coefficients are the same
+        return dict((name, [float(c) for c in coeffs]) for name, coeffs in
+                    relations.items())
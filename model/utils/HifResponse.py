@@ -0,0 +1,114 @@
+import numpy as np
+from numpy.polynomial import Polynomial
+
+
+class HifResponse(object):
+    """
+    Batched versions of the HIF-related calculations carried out by each
+    CancerCell: the HIF expression rate a cell moves towards given the oxygen
+    concentration, and the metabolic rate, probability of synthesis and VEGF
+    secretion rate mediated by HIF. All methods take and return arrays, with
+    one value per cell (or group of cells sharing a state).
+
+    The polynomials are built once from the cancer cell properties rather
+    than once per cell and call.
+
+    Attributes
+    ----------
+    cancer_cell_props : dict
+        The cancer cell properties, as in model.properties["agents"][
+        "cancerCells"]
+    """
+
+    def __init__(self, cancer_cell_props):
+        domains = cancer_cell_props["domains"]
+        coeffs = cancer_cell_props["oxygenToHifCoeffs"]
+        hif_range = cancer_cell_props["HIFRange"]
+
+        self.hypoxic_domain = domains["hypoxic"]
+        self.ultra_hypoxic_domain = domains["ultraHypoxic"]
+        self.warburg_hypoxic_domain = domains["warburgHypoxic"]
+
+        self.oxygen_to_hif_hypoxic = Polynomial(
+            coef=coeffs["hypoxic"],
+            domain=[self.ultra_hypoxic_domain, self.hypoxic_domain])
+        self.oxygen_to_hif_ultra_hypoxic = Polynomial(
+            coef=coeffs["ultraHypoxic"],
+            domain=[0.0, self.ultra_hypoxic_domain])
+        self.oxygen_to_hif_warburg = Polynomial(
+            coef=coeffs["warburg"],
+            domain=[self.ultra_hypoxic_domain, self.warburg_hypoxic_domain])
+
+        self.hif_to_metabolic_rate = Polynomial(
+            coef=cancer_cell_props["hifToMetabolicRateCoeffs"],
+            domain=hif_range)
+        self.hif_to_p_synthesis = Polynomial(
+            coef=cancer_cell_props["hifToProliferationRateCoeffs"],
+            domain=hif_range)
+        self.hif_to_vegf_secretion_rate = Polynomial(
+            coef=cancer_cell_props["hifToVegfSecretionRateCoeffs"],
+            domain=hif_range)
+
+        self.base_hif_rate = cancer_cell_props["baseHifRate"]
+        self.min_hif = cancer_cell_props["minHIF"]
+        self.max_vegf = cancer_cell_props["maxVegfSecretionRate"]
+
+    def get_hif_rates(self, oxygen, warburg, current_rates):
+        """
+        As CancerCell._update_hif_expression_rate.
+
+        Parameters
+        ----------
+        oxygen : numpy.ndarray
+            The oxygen concentration at each cell
+        warburg : numpy.ndarray
+            Whether each cell has switched to warburg metabolism
+        current_rates : numpy.ndarray
+            The current HIF expression rate of each cell
+
+        Returns
+        -------
+        numpy.ndarray
+            The new HIF expression rate of each cell
+        """
+        ultra_hypoxic_rates = self.oxygen_to_hif_ultra_hypoxic(oxygen)
+        target_rates = np.where(
+            warburg,
+            np.select([oxygen > self.warburg_hypoxic_domain,
+                       oxygen > self.ultra_hypoxic_domain],
+                      [self.min_hif, self.oxygen_to_hif_warburg(oxygen)],
+                      ultra_hypoxic_rates),
+            np.select([oxygen > self.hypoxic_domain,
+                       oxygen > self.ultra_hypoxic_domain],
+                      [1, self.oxygen_to_hif_hypoxic(oxygen)],
+                      ultra_hypoxic_rates))
+
+        max_shift_per_epoch = 0.1
+
+        new_rates = np.where(
+            current_rates > target_rates,
+            np.maximum(0, current_rates - np.minimum(
+                max_shift_per_epoch, current_rates - target_rates)),
+            np.minimum(current_rates + np.minimum(
+                max_shift_per_epoch, target_rates - current_rates), 16))
+
+        return self.base_hif_rate * new_rates
+
+    def get_metabolic_rates(self, hif_rates):
+        """
+        As CancerCell._update_metabolic_rate.
+        """
+        return self.hif_to_metabolic_rate(hif_rates)
+
+    def get_p_synthesis(self, hif_rates):
+        """
+        As CancerCell._update_p_synthesis.
+        """
+        return self.hif_to_p_synthesis(hif_rates)
+
+    def get_vegf_secretion_rates(self, hif_rates):
+        """
+        As CancerCell._update_vegf_secretion_rate.
+        """
+        return self.max_vegf * np.clip(
+            self.hif_to_vegf_secretion_rate(hif_rates), 0, 1)
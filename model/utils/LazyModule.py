@@ -0,0 +1,43 @@
+import importlib
+
+
+class LazyModule(object):
+    """
+    Stands in for a module which is only imported on first use, the first
+    time one of its attributes is accessed, Eg:
+
+        fipy = LazyModule("fipy")
+        mesh = fipy.Grid3D(...)
+
+    Used for the heavy dependencies (plotting, fipy, aws) of code paths which
+    not every process runs, so importing the model stays fast for worker
+    processes.
+
+    Attributes
+    ----------
+    name : string
+        The name of the module
+    before_import : callable, optional
+        Called, without arguments, right before the module is imported. Eg:
+        to configure the package it belongs to. Defaults to None.
+    """
+
+    def __init__(self, name, before_import=None):
+        self.__name = name
+        self.__before_import = before_import
+        self.__module = None
+
+    def __getattr__(self, attr):
+        if self.__module is None:
+            if self.__before_import is not None:
+                self.__before_import()
+
+            self.__module = importlib.import_module(self.__name)
+
+        return getattr(self.__module, attr)
+
+    def is_imported(self):
+        """
+        Returns whether the module has been imported by this stand in.
+        """
+        return self.__module is not None
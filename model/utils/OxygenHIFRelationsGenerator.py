@@ -1,11 +1,7 @@
-import matplotlib
-
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-
-plt.switch_backend("agg")
 from numpy.polynomial import Polynomial
 
+from model.utils.Plotting import plt
+
 
 class OxygenHIFRelationsGenerator():
     """
@@ -0,0 +1,14 @@
+from model.utils.LazyModule import LazyModule
+
+
+def use_agg_backend():
+    """
+    Selects the non-interactive Agg backend, so plots can be rendered to
+    files on machines without a display.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+# pyplot, imported with the Agg backend the first time it is used
+plt = LazyModule("matplotlib.pyplot", before_import=use_agg_backend)
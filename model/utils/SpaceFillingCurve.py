@@ -0,0 +1,38 @@
+import numpy as np
+
+
+def _spread_bits(values):
+    # Spreads the lower 21 bits of each value so that there are two zero
+    # bits between consecutive bits (Eg: 0b111 -> 0b1001001)
+    values = values.astype(np.uint64) & np.uint64(0x1fffff)
+    values = (values | values << np.uint64(32)) & np.uint64(0x1f00000000ffff)
+    values = (values | values << np.uint64(16)) & np.uint64(0x1f0000ff0000ff)
+    values = (values | values << np.uint64(8)) & np.uint64(0x100f00f00f00f00f)
+    values = (values | values << np.uint64(4)) & np.uint64(0x10c30c30c30c30c3)
+    values = (values | values << np.uint64(2)) & np.uint64(0x1249249249249249)
+    return values
+
+
+def morton_keys(positions):
+    """
+    Computes the Morton (Z-order) key of each of a set of 3D positions, by
+    interleaving the bits of their coordinates. Sorting positions by their
+    key visits them along a space-filling curve, so that positions close in
+    the sorted order are close in space.
+
+    Parameters
+    ----------
+    positions : array-like
+        An (n, 3) array of non-negative integer (x, y, z) positions, with
+        coordinates below 2 ** 21
+
+    Returns
+    -------
+    numpy.ndarray
+        An array of n uint64 keys
+    """
+    positions = np.asarray(positions, dtype=np.int64).reshape(-1, 3)
+
+    return (_spread_bits(positions[:, 0]) << np.uint64(2)) | \
+        (_spread_bits(positions[:, 1]) << np.uint64(1)) | \
+        _spread_bits(positions[:, 2])
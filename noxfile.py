@@ -7,3 +7,6 @@ def lint(session):
     session.run("flake8", "./experiments")
     session.run("flake8", "./model")
     session.run("flake8", "./aws")
+    session.run("flake8", "./benchmarks")
+    session.run("flake8", "./runners")
+    session.run("flake8", "./calibration")
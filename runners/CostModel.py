@@ -0,0 +1,96 @@
+import numpy as np
+
+
+class CostModel(object):
+    """
+    Predicts the runtime of experiments from their parameters, as a
+    log-linear model fitted on the runtimes of past runs, so a sweep can
+    dispatch the longest experiments first and not be left waiting on a
+    few long ones at its end.
+
+    log(runtime) is modelled as linear in the logs of log_features (which
+    scale the number of agents, and so runtime, multiplicatively) and in
+    linear_features (which mostly decide whether the tumour grows or dies
+    early).
+
+    Until fitted on enough runs, runtime is taken to scale with the
+    number of positions of the environment times numCancerCells.
+
+    Attributes
+    ----------
+    log_features : list, optional
+        Defaults to envSize and numCancerCells
+    linear_features : list, optional
+        Defaults to pWarburgSwitch and minimumOxygenConcentration
+    """
+
+    def __init__(self, log_features=None, linear_features=None):
+        self.log_features = log_features or ["envSize", "numCancerCells"]
+        self.linear_features = linear_features or [
+            "pWarburgSwitch", "minimumOxygenConcentration"]
+        self.coeffs = None
+
+    def fit(self, runs):
+        """
+        Fits the model on past runs, skipping those without a runtime or
+        missing any of the features.
+
+        Parameters
+        ----------
+        runs : list
+            The runs, as returned by RunLedger.get_runs, or any dicts with
+            "runtime" and "parameters" keys
+
+        Returns
+        -------
+        int
+            The number of runs the model was fitted on. If fewer than the
+            number of coefficients, the model is left unfitted.
+        """
+        features = self.log_features + self.linear_features
+        runs = [r for r in runs if r["runtime"] and r["parameters"] and
+                all(f in r["parameters"] for f in features)]
+
+        if len(runs) < len(features) + 1:
+            return len(runs)
+
+        xs = self.__get_design_matrix([r["parameters"] for r in runs])
+        ys = np.log([r["runtime"] for r in runs])
+
+        self.coeffs = np.linalg.lstsq(xs, ys, rcond=None)[0]
+
+        return len(runs)
+
+    def predict(self, experiments):
+        """
+        Returns the predicted runtime of each of a list of experiments, in
+        seconds once fitted, or relative otherwise.
+        """
+        if self.coeffs is None:
+            return np.array([float(e["envSize"]) ** 3 * e["numCancerCells"]
+                             for e in experiments])
+
+        return np.exp(self.__get_design_matrix(experiments).dot(
+            self.coeffs))
+
+    def order(self, experiments):
+        """
+        Returns a list of experiments sorted by decreasing predicted
+        runtime. Dispatched in this order to workers taking the next
+        experiment as they become free, this is the longest processing time
+        first schedule, whose makespan is at most 4/3 of the optimal one.
+        """
+        experiments = list(experiments)
+        costs = self.predict(experiments)
+
+        # Stable, so experiments with the same cost keep their order
+        return [experiments[i] for i in np.argsort(-costs, kind="stable")]
+
+    def __get_design_matrix(self, experiments):
+        columns = [np.ones(len(experiments))]
+        columns += [np.log([float(e[f]) for e in experiments])
+                    for f in self.log_features]
+        columns += [np.array([float(e[f]) for e in experiments])
+                    for f in self.linear_features]
+
+        return np.column_stack(columns)
@@ -0,0 +1,127 @@
+import os
+import shutil
+import tempfile
+
+from analyzers.EnsembleOutput import EnsembleOutput, get_series
+from model.core.RandomStream import RandomStream
+from model.models.model_warburg import generate_model, generate_properties, \
+    layout_cache
+from runners.ExperimentRunner import remove_heartbeats
+from runners.WorkerPool import run_in_process
+
+
+class Ensemble(object):
+    """
+    Runs seeded replicates of an experiment, aggregating their outputs into
+    an EnsembleOutput as they complete.
+
+    Replicates only differ by the seed of their random stream, so the
+    properties of the experiment (including its HIF relations) are
+    generated once, and its initial layout built once, before any replicate
+    is run. Replicates run in a WorkerPool are forked after both, so share
+    them rather than each computing their own.
+
+    Attributes
+    ----------
+    experiment : dict
+        The experiment, as a row of an experiments file
+    num_replicates : int
+        The number of replicates
+    num_epochs : int
+        The number of epochs each replicate is run for
+    output_dir : string, optional
+        If given, the report of each replicate is saved to a directory of it
+        named after the experiment and seed. Defaults to None, in which case
+        reports are discarded.
+    seed : int, optional
+        The seed of the first replicate, the others being seeded with the
+        following integers. Defaults to the seed of the experiment, or one
+        drawn from system entropy if it has none.
+    """
+
+    def __init__(self, experiment, num_replicates, num_epochs,
+                 output_dir=None, seed=None):
+        self.experiment = experiment
+        self.num_replicates = num_replicates
+        self.num_epochs = num_epochs
+        self.output_dir = output_dir
+
+        self.properties = generate_properties(experiment)
+
+        if seed is None:
+            seed = RandomStream(self.properties["seed"]).seed
+
+        self.seeds = [seed + i for i in range(num_replicates)]
+        self.failed = []
+
+    def run_replicate(self, seed):
+        """
+        Runs the replicate of a seed.
+
+        Returns
+        -------
+        dict
+            The series of its output, as returned by get_series
+        """
+        if self.output_dir is None:
+            out_dir = tempfile.mkdtemp()
+        else:
+            out_dir = "{0}/{1}_seed_{2}".format(
+                self.output_dir, self.experiment["name"], seed)
+
+            if not os.path.isdir(out_dir):
+                os.mkdir(out_dir)
+
+        try:
+            properties = dict(self.properties, seed=seed, outDir=out_dir)
+            model = generate_model(properties, self.num_epochs)
+            remove_heartbeats(model)
+            model.run()
+        finally:
+            if self.output_dir is None:
+                shutil.rmtree(out_dir)
+
+        return get_series(model.output)
+
+    def run(self, pool=None, on_replicate=None):
+        """
+        Runs the replicates.
+
+        Parameters
+        ----------
+        pool : WorkerPool, optional
+            The pool replicates are run in. Defaults to None, in which case
+            they are run one after another in the current process.
+        on_replicate : callable, optional
+            Called with the ensemble output after each replicate is added,
+            Eg: to save it
+
+        Returns
+        -------
+        EnsembleOutput
+            The aggregated outputs of the replicates which succeeded. Seeds
+            of those which failed are recorded in failed.
+        """
+        # Built before workers are forked, so they share it
+        layout_cache.get(self.properties)
+
+        if pool is None:
+            results = run_in_process(self.run_replicate, self.seeds)
+        else:
+            results = pool.run(self.run_replicate, self.seeds)
+
+        ensemble_output = EnsembleOutput()
+
+        for result in results:
+            if not result.succeeded:
+                print("Replicate with seed {0} failed:\n{1}".format(
+                    result.task, result.error))
+                self.failed.append(result.task)
+                continue
+
+            ensemble_output.add(result.value)
+
+            if on_replicate is not None:
+                on_replicate(ensemble_output)
+
+        return ensemble_output
@@ -0,0 +1,103 @@
+import os
+import shutil
+import sys
+import tempfile
+
+from analyzers.SingleReportModelAnalyzers import get_post_execution_analysis
+from model.helpers.HeartbeatHelper import HeartbeatHelper
+from model.models.model_warburg import generate_model, generate_properties
+from model.utils.Plotting import plt
+
+
+def run_experiment(experiment, config, num_epochs, run_analysis=True):
+    """
+    Runs an experiment, saving its report to a directory of the output
+    directory named after it, as Main.py does for each experiment.
+
+    Parameters
+    ----------
+    experiment : dict
+        The experiment, as a row of an experiments file
+    config : dict
+        The configuration, as loaded from config.json
+    num_epochs : int
+        The number of epochs to run the experiment for
+    run_analysis : bool, optional
+        Whether the post execution analysis is run. Defaults to True.
+
+    Returns
+    -------
+    string
+        The directory of the report
+    """
+    experiment_dir = "{0}/{1}".format(config["output_dir"],
+                                      experiment["name"])
+
+    if not os.path.isdir(experiment_dir):
+        os.mkdir(experiment_dir)
+
+    print("Running {0}".format(experiment["name"]))
+    print("Configuring...")
+    properties = generate_properties(experiment)
+    properties["outDir"] = experiment_dir
+    properties["config"] = config
+    print("Generating model...")
+    model = generate_model(properties, num_epochs)
+    print("Simulating...")
+    model.run()
+
+    if run_analysis:
+        print("Running analysis...")
+        get_post_execution_analysis(experiment_dir)
+
+    print("All done!")
+
+    return experiment_dir
+
+
+def remove_heartbeats(model):
+    """
+    Removes the HeartbeatHelper of a model, for runs (Eg: warm ups,
+    calibration runs) which should not report to the aws messages queue.
+    """
+    model.schedule.helpers = [h for h in model.schedule.helpers
+                              if not isinstance(h, HeartbeatHelper)]
+
+
+def warm_up(experiment, env_size=12):
+    """
+    Imports everything running an experiment needs, and runs a small
+    version of an experiment for an epoch, so the one-off costs of a run
+    (lazy imports, fipy solver set up, caches) are paid once in a process
+    which then forks a WorkerPool.
+
+    Parameters
+    ----------
+    experiment : dict
+        The experiment, as a row of an experiments file. Usually the first
+        experiment to run.
+    env_size : int, optional
+        The size of the environment of the small experiment. Defaults to 12,
+        the smallest holding the initial tumour.
+    """
+    experiment = dict(experiment, envSize=env_size)
+    out_dir = tempfile.mkdtemp()
+    stdout = sys.stdout
+
+    # Plots are only drawn by the analysis, which is not run
+    plt.get_backend()
+
+    try:
+        sys.stdout = open(os.devnull, "w")
+
+        properties = generate_properties(experiment)
+        properties["outDir"] = out_dir
+        model = generate_model(properties, 1)
+
+        # Heartbeats would report the warm up as a run
+        remove_heartbeats(model)
+        model.run()
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+        shutil.rmtree(out_dir)
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import shutil
+
+# Columns which name or index experiments, rather than parameterise them
+ignored_columns = ["name", "Unnamed: 0"]
+
+code_version = None
+
+
+def get_code_version():
+    """
+    Returns a hash of the source of the model package, so results of
+    different versions of the model are cached under different keys.
+    Computed once per process.
+    """
+    global code_version
+
+    if code_version is None:
+        sha = hashlib.sha256()
+        root = os.path.join(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__))), "model")
+
+        for directory, directories, files in os.walk(root):
+            directories.sort()
+
+            for f in sorted(files):
+                if f.endswith(".py"):
+                    path = os.path.join(directory, f)
+                    sha.update(os.path.relpath(path, root).encode("utf-8"))
+
+                    with open(path, "rb") as source:
+                        sha.update(source.read())
+
+        code_version = sha.hexdigest()
+
+    return code_version
+
+
+def get_run_key(experiment, num_epochs, version=None):
+    """
+    Returns the key the result of running an experiment is cached under: a
+    hash of its parameters (all columns but its name), seed, number of
+    epochs and the version of the model.
+
+    Parameters are compared as floats, so the same row is given the same
+    key whether a column was read as ints or floats.
+
+    Unseeded experiments draw their seed when run, so two runs of the same
+    parameters are different runs (Eg: replicates made by copying a row
+    under a new name), and are not given a key.
+
+    Parameters
+    ----------
+    experiment : dict
+        The experiment, as a row of an experiments file
+    num_epochs : int
+        The number of epochs it is run for
+    version : string, optional
+        The version of the model. Defaults to get_code_version().
+
+    Returns
+    -------
+    string
+        The key, or None if the experiment is unseeded
+    """
+    def normalise(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return value
+
+    parameters = dict((k, normalise(v)) for k, v in experiment.items()
+                      if k not in ignored_columns)
+
+    # Unseeded experiments have no seed column, or an empty one
+    seed = parameters.pop("seed", None)
+    if seed is None or seed != seed:
+        return None
+
+    run = {
+        "parameters": parameters,
+        "seed": int(seed),
+        "numEpochs": int(num_epochs),
+        "version": version or get_code_version()
+    }
+
+    return hashlib.sha256(
+        json.dumps(run, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResultCache(object):
+    """
+    Content addressed cache of experiment results: maps the key of a run
+    (see get_run_key) to the report of a completed run, so an experiment
+    repeating the parameters of one already run (Eg: under a different
+    name) refers to its report rather than being simulated again.
+
+    Entries are kept as a json file per key in a directory, written
+    atomically, so processes sharing the directory can add to the cache
+    concurrently. Subclasses may keep entries elsewhere by overriding
+    read_entry, write_entry, report_exists and refer (Eg:
+    aws.S3ResultCache).
+
+    Attributes
+    ----------
+    directory : string
+        The directory entries are kept in, created when the first entry is
+        written
+    output_dir : string
+        The directory reports are saved to, named after their experiment
+    num_epochs : int
+        The number of epochs experiments are run for
+    """
+
+    def __init__(self, directory, output_dir, num_epochs):
+        self.directory = directory
+        self.output_dir = output_dir
+        self.num_epochs = num_epochs
+
+    def get_key(self, experiment):
+        return get_run_key(experiment, self.num_epochs)
+
+    def get_report_location(self, experiment):
+        return "{0}/{1}".format(self.output_dir, experiment["name"])
+
+    def get(self, experiment):
+        """
+        Returns the report of a completed run with the same key as an
+        experiment, or None if there is none, its report no longer exists
+        or the experiment is unseeded.
+        """
+        key = self.get_key(experiment)
+        entry = None if key is None else self.read_entry(key)
+
+        if entry is None or not self.report_exists(entry["report"]):
+            return None
+
+        return entry["report"]
+
+    def add(self, experiment, report=None):
+        """
+        Records the report of a completed run of an experiment, by default
+        its report location. Runs of unseeded experiments are not recorded.
+        """
+        key = self.get_key(experiment)
+
+        if key is None:
+            return
+
+        report = report or self.get_report_location(experiment)
+
+        self.write_entry(key, {
+            "name": experiment["name"],
+            "report": report
+        })
+
+    def read_entry(self, key):
+        path = os.path.join(self.directory, key + ".json")
+
+        if not os.path.isfile(path):
+            return None
+
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def write_entry(self, key, entry):
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        path = os.path.join(self.directory, key + ".json")
+
+        with open(path + ".tmp", "w") as f:
+            json.dump(entry, f)
+
+        os.replace(path + ".tmp", path)
+
+    def report_exists(self, report):
+        return os.path.isdir(report)
+
+    def refer(self, experiment, report):
+        """
+        Satisfies an experiment by reference to the report of a run with
+        the same key, linking its report location to that report.
+        """
+        location = self.get_report_location(experiment)
+
+        if os.path.abspath(location) == os.path.abspath(report):
+            return location
+
+        # Eg: left by a failed run
+        if os.path.islink(location):
+            os.remove(location)
+        elif os.path.isdir(location):
+            shutil.rmtree(location)
+
+        os.symlink(os.path.relpath(report, os.path.dirname(location)),
+                   location)
+
+        return location
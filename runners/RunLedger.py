@@ -0,0 +1,194 @@
+import errno
+import json
+import os
+import socket
+import sqlite3
+import time
+
+
+class RunLedger(object):
+    """
+    Records the state of each run of a sweep in a sqlite database, so a
+    sweep which is stopped and restarted resumes where it left off, and
+    several sweeps (Eg: on different machines sharing a file system) can
+    share the runs of an experiments file.
+
+    A run is keyed by the name of its experiment, and is in one of the
+    states below, cached runs being those satisfied by reference to the
+    report of an identical run (see ResultCache). The parameters of the
+    experiment are recorded along with its runtime, so runtimes can be
+    predicted for new experiments (see CostModel). Runs which are
+    completed, cached, or running in a live process, are not claimed
+    again; failed runs are retried.
+
+    Whether a process on this host is live is checked from its pid.
+    Processes on other hosts can not be checked, so their runs are taken as
+    live until they have been running for longer than stale_after, after
+    which they are taken as crashed and claimed again.
+
+    Attributes
+    ----------
+    path : string
+        The database file, created if it does not exist
+    timeout : float, optional
+        Seconds to wait for the database while other processes write to it.
+        Defaults to 60.
+    stale_after : float, optional
+        Seconds after which runs started on other hosts, and not yet
+        finished, are claimed again. Should exceed the runtime of any
+        experiment. Defaults to None, in which case they are never claimed
+        again.
+    """
+
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CACHED = "cached"
+
+    def __init__(self, path, timeout=60, stale_after=None):
+        self.path = path
+        self.stale_after = stale_after
+        self.host = socket.gethostname()
+        self.pid = os.getpid()
+
+        # Transactions are started explicitly, when claiming runs
+        self.connection = sqlite3.connect(path, timeout=timeout,
+                                          isolation_level=None)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "name TEXT PRIMARY KEY, state TEXT NOT NULL, start_time REAL, "
+            "end_time REAL, host TEXT, pid INTEGER, runtime REAL, "
+            "error TEXT, parameters TEXT)")
+
+        # Ledgers created before parameters were recorded
+        columns = [c[1] for c in self.connection.execute(
+            "PRAGMA table_info(runs)").fetchall()]
+
+        if "parameters" not in columns:
+            self.connection.execute(
+                "ALTER TABLE runs ADD COLUMN parameters TEXT")
+
+    def claim(self, name, parameters=None):
+        """
+        Marks a run as running in this process, unless it is completed,
+        cached or running in another live process (or, on another host, not
+        yet stale).
+
+        Parameters
+        ----------
+        name : string
+            The name of the experiment
+        parameters : dict, optional
+            The experiment, as a row of an experiments file, recorded with
+            the run
+
+        Returns
+        -------
+        bool
+            Whether the run was claimed, and so should be run
+        """
+        self.connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            row = self.connection.execute(
+                "SELECT state, host, pid, start_time FROM runs "
+                "WHERE name = ?",
+                (name,)).fetchone()
+
+            if row is not None and (row[0] in [self.COMPLETED,
+                                               self.CACHED] or (
+                    row[0] == self.RUNNING and self.__is_live(*row[1:]))):
+                claimed = False
+            else:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO runs (name, state, start_time, "
+                    "host, pid, parameters) VALUES (?, ?, ?, ?, ?, ?)",
+                    (name, self.RUNNING, time.time(), self.host, self.pid,
+                     json.dumps(parameters, default=float)))
+                claimed = True
+
+            self.connection.execute("COMMIT")
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+
+        return claimed
+
+    def complete(self, name):
+        """
+        Marks a run claimed by this process as completed.
+        """
+        self.__finish(name, self.COMPLETED, None)
+
+    def cache(self, name):
+        """
+        Marks a run claimed by this process as satisfied by reference to the
+        report of an identical run.
+        """
+        self.__finish(name, self.CACHED, None)
+
+    def fail(self, name, error):
+        """
+        Marks a run claimed by this process as failed, recording the error
+        it failed with.
+        """
+        self.__finish(name, self.FAILED, error)
+
+    def get_runs(self, state=None):
+        """
+        Returns the runs recorded, as dictionaries keyed by column, Eg:
+        "name", "state", "runtime", "parameters" (a dict, or None).
+        Optionally, only those in a state.
+        """
+        query = "SELECT * FROM runs"
+        args = ()
+
+        if state is not None:
+            query += " WHERE state = ?"
+            args = (state,)
+
+        cursor = self.connection.execute(query, args)
+        columns = [c[0] for c in cursor.description]
+
+        runs = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        for run in runs:
+            run["parameters"] = json.loads(run["parameters"] or "null")
+
+        return runs
+
+    def get_counts(self):
+        """
+        Returns the number of runs in each state.
+        """
+        return dict(self.connection.execute(
+            "SELECT state, COUNT(*) FROM runs GROUP BY state").fetchall())
+
+    def close(self):
+        self.connection.close()
+
+    def __finish(self, name, state, error):
+        end_time = time.time()
+
+        self.connection.execute(
+            "UPDATE runs SET state = ?, end_time = ?, "
+            "runtime = ? - start_time, error = ? WHERE name = ?",
+            (state, end_time, end_time, error, name))
+
+    def __is_live(self, host, pid, start_time):
+        # Processes on other hosts can not be checked, so are assumed live
+        # until their run is stale
+        if host != self.host:
+            return self.stale_after is None or start_time is None or \
+                time.time() - start_time <= self.stale_after
+
+        if pid == self.pid:
+            return True
+
+        try:
+            os.kill(pid, 0)
+        except OSError as e:
+            # The process exists, but belongs to another user
+            return e.errno == errno.EPERM
+
+        return True
@@ -0,0 +1,100 @@
+from runners.RunLedger import RunLedger
+from runners.WorkerPool import run_in_process
+
+
+class SweepRunner(object):
+    """
+    Runs the experiments of a sweep, recording each run in a RunLedger, so
+    experiments completed, or running in another process, are skipped and
+    failures do not stop the sweep.
+
+    Attributes
+    ----------
+    ledger : RunLedger
+        The ledger runs are recorded in
+    pool : WorkerPool, optional
+        The pool experiments are run in. Defaults to None, in which case
+        they are run one after another in the current process.
+    cost_model : CostModel, optional
+        If given, it is fitted on the runs completed so far and experiments
+        are run in decreasing order of predicted runtime. Defaults to None,
+        in which case experiments are run in the order given.
+    result_cache : ResultCache, optional
+        If given, experiments repeating a run whose report is cached refer to
+        that report rather than being run, and the reports of completed
+        experiments are added to it. Defaults to None.
+    """
+
+    def __init__(self, ledger, pool=None, cost_model=None,
+                 result_cache=None):
+        self.ledger = ledger
+        self.pool = pool
+        self.cost_model = cost_model
+        self.result_cache = result_cache
+
+    def run(self, function, experiments):
+        """
+        Runs function on each experiment not yet completed or running.
+
+        Parameters
+        ----------
+        function : callable
+            Called with each experiment, Eg: run_experiment
+        experiments : list
+            The experiments, as rows of an experiments file
+
+        Returns
+        -------
+        list
+            The WorkerResults of the experiments run by this call, in the
+            order they completed. Those of experiments satisfied from the
+            result cache are not included.
+        """
+        if self.cost_model is not None:
+            self.cost_model.fit(self.ledger.get_runs(RunLedger.COMPLETED))
+            experiments = self.cost_model.order(experiments)
+
+        # Experiments are claimed as they are dispatched rather than up
+        # front, so sweeps sharing the ledger split them between them
+        claimed = (e for e in experiments
+                   if self.ledger.claim(e["name"], e) and not self.__refer(e))
+
+        if self.pool is None:
+            results = run_in_process(function, claimed)
+        else:
+            results = self.pool.run(function, claimed)
+
+        finished = []
+
+        for result in results:
+            if result.succeeded:
+                self.ledger.complete(result.task["name"])
+
+                if self.result_cache is not None:
+                    self.result_cache.add(result.task, result.value)
+            else:
+                print("{0} failed:\n{1}".format(result.task["name"],
+                                                result.error))
+                self.ledger.fail(result.task["name"], result.error)
+
+            finished.append(result)
+
+        return finished
+
+    def __refer(self, experiment):
+        # Whether the experiment was satisfied by reference to a cached
+        # report
+        if self.result_cache is None:
+            return False
+
+        report = self.result_cache.get(experiment)
+
+        if report is None:
+            return False
+
+        self.result_cache.refer(experiment, report)
+        self.ledger.cache(experiment["name"])
+        print("{0} refers to the report of an identical run, {1}".format(
+            experiment["name"], report))
+
+        return True
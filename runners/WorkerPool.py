@@ -0,0 +1,179 @@
+import multiprocessing
+import os
+import pickle
+import resource
+import shutil
+import signal
+import sys
+import tempfile
+import traceback
+
+
+class WorkerResult(object):
+    """
+    The outcome of running a task in a worker process.
+
+    Attributes
+    ----------
+    task : object
+        The task, as passed to WorkerPool.run
+    value : object
+        The value returned for the task, None if it failed
+    error : string
+        The traceback of the exception raised for the task, or a
+        description of how the worker died, None if it succeeded
+    """
+
+    def __init__(self, task, value=None, error=None):
+        self.task = task
+        self.value = value
+        self.error = error
+
+    @property
+    def succeeded(self):
+        return self.error is None
+
+
+class WorkerPool(object):
+    """
+    Runs tasks in worker processes forked from the current one, one worker
+    per task, so everything imported and warmed up in the current process
+    (Eg: by calling warm_up from runners.ExperimentRunner) is shared by the
+    workers rather than paid for again by each of them.
+
+    Each task runs in its own process, so a task which raises, exceeds its
+    memory limit or crashes the interpreter only fails itself, and memory
+    it allocates is returned to the system when its worker exits.
+
+    Workers are forked, so the pool is only available on POSIX systems.
+
+    Attributes
+    ----------
+    max_workers : int, optional
+        The maximum number of workers running at once. Defaults to the
+        number of cpus.
+    memory_limit : int, optional
+        The maximum size, in bytes, of the address space of each worker, past
+        which allocations raise MemoryError. Defaults to None, meaning no
+        limit beyond that of the current process.
+    """
+
+    def __init__(self, max_workers=None, memory_limit=None):
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.memory_limit = memory_limit
+
+    def run(self, function, tasks):
+        """
+        Runs function on each task, in worker processes.
+
+        Worker processes are reaped with os.waitpid(-1), so children of the
+        current process not started by the pool should not be running while
+        it is.
+
+        Parameters
+        ----------
+        function : callable
+            Called with a task in each worker. Its return value must be
+            picklable.
+        tasks : iterable
+            The tasks
+
+        Returns
+        -------
+        generator
+            WorkerResults, in the order tasks complete. Workers still
+            running when the generator is closed are killed.
+        """
+        tasks = iter(tasks)
+        running = dict()
+        num_started = 0
+        results_dir = tempfile.mkdtemp()
+
+        try:
+            while True:
+                while len(running) < self.max_workers:
+                    task = next(tasks, StopIteration)
+
+                    if task is StopIteration:
+                        break
+
+                    path = os.path.join(results_dir, str(num_started))
+                    running[self.__fork(function, task, path)] = (task, path)
+                    num_started += 1
+
+                if not running:
+                    break
+
+                pid, status = os.waitpid(-1, 0)
+
+                if pid not in running:
+                    continue
+
+                task, path = running.pop(pid)
+
+                yield self.__get_result(task, path, status)
+        finally:
+            for pid in running:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+
+            shutil.rmtree(results_dir)
+
+    def __fork(self, function, task, path):
+        # Buffered output would otherwise be written by both processes
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        pid = os.fork()
+
+        if pid != 0:
+            return pid
+
+        # Worker process, which must never return into the caller's code
+        exit_code = 1
+
+        try:
+            if self.memory_limit is not None:
+                resource.setrlimit(resource.RLIMIT_AS, (self.memory_limit,
+                                                        self.memory_limit))
+
+            try:
+                outcome = (function(task), None)
+            except BaseException:
+                outcome = (None, traceback.format_exc())
+
+            with open(path, "wb") as f:
+                pickle.dump(outcome, f, pickle.HIGHEST_PROTOCOL)
+
+            exit_code = 0
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(exit_code)
+
+    def __get_result(self, task, path, status):
+        if os.WIFSIGNALED(status):
+            return WorkerResult(task, error="Worker killed by signal %d" %
+                                os.WTERMSIG(status))
+
+        if not os.path.isfile(path) or os.WEXITSTATUS(status) != 0:
+            return WorkerResult(task, error="Worker exited with status %d" %
+                                os.WEXITSTATUS(status))
+
+        with open(path, "rb") as f:
+            value, error = pickle.load(f)
+
+        return WorkerResult(task, value, error)
+
+
+def run_in_process(function, tasks):
+    """
+    Runs function on each task, one after another in the current process,
+    yielding WorkerResults as WorkerPool.run does. Used in place of a pool
+    when no workers are asked for.
+    """
+    for task in tasks:
+        try:
+            yield WorkerResult(task, function(task))
+        except Exception:
+            yield WorkerResult(task, error=traceback.format_exc())